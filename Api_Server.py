@@ -0,0 +1,619 @@
+"""Headless HTTP/JSON service for browsing, cart, checkout and user profiles (no tkinter)."""
+import argparse
+import gc
+import hmac
+import http.client
+import json
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from Metrics import REGISTRY, timer
+from Metrics import enable as enable_metrics
+from Order_Events import OrderEventBus
+from Order_Placement import OrderPlacement, OrderStatusUpdater, PaymentMethod, RestaurantMenu
+from Password_Hashing import PasswordHasher
+from Profiling import active as active_profiler
+from Profiling import enable as enable_profiling
+from Recommendations import RECOMMENDATIONS_FILE, RecommendationTable, user_baskets
+from Restaurant_Browsing import RestaurantBrowsing, RestaurantDatabase, RestaurantSearch, generate_restaurants
+from Session_Store import SessionStore
+from User_Registration import OutboxMailer, UserRegistration
+from User_Store import ShardedUserStore, open_user_store, save_users, shard_for
+
+MENU_ITEMS = ["Burger", "Pizza", "Salad"]
+READ_ONLY_ROUTES = {("GET", "restaurants"), ("GET", "metrics")}
+ITEM_PRICE = 10.0  # static price for simplicity, same as the desktop app
+MAX_EVENT_WAIT = 10.0  # longest GET /orders/events long-poll; each one holds a worker thread
+MAX_STATUS_BATCH = 1000  # most updates one POST /orders/status may carry
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _text(body, key, default=""):
+    # JSON fields come from the client as-is; check the type before the domain code sees them
+    value = body.get(key)
+    if value is None:
+        return default
+    if not isinstance(value, str):
+        raise ApiError(400, f"{key} must be a string")
+    return value
+
+
+def _integer(body, key, default=None):
+    value = body.get(key, default)
+    # bool is a subclass of int, but {"quantity": true} is a client bug, not a quantity of 1
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ApiError(400, f"{key} must be an integer")
+    return value
+
+
+class ApiService:
+    """Routes JSON requests to the domain classes. Transport-agnostic, so it can be tested without sockets."""
+
+    def __init__(self, registration=None, database=None, menu=None, users_file=None, read_only=False,
+                 recommendations=None, kitchen_token=None):
+        self.registration = registration or UserRegistration()
+        self.database = database or RestaurantDatabase()
+        self.search = RestaurantSearch(RestaurantBrowsing(self.database))
+        self.menu = menu or RestaurantMenu(available_items=list(MENU_ITEMS))
+        self.users_file = users_file
+        self.recommendations = recommendations  # RecommendationTable from the last offline build, if any
+        # Multi-worker processes do not share user state, so they only serve the catalog.
+        self.read_only = read_only
+        self.kitchen_token = kitchen_token  # bearer token for POST /orders/status; the route is off without one
+        # Restaurant ratings include every stored review; the sessions' profiles keep them current
+        self.database.load_reviews(self.registration.users)
+        self.order_events = OrderEventBus()
+        self.sessions = SessionStore(self.registration, review_listener=self.database.record_review,
+                                     event_bus=self.order_events)
+        self._save_lock = threading.Lock()
+        self.status_updater = OrderStatusUpdater(self.registration.users, self.registration.lock_for,
+                                                 self.order_events)
+
+        self.routes = {
+            ("GET", "restaurants"): self.get_restaurants,
+            ("POST", "register"): self.post_register,
+            ("POST", "confirm"): self.post_confirm,
+            ("POST", "login"): self.post_login,
+            ("POST", "logout"): self.post_logout,
+            ("GET", "cart"): self.get_cart,
+            ("POST", "cart/items"): self.post_cart_item,
+            ("PUT", "cart/items"): self.put_cart_item,
+            ("DELETE", "cart/items"): self.delete_cart_item,
+            ("POST", "checkout"): self.post_checkout,
+            ("GET", "orders"): self.get_orders,
+            ("GET", "orders/events"): self.get_order_events,
+            ("POST", "orders/status"): self.post_order_statuses,
+            ("GET", "favorites"): self.get_favorites,
+            ("POST", "favorites"): self.post_favorite,
+            ("DELETE", "favorites"): self.delete_favorite,
+            ("POST", "reviews"): self.post_review,
+            ("GET", "recommendations"): self.get_recommendations,
+            ("GET", "metrics"): self.get_metrics,
+            ("GET", "debug/slow-operations"): self.get_slow_operations,
+        }
+        REGISTRY.gauge("api_sessions_active", help="Live login sessions").set_function(self.sessions.__len__)
+
+    def handle(self, method, path, query=None, body=None, token=None):
+        """Returns (status, payload) for one request."""
+        parts = [unquote(p) for p in path.strip("/").split("/") if p]
+        # Collection routes take an optional trailing resource name, e.g. DELETE /favorites/<name>
+        handler = self.routes.get((method, "/".join(parts)))
+        resource = None
+        if handler is None and parts:
+            handler = self.routes.get((method, "/".join(parts[:-1])))
+            resource = parts[-1]
+        if handler is None:
+            return 404, {"success": False, "message": "Not found"}
+        if self.read_only and (method, "/".join(parts)) not in READ_ONLY_ROUTES:
+            return 503, {"success": False, "message": "Not available in multi-worker mode"}
+
+        request = {"query": query or {}, "body": body or {}, "token": token, "resource": resource}
+        with timer("api_request_seconds", {"method": method, "route": handler.__name__}):
+            try:
+                return 200, handler(request)
+            except ApiError as e:
+                return e.status, {"success": False, "message": e.message}
+            except Exception:
+                # A handler bug must not kill the connection thread or leak a traceback to the client
+                traceback.print_exc()
+                return 500, {"success": False, "message": "Internal server error"}
+
+    def _persist(self, email):
+        users = self.registration.users
+        if isinstance(users, ShardedUserStore):
+            users.save(email)  # only the shard holding this user
+        elif self.users_file:
+            # Other handlers keep mutating users while we write, so save a per-user-locked snapshot
+            with self._save_lock:
+                save_users(self.registration.snapshot(), self.users_file)
+
+    def _persist_many(self, emails):
+        # One commit for a batch touching many users: each affected shard once, or a single snapshot
+        users = self.registration.users
+        if isinstance(users, ShardedUserStore):
+            for email in {shard_for(email, users.shard_count): email for email in emails}.values():
+                users.save(email)
+        elif emails:
+            self._persist(None)
+
+    def persist_purged(self, emails):
+        # on_purge callback for the confirmation sweeper
+        users = self.registration.users
+        for email in emails:
+            self.sessions.revoke_user(email)
+        if isinstance(users, ShardedUserStore):
+            users.save_dirty()
+        elif emails:
+            self._persist(None)
+
+    # Sessions
+    def _session(self, request):
+        session = self.sessions.get(request["token"])
+        if session is None:
+            raise ApiError(401, "Login required")
+        return session
+
+    # Browsing
+    def get_restaurants(self, request):
+        q = request["query"]
+        try:
+            rating = float(q["rating"]) if q.get("rating") else None
+        except ValueError:
+            raise ApiError(400, "rating must be a number")
+        results = self.search.search_restaurants(cuisine=q.get("cuisine") or None,
+                                                 location=q.get("location") or None,
+                                                 rating=rating)
+        return {"success": True, "restaurants": results}
+
+    # Accounts
+    def post_register(self, request):
+        b = request["body"]
+        email = _text(b, "email")
+        result = self.registration.register(email, _text(b, "password"), _text(b, "confirm_password"))
+        if not result["success"]:
+            raise ApiError(400, result["error"])
+        self._persist(email)
+        return result
+
+    def post_confirm(self, request):
+        result = self.registration.confirm_email(_text(request["body"], "token"))
+        if not result["success"]:
+            raise ApiError(400, result["error"])
+        self._persist(result["email"])
+        return result
+
+    def post_login(self, request):
+        b = request["body"]
+        email = _text(b, "email").strip()
+        token = self.sessions.login(email, _text(b, "password"))
+        if token is None:
+            raise ApiError(401, "Invalid email or password")
+        return {"success": True, "token": token}
+
+    def post_logout(self, request):
+        self.sessions.revoke(request["token"])
+        return {"success": True, "message": "Logged out"}
+
+    # Cart
+    def get_cart(self, request):
+        cart = self._session(request).cart
+        return {"success": True, "items": cart.view_cart(), "total_info": cart.calculate_total()}
+
+    def post_cart_item(self, request):
+        cart = self._session(request).cart
+        b = request["body"]
+        quantity = _integer(b, "quantity", 1)
+        message = cart.add_item(_text(b, "name"), ITEM_PRICE, quantity)
+        return {"success": True, "message": message, "items": cart.view_cart()}
+
+    def put_cart_item(self, request):
+        cart = self._session(request).cart
+        quantity = _integer(request["body"], "quantity")
+        if quantity <= 0:
+            raise ApiError(400, "Quantity must be greater than 0")
+        message = cart.update_item_quantity(request["resource"], quantity)
+        return {"success": True, "message": message, "items": cart.view_cart()}
+
+    def delete_cart_item(self, request):
+        cart = self._session(request).cart
+        message = cart.remove_item(request["resource"])
+        return {"success": True, "message": message, "items": cart.view_cart()}
+
+    # Checkout
+    def post_checkout(self, request):
+        session = self._session(request)
+        menu = self.menu
+        restaurant = _text(request["body"], "restaurant")
+        if restaurant:
+            if self.database.get_by_name(restaurant) is None:
+                raise ApiError(400, "Unknown restaurant")
+            menu = RestaurantMenu(self.menu.available_items, restaurant=restaurant)
+        placement = OrderPlacement(session.cart, session.profile, menu)
+        result = placement.confirm_order(PaymentMethod())
+        if not result["success"]:
+            raise ApiError(400, result["message"])
+        self._persist(session.email)
+        return result
+
+    # Profile: history, favorites, reviews
+    def get_orders(self, request):
+        profile = self._session(request).profile
+        q = request["query"]
+        if q.get("status") or q.get("from") or q.get("to"):
+            orders = profile.filter_orders(status=q.get("status") or None,
+                                           date_from=q.get("from") or None,
+                                           date_to=q.get("to") or None)
+        else:
+            orders = profile.view_order_history()
+        return {"success": True, "orders": orders}
+
+    def get_order_events(self, request):
+        # Long-poll: waits up to ?timeout= seconds for the user's next order events. The first call starts
+        # the subscription, so it only sees events from then on; "dropped" > 0 means re-read GET /orders.
+        session = self._session(request)
+        try:
+            timeout = float(request["query"].get("timeout") or 0)
+        except ValueError:
+            timeout = None
+        if timeout is None or not timeout >= 0:  # also rejects nan
+            raise ApiError(400, "timeout must be a non-negative number")
+        timeout = min(timeout, MAX_EVENT_WAIT)
+        subscription = self.sessions.events_for(session)
+        events = subscription.drain(timeout) if subscription is not None else []
+        return {"success": True, "events": events, "dropped": subscription.dropped if subscription else 0}
+
+    def post_order_statuses(self, request):
+        # Kitchen systems: {"updates": [{"order_id", "status"}, ...]} for orders of any users, applied in
+        # one pass and saved once. Each update gets its own outcome; a rejected one does not stop the rest.
+        if not self.kitchen_token or not hmac.compare_digest(str(request["token"] or ""), self.kitchen_token):
+            raise ApiError(403, "Kitchen token required")
+        updates = request["body"].get("updates")
+        if not isinstance(updates, list) or not updates:
+            raise ApiError(400, "updates must be a non-empty list")
+        if len(updates) > MAX_STATUS_BATCH:
+            raise ApiError(400, f"At most {MAX_STATUS_BATCH} updates per request")
+        if not all(isinstance(u, dict) for u in updates):
+            raise ApiError(400, "Each update must be an object with order_id and status")
+        outcomes, changed = self.status_updater.update([(_text(u, "order_id"), _text(u, "status")) for u in updates])
+        self._persist_many(changed)
+        return {"success": True, "updated": sum(o["success"] for o in outcomes), "results": outcomes}
+
+    def get_favorites(self, request):
+        profile = self._session(request).profile
+        return {"success": True, "favorites": profile.list_favorites()}
+
+    def post_favorite(self, request):
+        profile = self._session(request).profile
+        return self._saved(profile, profile.add_favorite_restaurant(_text(request["body"], "name")))
+
+    def delete_favorite(self, request):
+        profile = self._session(request).profile
+        return self._saved(profile, profile.remove_favorite_restaurant(request["resource"]))
+
+    def post_review(self, request):
+        profile = self._session(request).profile
+        b = request["body"]
+        rating = b.get("rating")
+        if isinstance(rating, bool):
+            raise ApiError(400, "rating must be an integer")
+        return self._saved(profile, profile.add_order_review(_text(b, "order_id"), rating, _text(b, "text")))
+
+    def get_recommendations(self, request):
+        session = self._session(request)
+        table = self.recommendations
+        if table is None:
+            return {"success": True, "restaurants": []}
+        names = table.for_user(session.email)
+        if not names:
+            # Not in the last build: merge the tables of the restaurants they have used so far
+            profile = session.profile
+            history = {"favorites": profile.list_favorites(), "orders": profile.view_order_history()}
+            for _, basket in user_baskets({session.email: history}):
+                names = table.for_restaurants(basket)
+        return {"success": True, "restaurants": names}
+
+    def get_metrics(self, request):
+        # Plain text, not JSON: the Prometheus exposition format
+        return REGISTRY.export_text()
+
+    def get_slow_operations(self, request):
+        profiler = active_profiler()
+        if profiler is None:
+            raise ApiError(404, "Slow-operation profiling is off; start with --profile-slow SECONDS")
+        return {"success": True, "threshold": profiler.threshold, "traces": profiler.recent()}
+
+    def _saved(self, profile, result):
+        if not result["success"]:
+            raise ApiError(400, result["message"])
+        self._persist(profile.email)
+        return result
+
+
+class ApiRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    timeout = 15  # close idle keep-alive connections so they do not pin a worker
+    disable_nagle_algorithm = True  # headers and body are written separately
+
+    def _dispatch(self, method):
+        url = urlsplit(self.path)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        body = {}
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            # The body's extent is unknown, so the connection cannot be reused for another request
+            self.close_connection = True
+            return self._send(400, {"success": False, "message": "Invalid Content-Length"})
+        if length:
+            try:
+                body = json.loads(self.rfile.read(length))
+            except ValueError:
+                return self._send(400, {"success": False, "message": "Invalid JSON body"})
+            if not isinstance(body, dict):
+                return self._send(400, {"success": False, "message": "JSON body must be an object"})
+
+        auth = self.headers.get("Authorization", "")
+        token = auth[len("Bearer "):] if auth.startswith("Bearer ") else None
+
+        status, payload = self.server.service.handle(method, url.path, query, body, token)
+        self._send(status, payload)
+
+    def _send(self, status, payload):
+        if isinstance(payload, str):
+            data, content_type = payload.encode("utf-8"), "text/plain; version=0.0.4"
+        else:
+            data, content_type = json.dumps(payload).encode("utf-8"), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ApiServer(HTTPServer):
+    """HTTP server that hands each connection to a bounded thread pool."""
+
+    daemon_threads = True
+
+    def __init__(self, address, service, max_workers=32):
+        super().__init__(address, ApiRequestHandler)
+        self.service = service
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="api")
+
+    def process_request(self, request, client_address):
+        self._pool.submit(self._process_request_worker, request, client_address)
+
+    def _process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self._pool.shutdown(wait=False)
+        self.service.registration.stop_sweeper()
+        self.service.registration.hasher.shutdown()
+
+
+def create_server(host="127.0.0.1", port=8000, users_file=None, max_workers=32, shards_dir=None, shard_count=0,
+                  mailer=None, sweep_interval=0, hash_workers=0, kitchen_token=None):
+    # sweep_interval > 0 purges accounts whose confirmation token expired; only enable it with a real mailer.
+    # hash_workers > 0 runs password hashes on that many threads (HASH_WORKERS in the environment also works).
+    hash_workers = hash_workers or int(os.environ.get("HASH_WORKERS", "0") or 0)
+    registration = UserRegistration(hasher=PasswordHasher(pool_size=hash_workers), mailer=mailer)
+    if users_file or shard_count:
+        registration.users = open_user_store(users_file, shards_dir, shard_count)
+        registration.restore_confirmations()
+    recommendations = RecommendationTable.load() if os.path.exists(RECOMMENDATIONS_FILE) else None
+    service = ApiService(registration=registration, users_file=users_file, recommendations=recommendations,
+                         kitchen_token=kitchen_token or os.environ.get("KITCHEN_TOKEN") or None)
+    if sweep_interval:
+        registration.start_sweeper(sweep_interval, on_purge=service.persist_purged)
+    return ApiServer((host, port), service, max_workers=max_workers)
+
+
+def serve_prefork(host="127.0.0.1", port=8000, workers=None, database=None, threads_per_worker=8):
+    """
+    Serves the catalog from several forked worker processes sharing one listening socket.
+
+    The catalog and its indexes are built once in the parent; workers inherit them through fork
+    copy-on-write instead of rebuilding them, so searches scale past the single-core GIL limit.
+    """
+    if not hasattr(os, "fork"):
+        raise RuntimeError("Multi-worker mode requires os.fork")
+    workers = workers or os.cpu_count() or 1
+    service = ApiService(database=database, read_only=True)
+    server = ApiServer((host, port), service, max_workers=threads_per_worker)
+    # Workers race to accept; the losers get EAGAIN instead of blocking in accept().
+    server.socket.setblocking(False)
+
+    # Move everything built so far out of the collector's reach, so that GC passes in the workers
+    # do not write to (and therefore copy) the shared catalog pages.
+    gc.collect()
+    gc.freeze()
+
+    def stop_master(signum, frame):
+        raise KeyboardInterrupt
+
+    # Turn SIGTERM into a clean shutdown so the workers are not orphaned.
+    previous_handler = signal.signal(signal.SIGTERM, stop_master)
+    children = []
+    try:
+        for _ in range(workers):
+            pid = os.fork()
+            if pid == 0:
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                try:
+                    server.serve_forever()
+                finally:
+                    os._exit(0)
+            children.append(pid)
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        signal.signal(signal.SIGTERM, previous_handler)
+        server.server_close()
+
+
+def _free_port(host):
+    with socket.socket() as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+def _wait_for_port(host, port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((host, port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise TimeoutError(f"Server on {host}:{port} did not start")
+
+
+def _search_client(args):
+    host, port, paths = args
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    for path in paths:
+        conn.request("GET", path)
+        conn.getresponse().read()
+    conn.close()
+    return len(paths)
+
+
+def benchmark_prefork_scaling(worker_counts=(1, 2, 4), requests=2000, clients=8, restaurants=20000):
+    """
+    Measures search throughput of serve_prefork for each worker count.
+
+    Returns:
+        list: One dict per worker count with requests per second and the speed-up over the first count.
+    """
+    host = "127.0.0.1"
+    database = RestaurantDatabase(generate_restaurants(restaurants))
+    cuisines = sorted({r["cuisine"] for r in database.get_restaurants()})
+    paths = [f"/restaurants?cuisine={cuisines[i % len(cuisines)].replace(' ', '%20')}&rating=4.8"
+             for i in range(requests)]
+
+    import multiprocessing  # benchmark-only; keeps it out of every server process's startup
+
+    rows = []
+    context = multiprocessing.get_context("fork")
+    for workers in worker_counts:
+        port = _free_port(host)
+        master = context.Process(target=serve_prefork, args=(host, port, workers, database))
+        master.start()
+        try:
+            _wait_for_port(host, port)
+            with context.Pool(clients) as pool:
+                start = time.perf_counter()
+                pool.map(_search_client, [(host, port, paths[i::clients]) for i in range(clients)])
+                elapsed = time.perf_counter() - start
+        finally:
+            master.terminate()
+            master.join()
+        rows.append({"workers": workers, "requests": requests, "elapsed": elapsed,
+                     "requests_per_second": requests / elapsed})
+
+    for row in rows:
+        row["speedup"] = row["requests_per_second"] / rows[0]["requests_per_second"]
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the food delivery app as a headless JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--users-file", default="users.json")
+    parser.add_argument("--workers", type=int, default=32, help="request handler threads")
+    parser.add_argument("--shards", type=int, default=0, help="store users in this many shard files")
+    parser.add_argument("--shards-dir", default="users_shards")
+    parser.add_argument("--processes", type=int, default=0,
+                        help="pre-fork this many catalog-only worker processes (0 = single process)")
+    parser.add_argument("--benchmark", action="store_true", help="print the multi-worker scaling curve and exit")
+    parser.add_argument("--metrics", action="store_true", help="record metrics and serve them at GET /metrics")
+    parser.add_argument("--profile-slow", type=float, metavar="SECONDS",
+                        help="keep traces of operations slower than this, at GET /debug/slow-operations")
+    parser.add_argument("--hash-workers", type=int, default=0,
+                        help="threads for password hashing (default: HASH_WORKERS or the request thread)")
+    parser.add_argument("--mail-outbox", metavar="PATH",
+                        help="append confirmation emails to this JSON-lines file for a mail relay to send")
+    parser.add_argument("--sweep-interval", type=float, default=0,
+                        help="seconds between purges of expired unconfirmed accounts (needs --mail-outbox)")
+    parser.add_argument("--kitchen-token", metavar="TOKEN",
+                        help="enable POST /orders/status for callers presenting this token (or set KITCHEN_TOKEN)")
+    args = parser.parse_args(argv)
+    if args.sweep_interval and not args.mail_outbox:
+        parser.error("--sweep-interval needs --mail-outbox, or users could never confirm in time")
+    if args.metrics:
+        enable_metrics()
+    if args.profile_slow is not None:
+        enable_profiling(args.profile_slow)
+
+    if args.benchmark:
+        counts = sorted({1, 2, os.cpu_count() or 1, 2 * (os.cpu_count() or 1)})
+        for row in benchmark_prefork_scaling(worker_counts=counts):
+            print(f"{row['workers']:>3} workers: {row['requests_per_second']:8.0f} req/s  x{row['speedup']:.2f}")
+        return
+    if args.processes:
+        print(f"Serving catalog on http://{args.host}:{args.port} with {args.processes} processes")
+        serve_prefork(args.host, args.port, args.processes)
+        return
+
+    mailer = OutboxMailer(args.mail_outbox) if args.mail_outbox else None
+    server = create_server(args.host, args.port, args.users_file, args.workers, args.shards_dir, args.shards,
+                           mailer=mailer, sweep_interval=args.sweep_interval, hash_workers=args.hash_workers,
+                           kitchen_token=args.kitchen_token)
+    print(f"Serving on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
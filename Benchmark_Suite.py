@@ -0,0 +1,212 @@
+"""Micro-benchmarks for browsing, cart, checkout, order filtering and persistence across data scales, plus
+the cold-start import time of the domain modules.
+
+Results are written as JSON. When a baseline file from an earlier run exists, each timing is compared
+with it and anything slower by more than the tolerance is reported as a regression (exit status 1).
+Baselines are machine-specific, so record one per machine with --save-baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import timeit
+from datetime import date, timedelta
+
+from Order_Placement import Cart, OrderPlacement, PaymentMethod, RestaurantMenu, UserProfile
+from Restaurant_Browsing import RestaurantBrowsing, RestaurantDatabase, generate_restaurants
+from User_Store import load_users, save_users
+
+# name -> (restaurants, users, orders per user)
+SCALES = {
+    "small": (1_000, 100, 10),
+    "medium": (10_000, 1_000, 50),
+    "large": (100_000, 10_000, 100),
+}
+BASELINE_FILE = os.path.join("benchmarks", "baseline.json")
+MENU_ITEMS = ["Burger", "Pizza", "Salad"]
+STATUSES = ["Placed", "Delivered", "Cancelled"]
+# Modules every worker imports at startup, and modules none of them should drag in
+STARTUP_MODULES = ["Order_Placement", "Payment_Processing", "User_Registration", "Restaurant_Browsing",
+                   "Session_Store", "Api_Server"]
+STARTUP_FORBIDDEN = ("unittest", "tkinter", "cProfile", "pstats", "multiprocessing")
+
+
+def generate_users(count, orders_per_user, restaurants, seed=0):
+    """Synthetic users.json content: `count` users with `orders_per_user` orders each over the last year."""
+    rng = random.Random(seed)
+    names = [r["name"] for r in restaurants]
+    start = date.today() - timedelta(days=365)
+    users = {}
+    for n in range(count):
+        orders = []
+        for k in range(orders_per_user):
+            day = (start + timedelta(days=rng.randrange(365))).isoformat()
+            items = [{"name": rng.choice(MENU_ITEMS), "quantity": rng.randint(1, 3)} for _ in range(rng.randint(1, 4))]
+            for item in items:
+                item["subtotal"] = item["quantity"] * 10.0
+            orders.append({"order_id": f"ORD-{n:06d}-{k:04d}", "items": items,
+                           "total_amount": sum(i["subtotal"] for i in items), "status": rng.choice(STATUSES),
+                           "date": day, "created_at": f"{day}T12:00:00", "restaurant": rng.choice(names)})
+        users[f"user{n}@example.com"] = {
+            "password_hash": {"algorithm": "pbkdf2_sha256", "iterations": 1, "salt": "00", "hash": "00"},
+            "confirmed": True,
+            "delivery_address": f"{n} Main St",
+            "favorites": rng.sample(names, min(3, len(names))),
+            "orders": orders,
+            "reviews": {},
+        }
+    return users
+
+
+def _best(fn, number, repeat=5):
+    # Best of `repeat` runs is the least noisy estimate of the per-call cost
+    return min(timeit.repeat(fn, number=number, repeat=repeat)) / number
+
+
+def bench_scale(scale, restaurant_count, user_count, orders_per_user, seed=0):
+    """Time each operation at one scale. Returns a list of result dicts."""
+    restaurants = generate_restaurants(restaurant_count, seed=seed)
+    browsing = RestaurantBrowsing(RestaurantDatabase(restaurants))
+    users = generate_users(user_count, orders_per_user, restaurants, seed=seed)
+    results = []
+
+    def record(name, seconds, **params):
+        results.append({"name": name, "scale": scale, "seconds_per_op": seconds,
+                        "ops_per_second": 1 / seconds if seconds else None, "params": params})
+
+    search_number = max(1, 100_000 // restaurant_count)
+    record("search_by_filters", _best(lambda: browsing.search_by_filters("Italian", "Downtown", 4.0), search_number),
+           restaurants=restaurant_count)
+
+    cart = Cart()
+    for i in range(20):
+        cart.add_item(f"Item {i}", 10.0 + i, 1 + i % 3)
+    record("cart_calculate_total", _best(cart.calculate_total, 10_000), items=len(cart.items))
+
+    # Checkout appends to the profile each time; start from a copy of a real user with K orders
+    user_record = dict(next(iter(users.values())))
+    user_record["orders"] = list(user_record["orders"])
+    profile = UserProfile(email="bench@example.com", store=user_record)
+    menu = RestaurantMenu(MENU_ITEMS, restaurant=restaurants[0]["name"])
+    checkout_cart = Cart()
+    placement = OrderPlacement(checkout_cart, profile, menu)
+    payment = PaymentMethod()
+    filled = [("Burger", 10.0, 2), ("Pizza", 12.0, 1), ("Salad", 8.0, 1)]
+
+    def checkout():
+        for item in filled:
+            checkout_cart.add_item(*item)
+        placement.confirm_order(payment)
+
+    record("confirm_order", _best(checkout, 200), orders_per_user=orders_per_user)
+
+    profile = UserProfile(email="bench@example.com", store=next(iter(users.values())))
+    since = (date.today() - timedelta(days=90)).isoformat()
+    record("filter_orders", _best(lambda: profile.filter_orders(status="Delivered", date_from=since), 200),
+           orders_per_user=orders_per_user)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "users.json")
+        record("save_users", _best(lambda: save_users(users, path), 1, repeat=3), users=user_count,
+               orders_per_user=orders_per_user)
+        record("load_users", _best(lambda: load_users(path), 1, repeat=3), users=user_count,
+               orders_per_user=orders_per_user)
+    return results
+
+
+def import_times(module):
+    """
+    Cold-start import of `module` in a fresh interpreter under -X importtime.
+
+    Returns {imported module name: cumulative seconds}; the entry for `module` is its total import cost.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    times = {}
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", indented by nesting depth
+        if not line.startswith("import time:") or line.rstrip().endswith("imported package"):
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative) / 1e6
+    return times
+
+
+def bench_startup(modules=STARTUP_MODULES, repeat=3):
+    """Best-of-`repeat` cold import time of each module, as results at the "startup" scale."""
+    results = []
+    for module in modules:
+        runs = [import_times(module) for _ in range(repeat)]
+        seconds = min(run[module] for run in runs)
+        results.append({"name": f"import_{module}", "scale": "startup", "seconds_per_op": seconds,
+                        "ops_per_second": 1 / seconds if seconds else None,
+                        "params": {"modules": len(runs[0]),
+                                   "forbidden": sorted(m for m in runs[0] if m.split(".")[0] in STARTUP_FORBIDDEN)}})
+    return results
+
+
+def run_suite(scales=("small", "medium"), startup=True):
+    results = []
+    for scale in scales:
+        results.extend(bench_scale(scale, *SCALES[scale]))
+    if startup:
+        results.extend(bench_startup())
+    return {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+
+
+def compare(report, baseline, tolerance=0.25):
+    """Results slower than the baseline by more than `tolerance` (0.25 = 25%)."""
+    before = {(r["name"], r["scale"]): r["seconds_per_op"] for r in baseline["results"]}
+    regressions = []
+    for r in report["results"]:
+        old = before.get((r["name"], r["scale"]))
+        if old and r["seconds_per_op"] > old * (1 + tolerance):
+            regressions.append({"name": r["name"], "scale": r["scale"], "baseline": old,
+                                "current": r["seconds_per_op"], "ratio": r["seconds_per_op"] / old})
+    return regressions
+
+
+def _write(report, path):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the performance benchmark suite.")
+    parser.add_argument("--scales", default="small,medium", help=f"comma-separated, from {', '.join(SCALES)}")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--no-startup", action="store_true", help="skip the cold-start import timings")
+    args = parser.parse_args(argv)
+
+    report = run_suite([s.strip() for s in args.scales.split(",") if s.strip()], startup=not args.no_startup)
+    _write(report, args.output)
+    for r in report["results"]:
+        print(f"{r['scale']:>6} {r['name']:<22} {r['seconds_per_op'] * 1e6:12.1f} us/op")
+
+    if args.save_baseline:
+        _write(report, args.baseline)
+        print(f"Baseline saved to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one")
+        return 0
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        regressions = compare(report, json.load(f), args.tolerance)
+    for r in regressions:
+        print(f"REGRESSION {r['scale']} {r['name']}: {r['baseline'] * 1e6:.1f} -> {r['current'] * 1e6:.1f} us/op "
+              f"(x{r['ratio']:.2f})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,818 @@
+import functools
+import os
+import threading
+import tkinter as tk
+from tkinter import messagebox, ttk
+
+from Password_Hashing import PasswordHasher
+from User_Registration import UserRegistration
+from Order_Events import OrderEventBus
+from Order_Placement import ORDER_TRANSITIONS, OrderPlacement, RestaurantMenu, PaymentMethod
+from Restaurant_Browsing import IncrementalSearch, RestaurantDatabase, RestaurantBrowsing
+from Session_Store import SessionStore
+from Ui_Tasks import TaskRunner
+from User_Store import ShardedUserStore, open_user_store, save_users
+from Virtual_List import VirtualRows
+
+SESSION_PURGE_MS = 60_000
+SEARCH_DEBOUNCE_MS = 150  # typing pause before a search-as-you-type query runs
+ORDER_EVENT_POLL_MS = 250  # how often an open order history takes its pushed order events
+
+
+class Application(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        self.title("Mobile Food Delivery App")
+        self.geometry("760x520")
+
+        self.user_data = open_user_store()  # sharded when USERS_SHARDS is set
+
+        # HASH_WORKERS > 0 hashes passwords on a thread pool
+        hash_workers = int(os.environ.get("HASH_WORKERS", "0") or 0)
+        self.registration = UserRegistration(hasher=PasswordHasher(pool_size=hash_workers))
+        self.registration.users = self.user_data  # load existing users
+        self.registration.restore_confirmations()
+
+        self.database = RestaurantDatabase()
+        self.database.load_reviews(self.user_data)
+        self.browsing = RestaurantBrowsing(self.database)
+        self.order_events = OrderEventBus()
+        self.sessions = SessionStore(self.registration, review_listener=self.database.record_review,
+                                     event_bus=self.order_events)
+
+        # Searches, payments, password hashing and saves run here so the window keeps repainting
+        self.tasks = TaskRunner(self.after, on_busy=self.show_busy)
+        self._save_lock = threading.Lock()
+        self.status_var = tk.StringVar()
+        tk.Label(self, textvariable=self.status_var, anchor="w").pack(side="bottom", fill="x", padx=10)
+
+        self.logged_in_email = None
+        self.session_token = None
+        self.current_frame = None
+        self.show_startup_frame()
+        self.after(SESSION_PURGE_MS, self.purge_sessions)
+
+    def destroy(self):
+        self.tasks.close()
+        super().destroy()
+
+    def show_busy(self, busy):
+        self.status_var.set("Working..." if busy else "")
+        self.config(cursor="watch" if busy else "")
+
+    def persist(self, email):
+        # Saves for one user supersede each other: the newest one writes the latest state anyway
+        self.tasks.submit(self._save, email, key=("save", email),
+                          on_error=lambda e: messagebox.showerror("Error", f"Could not save: {e}"))
+
+    def _save(self, email):
+        # Runs on a worker while the Tk thread keeps mutating users, so write a per-user-locked snapshot
+        with self._save_lock:
+            if isinstance(self.user_data, ShardedUserStore):
+                self.user_data.save(email)
+            else:
+                save_users(self.registration.snapshot())
+
+    def purge_sessions(self):
+        # The open window keeps its own session alive; anything else that expired is dropped
+        if self.session_token is not None:
+            self.sessions.get(self.session_token)
+        self.sessions.purge_expired()
+        self.after(SESSION_PURGE_MS, self.purge_sessions)
+
+    def show_startup_frame(self):
+        if self.current_frame:
+            self.current_frame.destroy()
+        self.current_frame = StartupFrame(self)
+        self.current_frame.pack(fill="both", expand=True)
+
+    def show_register_frame(self):
+        if self.current_frame:
+            self.current_frame.destroy()
+        self.current_frame = RegisterFrame(self)
+        self.current_frame.pack(fill="both", expand=True)
+
+    def show_login_frame(self):
+        if self.current_frame:
+            self.current_frame.destroy()
+        self.current_frame = LoginFrame(self)
+        self.current_frame.pack(fill="both", expand=True)
+
+    def login_user(self, token):
+        session = self.sessions.get(token)
+        self.session_token = token
+        self.logged_in_email = session.email
+        if self.current_frame:
+            self.current_frame.destroy()
+        self.current_frame = MainAppFrame(self, session)
+        self.current_frame.pack(fill="both", expand=True)
+
+
+class StartupFrame(tk.Frame):
+    def __init__(self, master):
+        super().__init__(master)
+        tk.Label(self, text="Welcome to the Mobile Food Delivery App", font=("Arial", 16)).pack(pady=30)
+
+        tk.Button(self, text="Register", command=self.go_to_register, width=20).pack(pady=10)
+        tk.Button(self, text="Login", command=self.go_to_login, width=20).pack(pady=10)
+
+    def go_to_register(self):
+        self.master.show_register_frame()
+
+    def go_to_login(self):
+        self.master.show_login_frame()
+
+
+class RegisterFrame(tk.Frame):
+    def __init__(self, master):
+        super().__init__(master)
+        tk.Label(self, text="Register New User", font=("Arial", 14)).pack(pady=20)
+
+        self.email_entry = self.create_entry("Email:")
+        self.pass_entry = self.create_entry("Password:", show="*")
+        self.conf_pass_entry = self.create_entry("Confirm Password:", show="*")
+
+        self.register_button = tk.Button(self, text="Register", command=self.register_user)
+        self.register_button.pack(pady=10)
+        tk.Button(self, text="Back", command=self.go_back).pack()
+
+    def create_entry(self, label_text, show=None):
+        frame = tk.Frame(self)
+        frame.pack(pady=5)
+        tk.Label(frame, text=label_text, width=18, anchor="e").pack(side="left")
+        entry = tk.Entry(frame, show=show, width=30)
+        entry.pack(side="left")
+        return entry
+
+    def register_user(self):
+        email = self.email_entry.get().strip()
+        password = self.pass_entry.get()
+        confirm_password = self.conf_pass_entry.get()
+
+        self.register_button.config(state="disabled")
+        self.master.tasks.submit(self.master.registration.register, email, password, confirm_password,
+                                 on_done=functools.partial(self.registered, email), key="register")
+
+    def registered(self, email, result):
+        if result["success"]:
+            self.master.persist(email)
+        if not self.winfo_exists():
+            return
+        self.register_button.config(state="normal")
+        if result["success"]:
+            messagebox.showinfo("Success", "Registration successful! Please log in.")
+            self.master.show_login_frame()
+        else:
+            messagebox.showerror("Error", result["error"])
+
+    def go_back(self):
+        self.master.show_startup_frame()
+
+
+class LoginFrame(tk.Frame):
+    def __init__(self, master):
+        super().__init__(master)
+        tk.Label(self, text="User Login", font=("Arial", 14)).pack(pady=20)
+
+        self.email_entry = self.create_entry("Email:")
+        self.pass_entry = self.create_entry("Password:", show="*")
+
+        self.login_button = tk.Button(self, text="Login", command=self.login)
+        self.login_button.pack(pady=10)
+        tk.Button(self, text="Back", command=self.go_back).pack()
+
+    def create_entry(self, label_text, show=None):
+        frame = tk.Frame(self)
+        frame.pack(pady=5)
+        tk.Label(frame, text=label_text, width=18, anchor="e").pack(side="left")
+        entry = tk.Entry(frame, show=show, width=30)
+        entry.pack(side="left")
+        return entry
+
+    def login(self):
+        email = self.email_entry.get().strip()
+        password = self.pass_entry.get()
+        self.login_button.config(state="disabled")
+        self.master.tasks.submit(self.master.sessions.login, email, password, on_done=self.logged_in, key="login")
+
+    def logged_in(self, token):
+        if not self.winfo_exists():
+            return
+        self.login_button.config(state="normal")
+        if token is not None:
+            self.master.login_user(token)
+        else:
+            messagebox.showerror("Error", "Invalid email or password")
+
+    def go_back(self):
+        self.master.show_startup_frame()
+
+
+class MainAppFrame(tk.Frame):
+    def __init__(self, master, session):
+        super().__init__(master)
+        self.master_app = master
+        self.user_email = user_email = session.email
+
+        tk.Label(self, text=f"Welcome, {user_email}", font=("Arial", 14)).pack(pady=10)
+
+        self.database = master.database
+        self.browsing = master.browsing
+        self.incremental_search = IncrementalSearch(self.browsing)
+        self._search_after = None
+
+        # The session caches the profile (backed by the user's record for persistence) and cart
+        self.user_profile = session.profile
+        self.cart = session.cart
+        self.restaurant_menu = RestaurantMenu(available_items=["Burger", "Pizza", "Salad"])
+        self.order_placement = OrderPlacement(self.cart, self.user_profile, self.restaurant_menu)
+
+        # Search frame
+        search_frame = tk.Frame(self)
+        search_frame.pack(pady=10, fill="x")
+
+        tk.Label(search_frame, text="Cuisine:").pack(side="left")
+        self.cuisine_var = tk.StringVar()
+        self.cuisine_entry = tk.Entry(search_frame, width=20, textvariable=self.cuisine_var)
+        self.cuisine_entry.pack(side="left", padx=5)
+        self.cuisine_var.trace_add("write", self.cuisine_typed)
+
+        tk.Button(search_frame, text="Search", command=self.search_restaurants).pack(side="left")
+
+        # Restaurant results: only the rows around the visible ones are ever in the Treeview
+        self.results = VirtualTreeview(self, [("name", "Name", 160), ("cuisine", "Cuisine", 120),
+                                              ("location", "Location", 120), ("rating", "Rating", 120)],
+                                       fetch=self.restaurant_rows, height=8)
+        self.results.pack(pady=10, fill="x", padx=10)
+
+        # Action buttons
+        action_frame = tk.Frame(self)
+        action_frame.pack(pady=5)
+
+        tk.Button(action_frame, text="View All Restaurants", command=self.view_all_restaurants).grid(row=0, column=0, padx=5, pady=2)
+        tk.Button(action_frame, text="Add Item to Cart", command=self.add_item_to_cart).grid(row=0, column=1, padx=5, pady=2)
+        tk.Button(action_frame, text="View Cart", command=self.view_cart).grid(row=0, column=2, padx=5, pady=2)
+        tk.Button(action_frame, text="Checkout", command=self.checkout).grid(row=0, column=3, padx=5, pady=2)
+
+        # New feature buttons
+        feature_frame = tk.Frame(self)
+        feature_frame.pack(pady=8)
+
+        tk.Button(feature_frame, text="Order History", command=self.open_order_history).grid(row=0, column=0, padx=5, pady=2)
+        tk.Button(feature_frame, text="Favorites", command=self.open_favorites).grid(row=0, column=1, padx=5, pady=2)
+        tk.Button(feature_frame, text="Profile", command=self.open_profile).grid(row=0, column=2, padx=5, pady=2)
+        tk.Button(feature_frame, text="Review Order", command=self.open_review).grid(row=0, column=3, padx=5, pady=2)
+
+        self.view_all_restaurants()
+
+    def _persist(self):
+        self.master_app.persist(self.user_email)
+
+    def cuisine_typed(self, *args):
+        # Wait for a pause in typing; the query for the text typed so far is already stale
+        self._cancel_typed_search()
+        self.master_app.tasks.cancel("search")
+        self._search_after = self.after(SEARCH_DEBOUNCE_MS, self.search_restaurants)
+
+    def _cancel_typed_search(self):
+        if self._search_after is not None:
+            self.after_cancel(self._search_after)
+            self._search_after = None
+
+    def search_restaurants(self):
+        self._cancel_typed_search()
+        # Cuisines starting with the text; a newer search (or "View All") supersedes one still running
+        self.master_app.tasks.submit(self.incremental_search.search, self.cuisine_var.get(),
+                                     on_done=self.show_restaurants, key="search")
+
+    def view_all_restaurants(self):
+        self._cancel_typed_search()
+        self.master_app.tasks.submit(self.browsing.search_positions, on_done=self.show_restaurants, key="search")
+
+    def show_restaurants(self, positions):
+        if self.winfo_exists():
+            self.results.set_keys(positions)
+
+    def restaurant_rows(self, positions):
+        return [(r["name"], r["cuisine"], r["location"], r["rating"]) for r in self.database.get_by_positions(positions)]
+
+    def add_item_to_cart(self):
+        menu_popup = AddItemPopup(self, self.restaurant_menu, self.cart)
+        self.wait_window(menu_popup)
+
+    def view_cart(self):
+        cart_view = CartViewPopup(self, self.cart)
+        self.wait_window(cart_view)
+
+    def checkout(self):
+        # The order goes to the restaurant selected in the results list, if any
+        selected = self.results.selected_key
+        self.restaurant_menu.restaurant = self.database.get_by_positions([selected])[0]["name"] if selected is not None else None
+        validation = self.order_placement.validate_order()
+        if not validation["success"]:
+            messagebox.showerror("Error", validation["message"])
+            return
+        checkout_popup = CheckoutPopup(self, self.order_placement, on_success=self._persist)
+        self.wait_window(checkout_popup)
+
+    def open_profile(self):
+        popup = ProfilePopup(self, self.master_app, self.user_profile, on_saved=self._persist)
+        self.wait_window(popup)
+
+    def open_order_history(self):
+        popup = OrderHistoryPopup(self, self.user_profile, on_saved=self._persist)
+        self.wait_window(popup)
+
+    def open_favorites(self):
+        popup = FavoritesPopup(self, self.user_profile, self.database, on_saved=self._persist)
+        self.wait_window(popup)
+
+    def open_review(self):
+        popup = ReviewPopup(self, self.user_profile, on_saved=self._persist)
+        self.wait_window(popup)
+
+
+class VirtualTreeview(tk.Frame):
+    """
+    A Treeview over a result list of any length that only holds the rows around the visible ones.
+
+    It keeps the result keys, fetches rows for the visible window plus a buffer, and applies only the row
+    differences on each scroll or new result list (see Virtual_List.VirtualRows). It has its own
+    scrollbar, because the Treeview never holds the whole list.
+    """
+
+    def __init__(self, master, columns, fetch, height=8, buffer=20):
+        super().__init__(master)
+        self.rows = VirtualRows(fetch, visible=height, buffer=buffer)
+        self.selected_key = None
+        self._key_by_iid = {}
+
+        self.tree = ttk.Treeview(self, columns=[col for col, _, _ in columns], show="headings", height=height,
+                                 selectmode="browse")
+        for col, title, width in columns:
+            self.tree.heading(col, text=title)
+            self.tree.column(col, width=width, anchor="w")
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.on_scrollbar)
+        self.tree.pack(side="left", fill="x", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<MouseWheel>", self.on_wheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll(-3))
+        self.tree.bind("<Button-5>", lambda event: self.scroll(3))
+
+    def set_keys(self, keys, keep_position=False):
+        if self.selected_key is not None and self.selected_key not in keys:
+            self.selected_key = None
+        self.rows.set_keys(keys, keep_position)
+        self.refresh()
+
+    def refresh(self):
+        ops = self.rows.render()
+        tree = self.tree
+        if ops["delete"]:
+            tree.delete(*(str(key) for key in ops["delete"]))
+        for index, key, values in ops["insert"]:
+            tree.insert("", index, iid=str(key), values=values)
+        for key, values in ops["update"]:
+            tree.item(str(key), values=values)
+        for index, key in ops["move"]:
+            tree.move(str(key), "", index)
+        self._key_by_iid = {str(key): key for key in self.rows.rendered}
+
+        # Put the first visible row at the top; the buffer rows above and below stay out of view
+        rendered = len(self.rows.rendered)
+        tree.yview_moveto(self.rows.row_offset() / rendered if rendered else 0.0)
+        self.scrollbar.set(*self.rows.fraction())
+        if self.selected_key is not None and self.selected_key in self.rows.rendered:
+            tree.selection_set(str(self.selected_key))
+
+    def scroll(self, rows):
+        self.rows.scroll_by(rows)
+        self.refresh()
+        return "break"  # the Treeview's own scrolling would only move within the buffer
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.rows.scroll_to(float(amount) * len(self.rows.keys))
+            self.refresh()
+        else:
+            self.scroll(int(amount) * (self.rows.visible if unit == "pages" else 1))
+
+    def on_wheel(self, event):
+        return self.scroll(-3 if event.delta > 0 else 3)
+
+    def on_select(self, event):
+        # Rows leaving the window drop out of the Treeview selection, so the selected key is kept here
+        selection = self.tree.selection()
+        if selection:
+            self.selected_key = self._key_by_iid.get(selection[0], self.selected_key)
+
+
+class AddItemPopup(tk.Toplevel):
+    def __init__(self, master, menu, cart):
+        super().__init__(master)
+        self.title("Add Item to Cart")
+        self.menu = menu
+        self.cart = cart
+
+        tk.Label(self, text="Select an item to add to cart:").pack(pady=10)
+
+        self.item_var = tk.StringVar(value=self.menu.available_items[0] if self.menu.available_items else "")
+        tk.OptionMenu(self, self.item_var, *self.menu.available_items).pack(pady=5)
+
+        tk.Label(self, text="Quantity:").pack()
+        self.qty_entry = tk.Entry(self)
+        self.qty_entry.insert(0, "1")
+        self.qty_entry.pack(pady=5)
+
+        tk.Button(self, text="Add to Cart", command=self.add_to_cart).pack(pady=10)
+
+    def add_to_cart(self):
+        try:
+            qty = int(self.qty_entry.get())
+        except Exception:
+            messagebox.showerror("Error", "Quantity must be a number")
+            return
+
+        item = self.item_var.get()
+        price = 10.0  # static price for simplicity
+        msg = self.cart.add_item(item, price, qty)
+        messagebox.showinfo("Cart", msg)
+        self.destroy()
+
+
+class CartViewPopup(tk.Toplevel):
+    def __init__(self, master, cart):
+        super().__init__(master)
+        self.title("Cart Items")
+
+        items = cart.view_cart()
+        if not items:
+            tk.Label(self, text="Your cart is empty").pack(pady=20)
+        else:
+            for i in items:
+                tk.Label(self, text=f"{i['name']} x{i['quantity']} = ${i['subtotal']:.2f}").pack()
+
+
+class CheckoutPopup(tk.Toplevel):
+    def __init__(self, master, order_placement, on_success=None):
+        super().__init__(master)
+        self.title("Checkout")
+        self.order_placement = order_placement
+        self.on_success = on_success
+
+        order_data = order_placement.proceed_to_checkout()
+        tk.Label(self, text="Review your order:", font=("Arial", 12)).pack(pady=10)
+
+        for item in order_data["items"]:
+            tk.Label(self, text=f"{item['name']} x{item['quantity']} = ${item['subtotal']:.2f}").pack()
+
+        total = order_data["total_info"]
+        tk.Label(self, text=f"Subtotal: ${total['subtotal']:.2f}").pack()
+        tk.Label(self, text=f"Tax: ${total['tax']:.2f}").pack()
+        tk.Label(self, text=f"Delivery Fee: ${total['delivery_fee']:.2f}").pack()
+        tk.Label(self, text=f"Total: ${total['total']:.2f}").pack()
+
+        tk.Label(self, text=f"Delivery Address: {order_data['delivery_address']}").pack(pady=5)
+
+        tk.Label(self, text="Payment Method:").pack(pady=5)
+        self.payment_method = tk.StringVar(value="credit_card")
+        tk.Radiobutton(self, text="Credit Card", variable=self.payment_method, value="credit_card").pack()
+        tk.Radiobutton(self, text="Paypal", variable=self.payment_method, value="paypal").pack()
+
+        self.confirm_button = tk.Button(self, text="Confirm Order", command=self.confirm_order)
+        self.confirm_button.pack(pady=12)
+
+    def confirm_order(self):
+        # Disabled until the gateway answers, so a second click cannot place the order twice
+        self.confirm_button.config(state="disabled")
+        payment_method_obj = PaymentMethod()
+        # Cart has no lock and the Tk thread may still change it, so the worker checks out a copy;
+        # the live cart is cleared on the Tk thread once the order is placed
+        placement = self.order_placement
+        worker_placement = OrderPlacement(placement.cart.copy(), placement.user_profile, placement.restaurant_menu)
+        self.master.master_app.tasks.submit(worker_placement.confirm_order, payment_method_obj,
+                                            on_done=self.order_confirmed, on_error=self.order_failed)
+
+    def order_confirmed(self, result):
+        # The order is placed whether or not the popup is still open, so it is always persisted
+        if result["success"]:
+            self.order_placement.cart.clear()
+            if self.on_success:
+                self.on_success()
+        if not self.winfo_exists():
+            return
+        self.confirm_button.config(state="normal")
+        if result["success"]:
+            messagebox.showinfo(
+                "Order Confirmed",
+                f"Order ID: {result['order_id']}\nEstimated Delivery: {result['estimated_delivery']}\nStatus: Placed"
+            )
+            self.destroy()
+        else:
+            messagebox.showerror("Error", result["message"])
+
+    def order_failed(self, error):
+        if self.winfo_exists():
+            self.confirm_button.config(state="normal")
+        messagebox.showerror("Error", f"Payment failed: {error}")
+
+
+class ProfilePopup(tk.Toplevel):
+    def __init__(self, master_frame, app, user_profile, on_saved=None):
+        super().__init__(master_frame)
+        self.title("Profile")
+        self.app = app
+        self.user_profile = user_profile
+        self.on_saved = on_saved
+
+        tk.Label(self, text="Update delivery address", font=("Arial", 11, "bold")).pack(pady=(10, 5))
+
+        addr_frame = tk.Frame(self)
+        addr_frame.pack(pady=5, padx=10, fill="x")
+        tk.Label(addr_frame, text="Address:", width=10, anchor="e").pack(side="left")
+        self.addr_entry = tk.Entry(addr_frame, width=40)
+        self.addr_entry.insert(0, self.user_profile.delivery_address)
+        self.addr_entry.pack(side="left")
+
+        tk.Button(self, text="Save Address", command=self.save_address).pack(pady=5)
+
+        tk.Label(self, text="Update password", font=("Arial", 11, "bold")).pack(pady=(12, 5))
+
+        self.cur_entry = self._pw_entry("Current:")
+        self.new_entry = self._pw_entry("New:")
+        self.conf_entry = self._pw_entry("Confirm:")
+
+        self.password_button = tk.Button(self, text="Save Password", command=self.save_password)
+        self.password_button.pack(pady=8)
+
+    def _pw_entry(self, label):
+        frame = tk.Frame(self)
+        frame.pack(pady=3, padx=10, fill="x")
+        tk.Label(frame, text=label, width=10, anchor="e").pack(side="left")
+        e = tk.Entry(frame, show="*", width=40)
+        e.pack(side="left")
+        return e
+
+    def save_address(self):
+        new_addr = self.addr_entry.get()
+        result = self.user_profile.update_delivery_address(new_addr)
+        if result["success"]:
+            if self.on_saved:
+                self.on_saved()
+            messagebox.showinfo("Profile", "Address updated.")
+        else:
+            messagebox.showerror("Profile", result["message"])
+
+    def save_password(self):
+        email = self.user_profile.email
+        self.password_button.config(state="disabled")
+        self.app.tasks.submit(
+            self.app.registration.update_password,
+            email,
+            self.cur_entry.get(),
+            self.new_entry.get(),
+            self.conf_entry.get(),
+            on_done=self.password_saved,
+        )
+
+    def password_saved(self, result):
+        if result["success"] and self.on_saved:
+            self.on_saved()
+        if not self.winfo_exists():
+            return
+        self.password_button.config(state="normal")
+        if result["success"]:
+            messagebox.showinfo("Profile", "Password updated.")
+            self.cur_entry.delete(0, "end")
+            self.new_entry.delete(0, "end")
+            self.conf_entry.delete(0, "end")
+        else:
+            messagebox.showerror("Profile", result["error"])
+
+
+class OrderHistoryPopup(tk.Toplevel):
+    def __init__(self, master_frame, user_profile, on_saved=None):
+        super().__init__(master_frame)
+        self.title("Order History")
+        self.tasks = master_frame.master_app.tasks
+        self.user_profile = user_profile
+        self.on_saved = on_saved
+        # Status changes are pushed here, so the list is updated in place instead of re-queried.
+        # Nothing blocks on this queue: the Tk thread that drains it also publishes from the buttons.
+        self.events = master_frame.master_app.order_events.subscribe(user_profile.email, block_timeout=0)
+        self.bind("<Destroy>", self.on_destroy)
+
+        filter_frame = tk.Frame(self)
+        filter_frame.pack(pady=8, padx=10, fill="x")
+
+        tk.Label(filter_frame, text="Status:").pack(side="left")
+        self.status_var = tk.StringVar(value="")
+        tk.OptionMenu(filter_frame, self.status_var, "", *ORDER_TRANSITIONS).pack(side="left", padx=5)
+
+        tk.Label(filter_frame, text="From (YYYY-MM-DD):").pack(side="left")
+        self.from_entry = tk.Entry(filter_frame, width=12)
+        self.from_entry.pack(side="left", padx=5)
+
+        tk.Label(filter_frame, text="To:").pack(side="left")
+        self.to_entry = tk.Entry(filter_frame, width=12)
+        self.to_entry.pack(side="left", padx=5)
+
+        tk.Button(filter_frame, text="Apply", command=self.refresh).pack(side="left", padx=5)
+        tk.Button(filter_frame, text="Clear", command=self.clear_filters).pack(side="left", padx=5)
+
+        self.tree = ttk.Treeview(self, columns=("order_id", "date", "status", "total"), show="headings", height=10)
+        for col, title, w in [("order_id", "Order ID", 180), ("date", "Date", 110), ("status", "Status", 110), ("total", "Total", 110)]:
+            self.tree.heading(col, text=title)
+            self.tree.column(col, width=w, anchor="w")
+        self.tree.pack(padx=10, pady=8, fill="x")
+
+        btn_frame = tk.Frame(self)
+        btn_frame.pack(pady=5)
+        tk.Button(btn_frame, text="Advance Status", command=self.advance_status).pack(side="left", padx=5)
+        tk.Button(btn_frame, text="Cancel Order", command=lambda: self.change_status("Cancelled")).pack(side="left", padx=5)
+
+        self.refresh()
+        self.after(ORDER_EVENT_POLL_MS, self.poll_events)
+
+    def on_destroy(self, event):
+        if event.widget is self:
+            self.events.close()
+
+    def poll_events(self):
+        if self.events.closed:
+            return
+        if self.events.dropped:
+            # Missed some: the pushed changes no longer add up to the current state
+            self.events.dropped = 0
+            self.events.drain()
+            self.refresh()
+        for event in self.events.drain():
+            self.apply_event(event)
+        self.after(ORDER_EVENT_POLL_MS, self.poll_events)
+
+    def apply_event(self, event):
+        order_id = event["order_id"]
+        status_filter = self.status_var.get()
+        if not self.tree.exists(order_id):
+            if event["previous_status"] is None or event["status"] == status_filter:
+                self.refresh()  # a new order, or one the status filter now shows; the query decides
+            return
+        if status_filter and event["status"] != status_filter:
+            self.tree.delete(order_id)
+        else:
+            self.tree.set(order_id, "status", event["status"])
+
+    def clear_filters(self):
+        self.status_var.set("")
+        self.from_entry.delete(0, "end")
+        self.to_entry.delete(0, "end")
+        self.refresh()
+
+    def refresh(self):
+        status = self.status_var.get() or None
+        d_from = self.from_entry.get().strip() or None
+        d_to = self.to_entry.get().strip() or None
+
+        if status or d_from or d_to:
+            query = functools.partial(self.user_profile.filter_orders, status=status, date_from=d_from, date_to=d_to)
+        else:
+            query = self.user_profile.view_order_history
+        # Keyed on the popup, so changing the filters again drops the stale result
+        self.tasks.submit(query, on_done=self.show_orders, key=("history", str(self)))
+
+    def show_orders(self, orders):
+        if not self.winfo_exists():
+            return
+        self.tree.delete(*self.tree.get_children())
+        for o in orders:
+            self.tree.insert("", "end", iid=o.get("order_id"),
+                             values=(o.get("order_id"), o.get("date"), o.get("status"), f"${o.get('total_amount', 0):.2f}"))
+
+    def advance_status(self):
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showerror("Order History", "Select an order first.")
+            return
+        # Placed -> Preparing -> Delivered: the first allowed transition is the forward one
+        next_statuses = ORDER_TRANSITIONS.get(self.tree.set(selected[0], "status"), ())
+        if not next_statuses:
+            messagebox.showerror("Order History", "This order is already finished.")
+            return
+        self.change_status(next_statuses[0])
+
+    def change_status(self, new_status):
+        selected = self.tree.selection()
+        if not selected:
+            messagebox.showerror("Order History", "Select an order first.")
+            return
+        order_id = selected[0]
+        result = self.user_profile.update_order_status(order_id, new_status)
+        if result["success"]:
+            # The row itself is updated by the order event this publishes
+            if self.on_saved:
+                self.on_saved()
+            messagebox.showinfo("Order History", f"Order marked as {new_status}.")
+        else:
+            messagebox.showerror("Order History", result["message"])
+
+
+class FavoritesPopup(tk.Toplevel):
+    def __init__(self, master_frame, user_profile, database, on_saved=None):
+        super().__init__(master_frame)
+        self.title("Favorites")
+        self.user_profile = user_profile
+        self.database = database
+        self.on_saved = on_saved
+
+        tk.Label(self, text="Your favorite restaurants").pack(pady=8)
+
+        self.listbox = tk.Listbox(self, width=50, height=10)
+        self.listbox.pack(padx=10, pady=5)
+
+        add_frame = tk.Frame(self)
+        add_frame.pack(pady=5)
+
+        names = [r["name"] for r in self.database.get_restaurants()]
+        self.pick_var = tk.StringVar(value=names[0] if names else "")
+        tk.OptionMenu(add_frame, self.pick_var, *names).pack(side="left", padx=5)
+
+        tk.Button(add_frame, text="Add", command=self.add_selected).pack(side="left", padx=5)
+        tk.Button(add_frame, text="Remove Selected", command=self.remove_selected).pack(side="left", padx=5)
+
+        self.refresh()
+
+    def refresh(self):
+        self.listbox.delete(0, "end")
+        for name in self.user_profile.list_favorites():
+            self.listbox.insert("end", name)
+
+    def add_selected(self):
+        name = self.pick_var.get()
+        result = self.user_profile.add_favorite_restaurant(name)
+        if result["success"]:
+            if self.on_saved:
+                self.on_saved()
+            self.refresh()
+        else:
+            messagebox.showerror("Favorites", result["message"])
+
+    def remove_selected(self):
+        sel = self.listbox.curselection()
+        if not sel:
+            messagebox.showerror("Favorites", "Select an item to remove.")
+            return
+        name = self.listbox.get(sel[0])
+        result = self.user_profile.remove_favorite_restaurant(name)
+        if result["success"]:
+            if self.on_saved:
+                self.on_saved()
+            self.refresh()
+        else:
+            messagebox.showerror("Favorites", result["message"])
+
+
+class ReviewPopup(tk.Toplevel):
+    def __init__(self, master_frame, user_profile, on_saved=None):
+        super().__init__(master_frame)
+        self.title("Review Order")
+        self.user_profile = user_profile
+        self.on_saved = on_saved
+
+        delivered_orders = [o["order_id"] for o in self.user_profile.view_order_history() if o.get("status") == "Delivered"]
+
+        tk.Label(self, text="Select a Delivered order to review").pack(pady=10)
+
+        self.order_var = tk.StringVar(value=delivered_orders[0] if delivered_orders else "")
+        tk.OptionMenu(self, self.order_var, *delivered_orders).pack(pady=5)
+
+        tk.Label(self, text="Rating (1-5):").pack()
+        self.rating_var = tk.IntVar(value=5)
+        tk.Spinbox(self, from_=1, to=5, textvariable=self.rating_var, width=5).pack(pady=5)
+
+        tk.Label(self, text="Review:").pack()
+        self.text = tk.Text(self, width=60, height=6)
+        self.text.pack(padx=10, pady=5)
+
+        tk.Button(self, text="Submit Review", command=self.submit).pack(pady=10)
+
+        if not delivered_orders:
+            messagebox.showinfo("Review", "No Delivered orders found. Mark an order as Delivered in Order History first.")
+
+    def submit(self):
+        order_id = self.order_var.get()
+        review_text = self.text.get("1.0", "end").strip()
+        result = self.user_profile.add_order_review(order_id, int(self.rating_var.get()), review_text)
+        if result["success"]:
+            if self.on_saved:
+                self.on_saved()
+            messagebox.showinfo("Review", "Review saved.")
+            self.destroy()
+        else:
+            messagebox.showerror("Review", result["message"])
+
+
+if __name__ == "__main__":
+    app = Application()
+    app.mainloop()
@@ -0,0 +1,175 @@
+"""Load generator: simulated customers drive the domain classes end to end, for hardware sizing.
+
+Each simulated customer registers, searches the catalog, fills a cart, checks out, follows the order
+through its status updates and reviews it, using UserRegistration, RestaurantBrowsing, Cart,
+OrderPlacement and UserProfile directly. Customers arrive open-loop as a Poisson process at a fixed
+rate, so a slow system builds a queue instead of quietly lowering the offered load. The report gives
+throughput and p50/p95/p99 latency per operation; "session" is the whole visit, measured from the
+scheduled arrival, so it includes time spent waiting for a worker.
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from Order_Placement import Cart, OrderPlacement, PaymentMethod, RestaurantMenu, UserProfile
+from Password_Hashing import PasswordHasher
+from Restaurant_Browsing import RestaurantBrowsing, RestaurantDatabase, generate_restaurants
+from User_Registration import UserRegistration
+
+OPERATIONS = ("register", "search", "add_to_cart", "checkout", "status_update", "review", "session")
+MENU_ITEMS = ["Burger", "Pizza", "Salad"]
+STATUS_UPDATES = ["Preparing", "Delivered"]  # ORDER_TRANSITIONS from Placed
+PASSWORD = "Password123"
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank q-th quantile (0 < q <= 1) of an ascending list, or None if it is empty."""
+    if not sorted_values:
+        return None
+    # round() first, so 0.95 * 100 = 95.00000000000001 still ranks 95
+    rank = max(1, math.ceil(round(q * len(sorted_values), 9)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class LoadGenerator:
+    """
+    Replays customer visits against one in-process app instance.
+
+    Attributes:
+        arrival_rate (float): New customers per second.
+        concurrency (int): Worker threads serving customers; arrivals beyond them queue.
+    """
+
+    def __init__(self, arrival_rate=50.0, concurrency=32, restaurants=1000, hash_iterations=None, seed=0):
+        self.arrival_rate = arrival_rate
+        self.concurrency = concurrency
+        hasher = PasswordHasher() if hash_iterations is None else PasswordHasher(iterations=hash_iterations)
+        self.registration = UserRegistration(hasher=hasher)
+        self.database = RestaurantDatabase(generate_restaurants(restaurants, seed=seed))
+        self.browsing = RestaurantBrowsing(self.database)
+        self._cuisines = sorted({r["cuisine"] for r in self.database.restaurants})
+        self._locations = sorted({r["location"] for r in self.database.restaurants})
+        self._rng = random.Random(seed)
+        self._latencies = {op: [] for op in OPERATIONS}
+        self._errors = {op: 0 for op in OPERATIONS}
+        self._lock = threading.Lock()
+
+    def _record(self, op, seconds, ok=True):
+        with self._lock:
+            self._latencies[op].append(seconds)
+            if not ok:
+                self._errors[op] += 1
+
+    def _timed(self, op, function, *args):
+        start = time.perf_counter()
+        try:
+            result = function(*args)
+        except Exception:
+            self._record(op, time.perf_counter() - start, ok=False)
+            raise
+        ok = not (isinstance(result, dict) and result.get("success") is False)
+        self._record(op, time.perf_counter() - start, ok)
+        return result
+
+    def visit(self, rng):
+        """One customer's visit, from registration to review. Returns False if a step failed."""
+        email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+        if not self._timed("register", self.registration.register, email, PASSWORD, PASSWORD)["success"]:
+            return False
+
+        results = self._timed("search", self.browsing.search_by_filters, rng.choice(self._cuisines),
+                              rng.choice(self._locations), rng.choice([None, 3.5, 4.0]))
+        restaurant = rng.choice(results or self.database.restaurants)["name"]
+
+        profile = UserProfile(email=email, store=self.registration.users[email],
+                              lock=self.registration.lock_for(email),
+                              review_listener=self.database.record_review)
+        cart = Cart()
+        for _ in range(rng.randint(1, 4)):
+            self._timed("add_to_cart", cart.add_item, rng.choice(MENU_ITEMS), 10.0, rng.randint(1, 3))
+
+        placement = OrderPlacement(cart, profile, RestaurantMenu(MENU_ITEMS, restaurant=restaurant))
+        order = self._timed("checkout", placement.confirm_order, PaymentMethod())
+        if not order["success"]:
+            return False
+        for status in STATUS_UPDATES:
+            if not self._timed("status_update", profile.update_order_status, order["order_id"], status)["success"]:
+                return False
+        review = self._timed("review", profile.add_order_review, order["order_id"], rng.randint(1, 5), "Load test")
+        return review["success"]
+
+    def _session(self, arrival, seed):
+        try:
+            ok = self.visit(random.Random(seed))
+        except Exception:
+            ok = False
+        self._record("session", time.perf_counter() - arrival, ok)
+
+    def run(self, duration=10.0):
+        """Offer `arrival_rate` customers per second for `duration` seconds and wait for all of them."""
+        start = time.perf_counter()
+        arrivals = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="customer") as pool:
+            next_arrival = start
+            while True:
+                next_arrival += self._rng.expovariate(self.arrival_rate)
+                if next_arrival - start >= duration:
+                    break
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self._session, next_arrival, self._rng.getrandbits(32))
+                arrivals += 1
+        return self.report(time.perf_counter() - start, arrivals)
+
+    def report(self, elapsed, arrivals):
+        operations = {}
+        for op in OPERATIONS:
+            values = sorted(self._latencies[op])
+            operations[op] = {
+                "count": len(values),
+                "errors": self._errors[op],
+                "throughput": len(values) / elapsed if elapsed else 0.0,
+                "p50": percentile(values, 0.50),
+                "p95": percentile(values, 0.95),
+                "p99": percentile(values, 0.99),
+                "max": values[-1] if values else None,
+            }
+        return {"arrival_rate": self.arrival_rate, "concurrency": self.concurrency, "arrivals": arrivals,
+                "elapsed": elapsed, "operations": operations}
+
+
+def _ms(seconds):
+    return "-" if seconds is None else f"{seconds * 1000:.2f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive register/search/cart/checkout/status/review at a fixed rate.")
+    parser.add_argument("--rate", type=float, default=50.0, help="customer arrivals per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of arrivals")
+    parser.add_argument("--concurrency", type=int, default=32, help="worker threads serving customers")
+    parser.add_argument("--restaurants", type=int, default=1000, help="size of the generated catalog")
+    parser.add_argument("--hash-iterations", type=int, help="PBKDF2 iterations (default: the production setting)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    generator = LoadGenerator(args.rate, args.concurrency, args.restaurants, args.hash_iterations, args.seed)
+    report = generator.run(args.duration)
+    print(f"{report['arrivals']} customers in {report['elapsed']:.1f}s at {args.rate:g}/s offered")
+    print(f"{'operation':<14}{'count':>8}{'errors':>8}{'ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for op, row in report["operations"].items():
+        print(f"{op:<14}{row['count']:>8}{row['errors']:>8}{row['throughput']:>10.1f}"
+              f"{_ms(row['p50']):>10}{_ms(row['p95']):>10}{_ms(row['p99']):>10}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Process-wide metrics: counters, gauges and latency histograms, exported in the Prometheus text format.
+
+Instrumentation is off until enable() is called (or APP_METRICS=1 is set). While it is off, `timed`,
+`timer` and `count` return after a single attribute check, so hot paths pay next to nothing.
+"""
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+
+class LatencyHistogram:
+    """
+    A fixed-bucket latency histogram, cheap enough to update on every gateway call.
+
+    Attributes:
+        buckets (tuple): Upper bounds of the buckets, in seconds.
+    """
+
+    DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+            self._count += 1
+
+    def percentile(self, q):
+        """
+        Returns the upper bound of the bucket holding the q-th quantile (0 < q <= 1), or None if empty.
+        """
+        with self._lock:
+            counts = list(self._counts)
+            total = self._count
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for bound, count in zip(self.buckets + (float("inf"),), counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        """
+        Returns cumulative bucket counts keyed by upper bound, plus the total count and sum.
+        """
+        with self._lock:
+            cumulative = {}
+            running = 0
+            for bound, count in zip(self.buckets + (float("inf"),), self._counts):
+                running += count
+                cumulative[bound] = running
+            return {"buckets": cumulative, "count": self._count, "sum": self._sum}
+
+
+# In-process operations are far faster than gateway calls, so the default buckets start at 10us
+FAST_BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+class Counter:
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge:
+    def __init__(self):
+        self.value = 0
+        self._function = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """Read the value from function() at snapshot time instead of tracking it on the hot path."""
+        self._function = function
+
+    def get(self):
+        return self._function() if self._function is not None else self.value
+
+
+class MetricsRegistry:
+    """
+    Named metrics, each optionally split by labels, e.g. histogram("search_seconds", {"kind": "cuisine"}).
+
+    Attributes:
+        enabled (bool): Whether the module helpers record anything.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._metrics = {}  # (name, labels) -> metric
+        self._kinds = {}    # name -> ("counter" | "gauge" | "histogram", help)
+        self._lock = threading.Lock()
+
+    def _get(self, kind, name, labels, help, factory):
+        key = (name, tuple(sorted(labels.items())) if labels else ())
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                known = self._kinds.setdefault(name, (kind, help))
+                if known[0] != kind:
+                    raise ValueError(f"Metric {name} is already registered as a {known[0]}")
+                metric = self._metrics.setdefault(key, factory())
+        return metric
+
+    def counter(self, name, labels=None, help=""):
+        return self._get("counter", name, labels, help, Counter)
+
+    def gauge(self, name, labels=None, help=""):
+        return self._get("gauge", name, labels, help, Gauge)
+
+    def histogram(self, name, labels=None, help="", buckets=FAST_BUCKETS):
+        return self._get("histogram", name, labels, help, lambda: LatencyHistogram(buckets))
+
+    def reset(self):
+        with self._lock:
+            self._metrics.clear()
+            self._kinds.clear()
+
+    def snapshot(self):
+        """{name: {labels tuple: value}}; histograms give their snapshot() dict."""
+        result = {}
+        for (name, labels), metric in list(self._metrics.items()):
+            if isinstance(metric, LatencyHistogram):
+                value = metric.snapshot()
+            elif isinstance(metric, Gauge):
+                value = metric.get()
+            else:
+                value = metric.value
+            result.setdefault(name, {})[labels] = value
+        return result
+
+    def export_text(self):
+        """Everything in the Prometheus text exposition format."""
+        lines = []
+        for name, series in sorted(self.snapshot().items()):
+            kind, help = self._kinds[name]
+            if help:
+                lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(series.items()):
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+                    continue
+                for bound, count in value["buckets"].items():
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {count}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {value['sum']}")
+                lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in labels)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(labels, escaped)) + "}"
+
+
+REGISTRY = MetricsRegistry()
+
+
+def enable(enabled=True):
+    REGISTRY.enabled = enabled
+
+
+def timed(name, labels=None, help=""):
+    """Decorator recording each call's duration in a histogram while metrics are enabled."""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not REGISTRY.enabled:
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                REGISTRY.histogram(name, labels, help).observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def timer(name, labels=None, help=""):
+    """Context manager form of `timed`."""
+    if not REGISTRY.enabled:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        REGISTRY.histogram(name, labels, help).observe(time.perf_counter() - start)
+
+
+def count(name, amount=1, labels=None, help=""):
+    if REGISTRY.enabled:
+        REGISTRY.counter(name, labels, help).inc(amount)
+
+
+enable(os.environ.get("APP_METRICS") == "1")
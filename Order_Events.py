@@ -0,0 +1,142 @@
+"""In-process publish/subscribe for order lifecycle events.
+
+OrderPlacement.confirm_order publishes each new order ("Placed"), and UserProfile.update_order_status
+publishes each status change, when the profile was given an event bus. Subscribers (the desktop order
+history, API long-polls) receive pushed events instead of re-reading and rescanning order histories.
+
+Every subscriber has its own bounded queue. When a queue is full, publish() waits up to the subscriber's
+`block_timeout` for it to catch up (backpressure). If it is still full, the subscriber's oldest event is
+dropped and counted in `dropped`. A stalled consumer can therefore slow checkout by at most that timeout,
+and never grows memory.
+"""
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from Metrics import count
+
+
+def order_event(email, order, previous_status=None):
+    """The event for `order` having just reached its current status (previous_status None for a new order)."""
+    return {
+        "type": "order_status",
+        "email": email,
+        "order_id": order["order_id"],
+        "status": order.get("status"),
+        "previous_status": previous_status,
+        "restaurant": order.get("restaurant"),
+        "at": datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+class Subscription:
+    """
+    One subscriber's bounded event queue.
+
+    Attributes:
+        email (str): Only this user's events are queued, or every user's if None.
+        maxsize (int): Events held before backpressure applies.
+        block_timeout (float): Seconds a publisher waits on a full queue before dropping the oldest event;
+            0 never waits. Use 0 for a consumer that runs on the publishing thread, such as a Tk poll.
+        dropped (int): Events dropped because the queue stayed full.
+    """
+
+    def __init__(self, bus, email=None, maxsize=256, block_timeout=0.5):
+        if maxsize < 1:
+            raise ValueError("maxsize must be at least 1")
+        self.email = email
+        self.maxsize = maxsize
+        self.block_timeout = block_timeout
+        self.dropped = 0
+        self.closed = False
+        self._bus = bus
+        self._events = deque()
+        self._changed = threading.Condition()  # signals both "not empty" and "not full"
+
+    def __len__(self):
+        return len(self._events)
+
+    def _offer(self, event):
+        with self._changed:
+            if self.block_timeout and len(self._events) >= self.maxsize:
+                deadline = time.monotonic() + self.block_timeout
+                while len(self._events) >= self.maxsize and not self.closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._changed.wait(remaining)
+            if self.closed:
+                return False
+            if len(self._events) >= self.maxsize:
+                self._events.popleft()
+                self.dropped += 1
+                count("order_events_dropped_total", help="Order events dropped from full subscriber queues")
+            self._events.append(event)
+            self._changed.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """The next event, waiting up to `timeout` seconds (forever if None); None on timeout or once closed."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._events or self.closed, timeout)
+            if not self._events:
+                return None
+            event = self._events.popleft()
+            self._changed.notify_all()
+            return event
+
+    def drain(self, timeout=0):
+        """Every queued event, waiting up to `timeout` seconds for the first one if none is queued."""
+        with self._changed:
+            if timeout:
+                self._changed.wait_for(lambda: self._events or self.closed, timeout)
+            events = list(self._events)
+            self._events.clear()
+            self._changed.notify_all()
+            return events
+
+    def close(self):
+        self._bus.unsubscribe(self)
+
+
+class OrderEventBus:
+    """
+    Fans order events out to subscribers, each filtered by user or receiving everything.
+
+    Attributes:
+        published (int): Events published so far.
+    """
+
+    def __init__(self):
+        self.published = 0
+        self._subscribers = {}  # email (None = every user) -> tuple of Subscriptions, replaced on change
+        self._lock = threading.Lock()
+
+    def subscribe(self, email=None, maxsize=256, block_timeout=0.5):
+        subscription = Subscription(self, email, maxsize, block_timeout)
+        with self._lock:
+            self._subscribers[email] = self._subscribers.get(email, ()) + (subscription,)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            remaining = tuple(s for s in self._subscribers.get(subscription.email, ()) if s is not subscription)
+            if remaining:
+                self._subscribers[subscription.email] = remaining
+            else:
+                self._subscribers.pop(subscription.email, None)
+        with subscription._changed:
+            subscription.closed = True
+            subscription._changed.notify_all()  # wake a waiting consumer or a blocked publisher
+
+    def publish(self, event):
+        """Queue `event` for every matching subscriber; returns how many received it."""
+        # Snapshot without the lock: subscribing replaces the tuples instead of changing them
+        subscribers = self._subscribers.get(None, ())
+        if event.get("email") is not None:
+            subscribers = self._subscribers.get(event["email"], ()) + subscribers
+        with self._lock:
+            self.published += 1
+        count("order_events_published_total", help="Order lifecycle events published")
+        return sum(subscription._offer(event) for subscription in subscribers)
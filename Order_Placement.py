@@ -1,13 +1,66 @@
-import unittest
-from unittest import mock
+from contextlib import contextmanager
 from datetime import datetime, date
+import threading
 import uuid
 
+from Metrics import count, timed
+from Order_Events import order_event
+from Profiling import profiled
+
 
 def _today_iso():
     return date.today().isoformat()
 
 
+# Order lifecycle: each status and the statuses an order in it may move to
+ORDER_TRANSITIONS = {
+    "Placed": ("Preparing", "Cancelled"),
+    "Preparing": ("Delivered", "Cancelled"),
+    "Delivered": (),
+    "Cancelled": (),
+}
+
+
+def transition_error(current, new_status):
+    """None if an order may move from `current` to `new_status`, otherwise why not."""
+    if new_status not in ORDER_TRANSITIONS:
+        return f"Unknown order status: {new_status}"
+    if new_status not in ORDER_TRANSITIONS.get(current, ()):
+        return f"Cannot change a {current} order to {new_status}"
+    return None
+
+
+def apply_status_updates(find_order, updates, email=None):
+    """
+    Apply (order_id, new_status) pairs in order, validating each against ORDER_TRANSITIONS.
+
+    find_order(order_id) returns the order dict to change, or None. An order may move more than once
+    in one batch (Placed -> Preparing -> Delivered). Returns (outcomes, events): one outcome dict per
+    update, and an order event per change for the caller to publish.
+    """
+    outcomes, events = [], []
+    for order_id, new_status in updates:
+        order = find_order(order_id)
+        if order is None:
+            outcomes.append({"order_id": order_id, "success": False, "message": "Order not found"})
+            continue
+        previous = order.get("status")
+        error = transition_error(previous, new_status)
+        if error is not None:
+            outcomes.append({"order_id": order_id, "success": False, "message": error, "status": previous})
+            continue
+        order["status"] = new_status
+        events.append(order_event(email, order, previous))
+        outcomes.append({"order_id": order_id, "success": True, "message": "Order status updated",
+                         "status": new_status})
+    return outcomes, events
+
+
+def _index_orders(orders):
+    # order_id -> order; the first one wins if an ID repeats, like a front-to-back scan
+    return {order.get("order_id"): order for order in reversed(orders)}
+
+
 def _generate_order_id():
     # Short, readable ID while still unique enough for a coursework app
     return "ORD-" + uuid.uuid4().hex[:10].upper()
@@ -30,6 +83,7 @@ class Cart:
     def __init__(self):
         self.items = []
 
+    @timed("cart_operation_seconds", {"op": "add"})
     def add_item(self, name, price, quantity):
         if quantity <= 0:
             return "Quantity must be greater than 0"
@@ -42,10 +96,12 @@ class Cart:
         self.items.append(CartItem(name, price, quantity))
         return f"Added {name} to cart"
 
+    @timed("cart_operation_seconds", {"op": "remove"})
     def remove_item(self, name):
         self.items = [item for item in self.items if item.name != name]
         return f"Removed {name} from cart"
 
+    @timed("cart_operation_seconds", {"op": "update"})
     def update_item_quantity(self, name, new_quantity):
         for item in self.items:
             if item.name == name:
@@ -53,6 +109,12 @@ class Cart:
                 return f"Updated {name} quantity to {new_quantity}"
         return f"{name} not found in cart"
 
+    def copy(self):
+        """An independent cart with the same items, e.g. to check out on another thread."""
+        cart = Cart()
+        cart.items = [CartItem(item.name, item.price, item.quantity) for item in self.items]
+        return cart
+
     def calculate_total(self):
         subtotal = sum(item.get_subtotal() for item in self.items)
         tax = subtotal * 0.10
@@ -63,13 +125,16 @@ class Cart:
     def view_cart(self):
         return [{"name": i.name, "quantity": i.quantity, "subtotal": i.get_subtotal()} for i in self.items]
 
+    @timed("cart_operation_seconds", {"op": "clear"})
     def clear(self):
         self.items = []
 
 
 class RestaurantMenu:
-    def __init__(self, available_items):
+    def __init__(self, available_items, restaurant=None):
         self.available_items = available_items
+        # Name of the restaurant orders from this menu go to; recorded on each order
+        self.restaurant = restaurant
 
     def is_item_available(self, item_name):
         return item_name in self.available_items
@@ -81,10 +146,22 @@ class PaymentMethod:
 
 
 class UserProfile:
-    """User state for the session, optionally backed by a persistent user record dict."""
-    def __init__(self, delivery_address="123 Main St", email=None, store=None):
+    """User state for the session, optionally backed by a persistent user record dict.
+
+    Pass the user's lock (e.g. UserRegistration.lock_for(email)) when several sessions may share
+    one store concurrently: every read and write then re-hydrates from the store under that lock,
+    so profiles for the same user never overwrite each other's updates. A profile that is the
+    only one for its user (see SessionStore) can pass rehydrate=False to skip the re-read.
+
+    With an event_bus (Order_Events.OrderEventBus), new orders and status changes are published to it.
+    """
+    def __init__(self, delivery_address="123 Main St", email=None, store=None, lock=None, rehydrate=True,
+                 review_listener=None, event_bus=None):
         self.email = email
         self.delivery_address = delivery_address
+        # review_listener(restaurant, rating, previous_rating), e.g. RestaurantDatabase.record_review
+        self.review_listener = review_listener
+        self.event_bus = event_bus
 
         # In-memory defaults (will be overridden by store if provided)
         self.favorites = []
@@ -92,13 +169,31 @@ class UserProfile:
         self.reviews = {}
 
         self._store = store
+        self._lock = lock
+        self._rehydrate = rehydrate
+        self._order_index = None  # order_id -> order, built on first lookup
         if self._store is not None:
-            # Hydrate from store
-            self.delivery_address = self._store.get("delivery_address", self.delivery_address)
-            self.favorites = list(self._store.get("favorites", []))
-            self.orders = list(self._store.get("orders", []))
-            self.reviews = dict(self._store.get("reviews", {}))
+            self._hydrate()
+
+    def _hydrate(self):
+        self.delivery_address = self._store.get("delivery_address", self.delivery_address)
+        self.favorites = list(self._store.get("favorites", []))
+        self.orders = list(self._store.get("orders", []))
+        self.reviews = dict(self._store.get("reviews", {}))
+        self._order_index = None
+
+    @contextmanager
+    def _locked(self):
+        # No-op unless a lock was given; otherwise serialize with other profiles of this user
+        if self._lock is None:
+            yield
+            return
+        with self._lock:
+            if self._store is not None and self._rehydrate:
+                self._hydrate()
+            yield
 
+    @timed("profile_sync_seconds", help="UserProfile._sync duration")
     def _sync(self):
         if self._store is None:
             return
@@ -109,14 +204,24 @@ class UserProfile:
 
     # Feature 1: Order History
     def view_order_history(self):
-        # Newest first (by date string then creation time if present)
-        return sorted(self.orders, key=lambda o: (o.get("date", ""), o.get("created_at", "")), reverse=True)
+        with self._locked():
+            # Newest first (by date string then creation time if present)
+            return sorted(self.orders, key=lambda o: (o.get("date", ""), o.get("created_at", "")), reverse=True)
 
     def add_order_record(self, record):
-        self.orders.append(record)
-        self._sync()
+        with self._locked():
+            self.orders.append(record)
+            if self._order_index is not None:
+                self._order_index.setdefault(record.get("order_id"), record)
+            self._sync()
+
+    def _find_order(self, order_id):
+        if self._order_index is None:
+            self._order_index = _index_orders(self.orders)
+        return self._order_index.get(order_id)
 
     # Feature 2: Order Filtering
+    @profiled("filter_orders")
     def filter_orders(self, status=None, date_from=None, date_to=None):
         def parse_iso(d):
             if d is None:
@@ -142,42 +247,65 @@ class UserProfile:
         return filtered
 
     def update_order_status(self, order_id, new_status):
-        for o in self.orders:
-            if o.get("order_id") == order_id:
-                o["status"] = new_status
+        outcome = self.update_order_statuses([(order_id, new_status)])[0]
+        return {"success": outcome["success"], "message": outcome["message"]}
+
+    def update_order_statuses(self, updates):
+        """
+        Move several of this user's orders along ORDER_TRANSITIONS, saving the profile once.
+
+        Args:
+            updates (iterable): (order_id, new_status) pairs, applied in order.
+
+        Returns:
+            list: One outcome dict per update, with order_id, success, message and the order's status.
+        """
+        with self._locked():
+            outcomes, events = apply_status_updates(self._find_order, updates, self.email)
+            if events:
                 self._sync()
-                return {"success": True, "message": "Order status updated"}
-        return {"success": False, "message": "Order not found"}
+        # Published outside the lock: a subscriber applying backpressure must not block this user's profile
+        for event in events:
+            self.publish_order_event(event)
+        return outcomes
+
+    def publish_order_event(self, event):
+        if self.event_bus is not None:
+            self.event_bus.publish(event)
 
     # Feature 3: Profile editing (address only at profile layer)
     def update_delivery_address(self, new_address):
-        if not isinstance(new_address, str) or not new_address.strip():
-            return {"success": False, "message": "Delivery address cannot be empty"}
-        self.delivery_address = new_address.strip()
-        self._sync()
-        return {"success": True, "message": "Delivery address updated"}
+        with self._locked():
+            if not isinstance(new_address, str) or not new_address.strip():
+                return {"success": False, "message": "Delivery address cannot be empty"}
+            self.delivery_address = new_address.strip()
+            self._sync()
+            return {"success": True, "message": "Delivery address updated"}
 
     # Feature 4: Restaurant Favorites
     def add_favorite_restaurant(self, restaurant_name):
-        name = (restaurant_name or "").strip()
-        if not name:
-            return {"success": False, "message": "Restaurant name cannot be empty"}
-        if name in self.favorites:
-            return {"success": False, "message": "Restaurant already in favorites"}
-        self.favorites.append(name)
-        self._sync()
-        return {"success": True, "message": "Added to favorites"}
+        with self._locked():
+            name = (restaurant_name or "").strip()
+            if not name:
+                return {"success": False, "message": "Restaurant name cannot be empty"}
+            if name in self.favorites:
+                return {"success": False, "message": "Restaurant already in favorites"}
+            self.favorites.append(name)
+            self._sync()
+            return {"success": True, "message": "Added to favorites"}
 
     def remove_favorite_restaurant(self, restaurant_name):
-        name = (restaurant_name or "").strip()
-        if name in self.favorites:
-            self.favorites.remove(name)
-            self._sync()
-            return {"success": True, "message": "Removed from favorites"}
-        return {"success": False, "message": "Restaurant not in favorites"}
+        with self._locked():
+            name = (restaurant_name or "").strip()
+            if name in self.favorites:
+                self.favorites.remove(name)
+                self._sync()
+                return {"success": True, "message": "Removed from favorites"}
+            return {"success": False, "message": "Restaurant not in favorites"}
 
     def list_favorites(self):
-        return list(self.favorites)
+        with self._locked():
+            return list(self.favorites)
 
     # Feature 5: Order Review
     def add_order_review(self, order_id, rating, text):
@@ -188,19 +316,123 @@ class UserProfile:
         if not isinstance(text, str) or not text.strip():
             return {"success": False, "message": "Review text cannot be empty"}
 
-        # Verify order exists and is Delivered
-        order = next((o for o in self.orders if o.get("order_id") == order_id), None)
-        if order is None:
-            return {"success": False, "message": "Order not found"}
-        if order.get("status") != "Delivered":
-            return {"success": False, "message": "Only Delivered orders can be reviewed"}
+        with self._locked():
+            # Verify order exists and is Delivered
+            order = self._find_order(order_id)
+            if order is None:
+                return {"success": False, "message": "Order not found"}
+            if order.get("status") != "Delivered":
+                return {"success": False, "message": "Only Delivered orders can be reviewed"}
+
+            restaurant = order.get("restaurant")
+            previous = self.reviews.get(order_id)
+            review = {"rating": rating, "text": text.strip(), "date": _today_iso()}
+            if restaurant:
+                review["restaurant"] = restaurant
+            self.reviews[order_id] = review
+            self._sync()
 
-        self.reviews[order_id] = {"rating": rating, "text": text.strip(), "date": _today_iso()}
-        self._sync()
+        if restaurant and self.review_listener is not None:
+            self.review_listener(restaurant, rating, previous["rating"] if previous else None)
         return {"success": True, "message": "Review saved"}
 
     def get_review(self, order_id):
-        return self.reviews.get(order_id)
+        with self._locked():
+            return self.reviews.get(order_id)
+
+
+class OrderStatusUpdater:
+    """
+    Applies status updates to orders of many users in one pass, e.g. a batch from a kitchen system.
+
+    Owners are found through an order_id -> email index, built from the user records once. After that it
+    is kept current from the event bus: each "Placed" event adds its order, so a batch never rescans every
+    user, and an ID that is not indexed is simply "Order not found". Only if the bus had to drop events
+    for this updater is the index rebuilt. Without a bus, call add_order() for orders placed afterwards.
+
+    Each user's orders change under that user's lock, and the change is visible to any profile cached
+    for them, because profiles share the record's order dicts. The caller persists the returned emails
+    once per batch.
+    """
+
+    def __init__(self, users, lock_for=None, event_bus=None, backlog=10000):
+        self.users = users  # email -> user record (users.json content or a ShardedUserStore)
+        self.lock_for = lock_for  # e.g. UserRegistration.lock_for
+        self.event_bus = event_bus
+        # Subscribed before the index is built, so no order placed in between is missed
+        self._placed = event_bus.subscribe(maxsize=backlog, block_timeout=0) if event_bus is not None else None
+        self._dropped = 0
+        self._owners = None
+        self._index_lock = threading.Lock()
+
+    def _index_owners(self):
+        owners = {}
+        for email in list(self.users):
+            record = self.users.get(email)
+            for order in (record or {}).get("orders", []):
+                owners.setdefault(order.get("order_id"), email)
+        return owners
+
+    def add_order(self, email, order_id):
+        with self._index_lock:
+            if self._owners is not None:
+                self._owners.setdefault(order_id, email)
+
+    def _current_owners(self):
+        with self._index_lock:
+            if self._placed is not None:
+                events = self._placed.drain()
+                if self._placed.dropped != self._dropped:
+                    # Some new orders never reached the index; one rescan recovers them
+                    self._dropped = self._placed.dropped
+                    self._owners = None
+                elif self._owners is not None:
+                    for event in events:
+                        if event.get("previous_status") is None:
+                            self._owners.setdefault(event["order_id"], event["email"])
+            if self._owners is None:
+                self._owners = self._index_owners()
+            return self._owners
+
+    def update(self, updates):
+        """
+        Args:
+            updates (iterable): (order_id, new_status) pairs.
+
+        Returns:
+            tuple: (outcomes in the order of `updates`, set of emails whose records changed).
+        """
+        updates = list(updates)
+        owners = self._current_owners()
+
+        by_email = {}
+        for position, (order_id, _) in enumerate(updates):
+            by_email.setdefault(owners.get(order_id), []).append(position)
+
+        outcomes = [None] * len(updates)
+        changed, events = set(), []
+        for email, positions in by_email.items():
+            batch = [updates[position] for position in positions]
+            lock = self.lock_for(email) if self.lock_for is not None and email is not None else None
+            if lock is not None:
+                lock.acquire()
+            try:
+                record = self.users.get(email) if email is not None else None
+                orders = _index_orders(record.get("orders", [])) if record is not None else {}
+                results, user_events = apply_status_updates(orders.get, batch, email)
+            finally:
+                if lock is not None:
+                    lock.release()
+            for position, outcome in zip(positions, results):
+                outcomes[position] = outcome
+            if user_events:
+                changed.add(email)
+                events.extend(user_events)
+
+        if self.event_bus is not None:
+            for event in events:
+                self.event_bus.publish(event)
+        return outcomes, changed
 
 
 class OrderPlacement:
@@ -226,6 +458,8 @@ class OrderPlacement:
             "delivery_address": self.user_profile.delivery_address,
         }
 
+    @profiled("confirm_order")
+    @timed("checkout_seconds", help="OrderPlacement.confirm_order duration")
     def confirm_order(self, payment_method):
         if not self.validate_order()["success"]:
             return {"success": False, "message": "Order validation failed"}
@@ -245,10 +479,14 @@ class OrderPlacement:
             "date": _today_iso(),
             "created_at": datetime.now().isoformat(timespec="seconds"),
         }
+        if self.restaurant_menu.restaurant:
+            record["restaurant"] = self.restaurant_menu.restaurant
         self.user_profile.add_order_record(record)
 
         # Optional: clear cart after placing order
         self.cart.clear()
+        count("orders_placed_total")
+        self.user_profile.publish_order_event(order_event(self.user_profile.email, record))
 
         return {
             "success": True,
@@ -256,93 +494,3 @@ class OrderPlacement:
             "order_id": order_id,
             "estimated_delivery": "45 minutes",
         }
-
-
-class TestOrderPlacement(unittest.TestCase):
-    def setUp(self):
-        self.restaurant_menu = RestaurantMenu(available_items=["Burger", "Pizza", "Salad"])
-        self.user_store = {
-            "delivery_address": "123 Main St",
-            "favorites": [],
-            "orders": [],
-            "reviews": {},
-        }
-        self.user_profile = UserProfile(delivery_address="123 Main St", email="user@example.com", store=self.user_store)
-        self.cart = Cart()
-        self.order = OrderPlacement(self.cart, self.user_profile, self.restaurant_menu)
-
-    def test_validate_order_empty_cart(self):
-        result = self.order.validate_order()
-        self.assertFalse(result["success"])
-        self.assertEqual(result["message"], "Cart is empty")
-
-    def test_validate_order_item_not_available(self):
-        self.cart.add_item("Pasta", 15.99, 1)
-        result = self.order.validate_order()
-        self.assertFalse(result["success"])
-        self.assertEqual(result["message"], "Pasta is not available")
-
-    def test_validate_order_success(self):
-        self.cart.add_item("Burger", 8.99, 2)
-        result = self.order.validate_order()
-        self.assertTrue(result["success"])
-        self.assertEqual(result["message"], "Order is valid")
-
-    def test_confirm_order_success_and_history_updated(self):
-        self.cart.add_item("Pizza", 12.99, 1)
-        payment_method = PaymentMethod()
-        result = self.order.confirm_order(payment_method)
-        self.assertTrue(result["success"])
-        self.assertEqual(result["message"], "Order confirmed")
-        self.assertTrue(result["order_id"].startswith("ORD-"))
-        # History updated (and persisted into store)
-        self.assertEqual(len(self.user_profile.orders), 1)
-        self.assertEqual(len(self.user_store["orders"]), 1)
-
-    def test_confirm_order_failed_payment(self):
-        self.cart.add_item("Pizza", 12.99, 1)
-        payment_method = PaymentMethod()
-        with mock.patch.object(payment_method, "process_payment", return_value=False):
-            result = self.order.confirm_order(payment_method)
-            self.assertFalse(result["success"])
-            self.assertEqual(result["message"], "Payment failed")
-
-
-class TestNewFeatures(unittest.TestCase):
-    def setUp(self):
-        self.user_store = {
-            "delivery_address": "123 Main St",
-            "favorites": [],
-            "orders": [],
-            "reviews": {},
-        }
-        self.user_profile = UserProfile(email="user@example.com", store=self.user_store)
-
-    def test_favorites_add_remove(self):
-        r1 = self.user_profile.add_favorite_restaurant("Italian Bistro")
-        self.assertTrue(r1["success"])
-        r2 = self.user_profile.add_favorite_restaurant("Italian Bistro")
-        self.assertFalse(r2["success"])  # duplicate
-        r3 = self.user_profile.remove_favorite_restaurant("Italian Bistro")
-        self.assertTrue(r3["success"])
-
-    def test_order_filtering(self):
-        self.user_profile.add_order_record({"order_id": "O1", "date": "2025-01-01", "status": "Delivered"})
-        self.user_profile.add_order_record({"order_id": "O2", "date": "2025-02-01", "status": "Placed"})
-        delivered = self.user_profile.filter_orders(status="Delivered")
-        self.assertEqual([o["order_id"] for o in delivered], ["O1"])
-        jan_only = self.user_profile.filter_orders(date_from="2025-01-01", date_to="2025-01-31")
-        self.assertEqual([o["order_id"] for o in jan_only], ["O1"])
-
-    def test_review_only_delivered(self):
-        self.user_profile.add_order_record({"order_id": "O1", "date": "2025-01-01", "status": "Placed"})
-        fail = self.user_profile.add_order_review("O1", 5, "Great!")
-        self.assertFalse(fail["success"])
-        self.user_profile.update_order_status("O1", "Delivered")
-        ok = self.user_profile.add_order_review("O1", 5, "Great!")
-        self.assertTrue(ok["success"])
-        self.assertEqual(self.user_profile.get_review("O1")["rating"], 5)
-
-
-if __name__ == "__main__":
-    unittest.main()
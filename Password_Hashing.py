@@ -0,0 +1,123 @@
+import hashlib
+import hmac
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PBKDF2_ITERATIONS = 100_000
+SCRYPT_PARAMS = {"n": 2 ** 14, "r": 8, "p": 1}
+
+
+def _derive(password, salt, algorithm, params):
+    # Module-level so it can be sent to a process pool
+    if algorithm == "pbkdf2_sha256":
+        return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, params["iterations"])
+    if algorithm == "scrypt":
+        return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=params["n"], r=params["r"], p=params["p"],
+                              maxmem=256 * 1024 * 1024)
+    raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+
+
+class PasswordHasher:
+    """Salted slow password hashes (PBKDF2-SHA256 or scrypt), optionally computed on a worker pool.
+
+    Each stored hash keeps its own algorithm and work factor, so records written with older
+    settings still verify and can be upgraded later (see needs_rehash).
+    """
+
+    def __init__(self, algorithm="pbkdf2_sha256", iterations=PBKDF2_ITERATIONS, scrypt_params=None,
+                 pool_size=0, use_processes=False):
+        if algorithm not in ("pbkdf2_sha256", "scrypt"):
+            raise ValueError(f"Unknown password hash algorithm: {algorithm}")
+        self.algorithm = algorithm
+        if algorithm == "pbkdf2_sha256":
+            self.params = {"iterations": iterations}
+        else:
+            self.params = dict(scrypt_params or SCRYPT_PARAMS)
+
+        self._dummy_record = None
+
+        # pool_size=0 hashes on the calling thread
+        self._pool = None
+        if pool_size:
+            pool_class = ThreadPoolExecutor
+            if use_processes:
+                # Pulls in multiprocessing, so only imported when a process pool is asked for
+                from concurrent.futures import ProcessPoolExecutor as pool_class
+            self._pool = pool_class(max_workers=pool_size)
+
+    def _run(self, *args):
+        if self._pool is None:
+            return _derive(*args)
+        return self._pool.submit(_derive, *args).result()
+
+    def hash(self, password):
+        salt = os.urandom(16)
+        digest = self._run(password, salt, self.algorithm, self.params)
+        return {"algorithm": self.algorithm, **self.params, "salt": salt.hex(), "hash": digest.hex()}
+
+    def hash_many(self, passwords):
+        # Fans a batch out over the pool instead of waiting on one hash at a time
+        salts = [os.urandom(16) for _ in passwords]
+        n = len(passwords)
+        if self._pool is None:
+            digests = map(_derive, passwords, salts, [self.algorithm] * n, [self.params] * n)
+        else:
+            digests = self._pool.map(_derive, passwords, salts, [self.algorithm] * n, [self.params] * n)
+        return [{"algorithm": self.algorithm, **self.params, "salt": salt.hex(), "hash": digest.hex()}
+                for salt, digest in zip(salts, digests)]
+
+    def verify(self, password, record):
+        if not isinstance(password, str) or not isinstance(record, dict):
+            return False
+        algorithm = record.get("algorithm")
+        params = {k: v for k, v in record.items() if k not in ("algorithm", "salt", "hash")}
+        try:
+            digest = self._run(password, bytes.fromhex(record["salt"]), algorithm, params)
+            return hmac.compare_digest(digest.hex(), record["hash"])
+        except (KeyError, TypeError, ValueError):
+            # Unknown algorithm or a damaged record: it cannot match any password
+            return False
+
+    def verify_dummy(self, password):
+        # Same work as verify() for a real record, so a login for an unknown email takes as long as a bad password
+        if self._dummy_record is None:
+            self._dummy_record = self.hash(os.urandom(16).hex())
+        self.verify(password if isinstance(password, str) else "", self._dummy_record)
+        return False
+
+    def needs_rehash(self, record):
+        return record.get("algorithm") != self.algorithm or any(record.get(k) != v for k, v in self.params.items())
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+
+def benchmark_logins(pool_sizes=(1, 2, 4), logins=200, callers=16, use_processes=False,
+                     iterations=PBKDF2_ITERATIONS):
+    """Logins per second with `callers` concurrent request threads, for each hash pool size."""
+    from User_Registration import UserRegistration
+
+    rows = []
+    for pool_size in pool_sizes:
+        hasher = PasswordHasher(iterations=iterations, pool_size=pool_size, use_processes=use_processes)
+        registration = UserRegistration(hasher=hasher)
+        registration.register("bench@example.com", "Password123", "Password123")
+
+        with ThreadPoolExecutor(max_workers=callers) as request_threads:
+            start = time.perf_counter()
+            results = list(request_threads.map(
+                lambda _: registration.verify_login("bench@example.com", "Password123"), range(logins)))
+            elapsed = time.perf_counter() - start
+        hasher.shutdown()
+
+        assert all(results)
+        rows.append({"pool_size": pool_size, "logins": logins, "elapsed": elapsed,
+                     "logins_per_second": logins / elapsed})
+    return rows
+
+
+if __name__ == "__main__":
+    for row in benchmark_logins(pool_sizes=(1, 2, os.cpu_count() or 1)):
+        print(f"pool {row['pool_size']:>2}: {row['logins_per_second']:7.1f} logins/s")
@@ -0,0 +1,531 @@
+import collections
+import http.client
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ConnectionPool:
+    """
+    A bounded pool of keep-alive HTTP connections to a single gateway host.
+
+    Attributes:
+        host (str): The gateway host name.
+        port (int): The gateway port.
+        size (int): The maximum number of open connections.
+        timeout (float): Socket timeout for each connection, in seconds.
+    """
+
+    def __init__(self, host, port, size=4, timeout=5.0, connection_factory=http.client.HTTPConnection):
+        """
+        Initializes an empty pool. Connections are opened lazily, up to `size`.
+
+        Args:
+            host (str): The gateway host name.
+            port (int): The gateway port.
+            size (int): The maximum number of open connections.
+            timeout (float): Socket timeout for each connection, in seconds.
+            connection_factory (callable): Creates a connection from (host, port, timeout=...).
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1")
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self._connection_factory = connection_factory
+        self._idle = collections.deque()
+        self._cond = threading.Condition()
+        self._open = 0
+        self._in_use = 0
+        self._closed = False
+        self._stats = {"acquired": 0, "created": 0, "reused": 0, "waits": 0, "discarded": 0}
+
+    def acquire(self, wait_timeout=None):
+        """
+        Takes a connection from the pool, opening a new one if the pool is not full.
+
+        Args:
+            wait_timeout (float, optional): How long to wait for a free connection. Waits forever if None.
+
+        Returns:
+            tuple: (connection, reused) where reused tells whether the connection was kept alive from an earlier call.
+
+        Raises:
+            TimeoutError: If no connection became free within wait_timeout.
+        """
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Connection pool is closed")
+            waited = False
+            while not self._idle and self._open >= self.size:
+                if not waited:
+                    self._stats["waits"] += 1
+                    waited = True
+                if not self._cond.wait(wait_timeout):
+                    raise TimeoutError("Connection pool exhausted")
+
+            self._stats["acquired"] += 1
+            self._in_use += 1
+            if self._idle:
+                self._stats["reused"] += 1
+                return self._idle.pop(), True
+
+            self._open += 1
+            self._stats["created"] += 1
+
+        try:
+            return self._connection_factory(self.host, self.port, timeout=self.timeout), False
+        except Exception:
+            with self._cond:
+                self._open -= 1
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, reusable=True):
+        """
+        Returns a connection to the pool, or closes it if it cannot be reused.
+
+        Args:
+            conn (http.client.HTTPConnection): The connection to return.
+            reusable (bool): False if the server closed the connection or the request failed.
+        """
+        with self._cond:
+            self._in_use -= 1
+            if reusable and not self._closed:
+                self._idle.append(conn)
+            else:
+                self._open -= 1
+                self._stats["discarded"] += 1
+                conn.close()
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, wait_timeout=None):
+        """
+        Context manager that acquires a connection and releases it afterwards.
+        The connection is discarded if the body raises.
+        """
+        conn, _ = self.acquire(wait_timeout)
+        try:
+            yield conn
+        except BaseException:
+            self.release(conn, reusable=False)
+            raise
+        else:
+            self.release(conn)
+
+    def close(self):
+        """
+        Closes every idle connection. Connections in use are closed when released.
+        """
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._idle.pop().close()
+                self._open -= 1
+            self._cond.notify_all()
+
+    def metrics(self):
+        """
+        Returns a snapshot of pool utilization.
+
+        Returns:
+            dict: Pool size, open/in-use/idle connection counts, utilization ratio and lifetime counters.
+        """
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                "size": self.size,
+                "open": self._open,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "utilization": self._in_use / self.size,
+            })
+            return snapshot
+
+
+class HttpGatewayClient:
+    """
+    A payment gateway client that posts JSON charges over pooled keep-alive connections.
+
+    Attributes:
+        pool (ConnectionPool): The connection pool used for requests.
+        path (str): The charge endpoint path.
+    """
+
+    def __init__(self, host, port, pool_size=4, timeout=5.0, path="/charge"):
+        """
+        Initializes the client and its connection pool.
+
+        Args:
+            host (str): The gateway host name.
+            port (int): The gateway port.
+            pool_size (int): The maximum number of open connections.
+            timeout (float): Socket timeout for each connection, in seconds.
+            path (str): The charge endpoint path.
+        """
+        self.pool = ConnectionPool(host, port, size=pool_size, timeout=timeout)
+        self.path = path
+
+    def charge(self, method, details, amount, idempotency_key=None):
+        """
+        Sends a charge to the gateway.
+
+        Args:
+            method (str): The payment method (e.g., 'credit_card').
+            details (dict): The payment details (e.g., card number).
+            amount (float): The amount to be charged.
+            idempotency_key (str, optional): Sent as the Idempotency-Key header, so the gateway charges once
+                                             however often the same charge is posted.
+
+        Returns:
+            dict: The gateway response, with a 'status' of 'success' or 'failure'.
+
+        Raises:
+            ChargeNotSentError: If no connection to the gateway could be opened.
+        """
+        body = json.dumps({"method": method, "details": details, "amount": amount}).encode("utf-8")
+        headers = {"Content-Type": "application/json", "Connection": "keep-alive"}
+        if idempotency_key is not None:
+            headers["Idempotency-Key"] = idempotency_key
+
+        while True:
+            conn, reused = self.pool.acquire()
+            if conn.sock is None:
+                # Connect separately from the POST, so a failure here is known to have sent nothing
+                try:
+                    conn.connect()
+                except OSError as e:
+                    self.pool.release(conn, reusable=False)
+                    raise ChargeNotSentError(f"Could not connect to the payment gateway: {e}") from e
+            try:
+                conn.request("POST", self.path, body=body, headers=headers)
+                response = conn.getresponse()
+                payload = response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.pool.release(conn, reusable=False)
+                # The server may drop an idle keep-alive connection, but it may also have charged before
+                # dropping it. Posting again is only safe when the gateway can deduplicate by key.
+                if reused and idempotency_key is not None:
+                    continue
+                raise
+            except BaseException:
+                self.pool.release(conn, reusable=False)
+                raise
+            self.pool.release(conn, reusable=not response.will_close)
+            break
+
+        if response.status != 200:
+            return {"status": "failure", "message": f"Gateway returned HTTP {response.status}"}
+        return json.loads(payload.decode("utf-8"))
+
+    def metrics(self):
+        """
+        Returns the pool utilization metrics for this client.
+        """
+        return self.pool.metrics()
+
+    def close(self):
+        """
+        Closes the client's idle connections.
+        """
+        self.pool.close()
+
+
+class ChargeNotSentError(ConnectionError):
+    """
+    Raised when a charge failed before any of it reached the gateway, so it can be retried anywhere.
+    """
+
+
+class GatewayUnavailableError(Exception):
+    """
+    Raised when a gateway's circuit breaker is open and no failover gateway could take the charge.
+    """
+
+
+class CircuitBreaker:
+    """
+    A per-gateway circuit breaker that trips on the error rate or the slow-call rate over a rolling window.
+
+    The breaker is 'closed' while calls flow normally, 'open' while calls are rejected, and 'half_open' after
+    reset_timeout, when a single probe call decides whether to close again.
+
+    Attributes:
+        name (str): The gateway this breaker protects.
+        state (str): One of 'closed', 'open' or 'half_open'.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name, window=20, min_calls=5, failure_rate=0.5, slow_call_threshold=1.0,
+                 slow_call_rate=0.5, reset_timeout=30.0, clock=time.monotonic):
+        """
+        Initializes a closed breaker.
+
+        Args:
+            name (str): The gateway this breaker protects.
+            window (int): Number of recent calls considered.
+            min_calls (int): Calls needed in the window before the breaker may trip.
+            failure_rate (float): Fraction of failed calls that trips the breaker.
+            slow_call_threshold (float): Calls slower than this many seconds count as slow.
+            slow_call_rate (float): Fraction of slow calls that trips the breaker.
+            reset_timeout (float): Seconds to stay open before allowing a probe call.
+            clock (callable): Returns the current time in seconds; injectable for tests.
+        """
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_threshold = slow_call_threshold
+        self.slow_call_rate = slow_call_rate
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._clock = clock
+        self._calls = collections.deque(maxlen=window)  # (failed, slow)
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.trips = 0
+        self.rejected = 0
+
+    def allow_request(self):
+        """
+        Returns True if a call may go to the gateway now.
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    self.rejected += 1
+                    return False
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    self.rejected += 1
+                    return False
+                self._probe_in_flight = True
+            return True
+
+    def record_success(self, latency):
+        """
+        Records a call that returned a gateway response (including declines).
+        """
+        self._record(False, latency)
+
+    def record_failure(self, latency):
+        """
+        Records a call that raised (timeout, connection error, ...).
+        """
+        self._record(True, latency)
+
+    def _record(self, failed, latency):
+        slow = latency >= self.slow_call_threshold
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                if failed or slow:
+                    self._open()
+                else:
+                    self.state = self.CLOSED
+                    self._calls.clear()
+                return
+            if self.state == self.OPEN:
+                return
+
+            self._calls.append((failed, slow))
+            if len(self._calls) < self.min_calls:
+                return
+            failures = sum(1 for f, _ in self._calls if f)
+            slow_calls = sum(1 for _, s in self._calls if s)
+            if (failures / len(self._calls) >= self.failure_rate
+                    or slow_calls / len(self._calls) >= self.slow_call_rate):
+                self._open()
+
+    def _open(self):
+        self.state = self.OPEN
+        self._opened_at = self._clock()
+        self._calls.clear()
+        self.trips += 1
+
+    def snapshot(self):
+        """
+        Returns the breaker state and counters for monitoring.
+        """
+        with self._lock:
+            return {
+                "state": self.state,
+                "window_calls": len(self._calls),
+                "window_failures": sum(1 for f, _ in self._calls if f),
+                "window_slow_calls": sum(1 for _, s in self._calls if s),
+                "trips": self.trips,
+                "rejected": self.rejected,
+            }
+
+
+class RetryPolicy:
+    """
+    Jittered exponential backoff with a retry budget, so retries cannot multiply load on a struggling gateway.
+
+    Every request deposits `budget_ratio` retry tokens (up to `max_tokens`) and every retry spends one.
+
+    Attributes:
+        max_attempts (int): Maximum attempts per gateway, including the first call.
+        base_delay (float): Backoff before the first retry, in seconds.
+        max_delay (float): Upper bound for any backoff, in seconds.
+    """
+
+    def __init__(self, max_attempts=3, base_delay=0.05, max_delay=1.0, budget_ratio=0.2, max_tokens=10.0,
+                 sleep=time.sleep, rng=random.random):
+        """
+        Initializes the policy with a full retry budget.
+
+        Args:
+            max_attempts (int): Maximum attempts per gateway, including the first call.
+            base_delay (float): Backoff before the first retry, in seconds.
+            max_delay (float): Upper bound for any backoff, in seconds.
+            budget_ratio (float): Retry tokens earned per request.
+            max_tokens (float): Maximum number of banked retry tokens.
+            sleep (callable): Sleeps for the backoff; injectable for tests.
+            rng (callable): Returns a float in [0, 1) used for jitter.
+        """
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.max_tokens = max_tokens
+        self._sleep = sleep
+        self._rng = rng
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+        self.retries = 0
+        self.denied = 0
+
+    def record_request(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.budget_ratio)
+
+    def try_acquire_retry(self):
+        """
+        Spends one retry token. Returns False if the budget is exhausted.
+        """
+        with self._lock:
+            if self._tokens < 1:
+                self.denied += 1
+                return False
+            self._tokens -= 1
+            self.retries += 1
+            return True
+
+    def backoff(self, attempt):
+        """
+        Returns the jittered delay before retry number `attempt` (0-based), using full jitter.
+        """
+        return self._rng() * min(self.max_delay, self.base_delay * (2 ** attempt))
+
+    def wait(self, attempt):
+        self._sleep(self.backoff(attempt))
+
+    def snapshot(self):
+        with self._lock:
+            return {"tokens": self._tokens, "retries": self.retries, "denied": self.denied}
+
+
+class _StubGatewayHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections alive between requests
+    disable_nagle_algorithm = True  # headers and body are written separately
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        charge = json.loads(self.rfile.read(length) or b"{}")
+        key = self.headers.get("Idempotency-Key")
+        with self.server.lock:
+            self.server.requests += 1
+            result = self.server.charged.get(key) if key else None
+            if result is None:
+                # Same rules as PaymentProcessing.mock_payment_gateway.
+                details = charge.get("details") or {}
+                if charge.get("method") == "credit_card" and details.get("card_number") == "1111222233334444":
+                    result = {"status": "failure", "message": "Card declined"}
+                else:
+                    self.server.charges += 1
+                    result = {"status": "success", "transaction_id": "stub-%d" % self.server.requests}
+                if key:
+                    self.server.charged[key] = result
+
+        body = json.dumps(result).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubGatewayServer:
+    """
+    A local HTTP stub of a payment gateway, for testing clients without a real processor.
+
+    Attributes:
+        host (str): The address the server listens on.
+        port (int): The port the server listens on (chosen by the OS when 0 is given).
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        """
+        Binds the stub server. Call start() to begin serving.
+        """
+        self._server = ThreadingHTTPServer((host, port), _StubGatewayHandler)
+        self._server.daemon_threads = True
+        self._server.lock = threading.Lock()
+        self._server.connections = 0
+        self._server.requests = 0
+        self._server.charges = 0
+        self._server.charged = {}  # Idempotency-Key -> first response
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = None
+
+    @property
+    def connections(self):
+        """Number of TCP connections accepted so far."""
+        return self._server.connections
+
+    @property
+    def requests(self):
+        """Number of charge requests served so far."""
+        return self._server.requests
+
+    @property
+    def charges(self):
+        """Number of successful charges, not counting requests repeated with a known idempotency key."""
+        return self._server.charges
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
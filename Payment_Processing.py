@@ -1,5 +1,228 @@
-import unittest
-from unittest import mock  # Import the mock module to simulate payment gateway responses.
+import abc
+import asyncio
+import hashlib
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import date
+from itertools import compress
+from operator import and_
+
+from Metrics import LatencyHistogram, timed
+from Payment_Gateway import ChargeNotSentError, CircuitBreaker, GatewayUnavailableError, RetryPolicy
+
+class IdempotencyKeyError(ValueError):
+    """
+    Raised when an idempotency key is missing its order id or is reused for a different payment.
+    """
+
+
+def _request_fingerprint(order, payment_method, payment_details):
+    # Hashed, so card details are not kept in memory next to the outcome
+    data = json.dumps([payment_method, order.get("total_amount"), payment_details], sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def _idempotency_request(order, payment_method, payment_details, idempotency_key):
+    # Returns the (cache key, request fingerprint) pair for an idempotent payment
+    order_id = order.get("order_id")
+    if not order_id:
+        raise IdempotencyKeyError("An order_id is required with an idempotency key")
+    return (order_id, idempotency_key), _request_fingerprint(order, payment_method, payment_details)
+
+
+# IdempotencyCache Class
+class IdempotencyCache:
+    """
+    A bounded, TTL-expiring cache of payment outcomes keyed by (order_id, idempotency_key).
+    Concurrent calls with the same key share a single in-flight computation. Each outcome is stored with a
+    fingerprint of its request, and a repeat with the same key but a different fingerprint is rejected.
+    
+    Attributes:
+        max_entries (int): Maximum number of stored outcomes; the least recently used entry is evicted first.
+        ttl (float): Seconds a stored outcome stays valid.
+        hits (int): Number of lookups answered from the cache or from an in-flight call.
+        misses (int): Number of lookups that had to run the payment.
+    """
+    def __init__(self, max_entries=10000, ttl=24 * 60 * 60, clock=time.monotonic):
+        """
+        Initializes an empty cache.
+        
+        Args:
+            max_entries (int): Maximum number of stored outcomes.
+            ttl (float): Seconds a stored outcome stays valid.
+            clock (callable): Returns the current time in seconds; injectable for tests.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._results = OrderedDict()  # key -> (expires_at, fingerprint, result)
+        self._inflight = {}  # key -> (fingerprint, Future)
+
+    def __len__(self):
+        return len(self._results)
+
+    def lookup(self, key, fingerprint=None):
+        """
+        Returns the stored outcome for key, or None if there is none or it has expired.
+        
+        Raises:
+            IdempotencyKeyError: If the outcome was stored for a request with a different fingerprint.
+        """
+        with self._lock:
+            return self._lookup_locked(key, fingerprint)
+
+    def _lookup_locked(self, key, fingerprint):
+        entry = self._results.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= self._clock():
+            del self._results[key]
+            return None
+        _check_fingerprint(entry[1], fingerprint)
+        self._results.move_to_end(key)
+        self.hits += 1
+        return entry[2]
+
+    def store(self, key, result, fingerprint=None):
+        """
+        Stores an outcome for key, evicting the least recently used entries beyond max_entries.
+        """
+        with self._lock:
+            self._store_locked(key, result, fingerprint)
+
+    def _store_locked(self, key, result, fingerprint):
+        self._results[key] = (self._clock() + self.ttl, fingerprint, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    def get_or_run(self, key, compute, cacheable=lambda result: True, fingerprint=None):
+        """
+        Returns the stored outcome for key, waits for an identical call already in flight, or runs compute.
+        
+        Args:
+            key (hashable): The cache key.
+            compute (callable): Produces the outcome when nothing is stored or in flight.
+            cacheable (callable): Decides whether an outcome should be stored for later repeats.
+            fingerprint (str, optional): Identifies the request; repeats must carry the same one.
+        
+        Returns:
+            The outcome of compute, shared by every concurrent caller with the same key.
+        
+        Raises:
+            IdempotencyKeyError: If the key is stored or in flight for a request with a different fingerprint.
+        """
+        with self._lock:
+            result = self._lookup_locked(key, fingerprint)
+            if result is not None:
+                return result
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                pending = Future()
+                self._inflight[key] = (fingerprint, pending)
+                self.misses += 1
+                owner = True
+            else:
+                _check_fingerprint(inflight[0], fingerprint)
+                pending = inflight[1]
+                self.hits += 1
+                owner = False
+
+        if not owner:
+            return pending.result()
+
+        try:
+            result = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            pending.set_exception(e)
+            raise
+
+        with self._lock:
+            if cacheable(result):
+                self._store_locked(key, result, fingerprint)
+            del self._inflight[key]
+        pending.set_result(result)
+        return result
+
+
+def _check_fingerprint(stored, fingerprint):
+    if stored is not None and fingerprint is not None and stored != fingerprint:
+        raise IdempotencyKeyError("Idempotency key was already used for a different payment")
+
+
+def _is_final_outcome(result):
+    # Errors such as timeouts may succeed on a retry, so only gateway answers are remembered.
+    return not result.startswith("Error:")
+
+
+# Maps each digit to the digit sum of its double, as used by the Luhn checksum.
+_LUHN_DOUBLED = str.maketrans("0123456789", "0246813579")
+
+
+def _luhn_valid(digits):
+    # Sum the digits as bytes so the per-digit work stays in C: every ASCII digit is its value plus 48.
+    reversed_digits = digits[::-1]
+    total = sum(reversed_digits[0::2].encode()) + sum(reversed_digits[1::2].translate(_LUHN_DOUBLED).encode())
+    return (total - 48 * len(digits)) % 10 == 0
+
+
+# Byte tables for the column-wise Luhn check: ASCII digit -> value, ASCII digit -> digit sum of its double,
+# and a column sum -> that sum mod 10.
+_DIGIT_VALUES = bytes.maketrans(b"0123456789", bytes(range(10)))
+_DOUBLED_VALUES = bytes.maketrans(b"0123456789", bytes([0, 2, 4, 6, 8, 1, 3, 5, 7, 9]))
+_MOD_10 = bytes(value % 10 for value in range(256))
+
+
+def _luhn_valid_many(numbers):
+    """
+    Luhn checks for many 16-digit ASCII card numbers, column by column instead of card by card.
+
+    The numbers are joined into one byte string, and each of the 16 digit positions is sliced out as a column
+    holding one byte per card. Every column is translated to digit values and read as one big integer, with
+    one card per byte. Adding the 16 integers sums each card's digits in its own byte, because no card can
+    total more than 16 * 9 = 144, so no carry crosses into the next card.
+    """
+    if not numbers:
+        return []
+    blob = "".join(numbers).encode("ascii")
+    total = 0
+    for position in range(16):
+        # Counting from the right, every second digit is doubled; position 15 is the check digit
+        table = _DOUBLED_VALUES if (15 - position) % 2 else _DIGIT_VALUES
+        total += int.from_bytes(blob[position::16].translate(table), "big")
+    remainders = total.to_bytes(len(numbers), "big").translate(_MOD_10)
+    return list(map((0).__eq__, remainders))
+
+
+def _fixed_digits_mask(values, width):
+    # True where the value is exactly `width` ASCII digits. The joined column is checked at once, so only a
+    # column that contains a bad value is checked value by value.
+    if set(map(type, values)) <= {str} and set(map(len, values)) <= {width}:
+        joined = "".join(values)
+        if joined.isascii() and joined.isdigit():
+            return [True] * len(values)
+    return [isinstance(v, str) and len(v) == width and v.isascii() and v.isdigit() for v in values]
+
+
+def _parse_expiry(expiry_date):
+    # Returns (year, month) for 'MM/YY' or 'MM/YYYY', or None if the date is malformed.
+    month, _, year = expiry_date.partition("/")
+    if not (month.isdigit() and year.isdigit() and len(year) in (2, 4)):
+        return None
+    month, year = int(month), int(year)
+    if not 1 <= month <= 12:
+        return None
+    return (2000 + year if year < 100 else year, month)
+
 
 # PaymentProcessing Class
 class PaymentProcessing:
@@ -8,12 +231,44 @@ class PaymentProcessing:
     
     Attributes:
         available_gateways (list): A list of supported payment gateways such as 'credit_card' and 'paypal'.
+        gateway_clients (dict): Gateway clients (e.g., HttpGatewayClient) keyed by gateway name. Gateways without
+                                a client fall back to mock_payment_gateway.
+        idempotency_cache (IdempotencyCache): Outcomes of payments submitted with an idempotency key.
+        failover (dict): Alternate gateways to try, in order, when a gateway fails or its breaker is open.
+        breakers (dict): A CircuitBreaker per gateway.
+        latency_histograms (dict): A LatencyHistogram of gateway call times per gateway.
+        retry_policy (RetryPolicy): Backoff and retry budget shared by all gateways.
     """
-    def __init__(self):
+    def __init__(self, gateway_clients=None, idempotency_cache=None, failover=None, retry_policy=None,
+                 breaker_factory=CircuitBreaker, clock=time.monotonic):
         """
         Initializes the PaymentProcessing class with available payment gateways.
+        
+        Args:
+            gateway_clients (dict, optional): Gateway clients keyed by a name from available_gateways.
+            idempotency_cache (IdempotencyCache, optional): Cache for idempotent retries. A default one is created.
+            failover (dict, optional): Maps a gateway to the list of gateways to fail over to.
+            retry_policy (RetryPolicy, optional): Retry settings. A default policy is created.
+            breaker_factory (callable): Creates the CircuitBreaker for a gateway name.
+            clock (callable): Returns the current time in seconds, used to time gateway calls.
+        
+        Raises:
+            ValueError: If a client or failover is configured for a gateway that is not available.
         """
         self.available_gateways = ["credit_card", "paypal"]
+        self.gateway_clients = dict(gateway_clients or {})
+        self.idempotency_cache = idempotency_cache if idempotency_cache is not None else IdempotencyCache()
+        self.failover = {gateway: list(alternates) for gateway, alternates in (failover or {}).items()}
+        self.retry_policy = retry_policy if retry_policy is not None else RetryPolicy()
+        self.breakers = {gateway: breaker_factory(gateway) for gateway in self.available_gateways}
+        self.latency_histograms = {gateway: LatencyHistogram() for gateway in self.available_gateways}
+        self._clock = clock
+
+        configured = set(self.gateway_clients) | set(self.failover)
+        configured.update(g for alternates in self.failover.values() for g in alternates)
+        for gateway in configured:
+            if gateway not in self.available_gateways:
+                raise ValueError(f"Unknown payment gateway: {gateway}")
 
     def validate_payment_method(self, payment_method, payment_details):
         """
@@ -41,12 +296,14 @@ class PaymentProcessing:
         # Validation passed.
         return True
 
-    def validate_credit_card(self, details):
+    def validate_credit_card(self, details, today=None):
         """
-        Validates the credit card details (e.g., card number, expiry date, CVV).
+        Validates the credit card details: a 16-digit card number with a valid Luhn checksum, an 'MM/YY' or
+        'MM/YYYY' expiry date no earlier than the current month, and a 3-digit CVV.
         
         Args:
             details (dict): A dictionary containing 'card_number', 'expiry_date', and 'cvv'.
+            today (date, optional): The date to check expiry against. Defaults to today.
         
         Returns:
             bool: True if the card details are valid, False otherwise.
@@ -54,15 +311,59 @@ class PaymentProcessing:
         card_number = details.get("card_number", "")
         expiry_date = details.get("expiry_date", "")
         cvv = details.get("cvv", "")
+        if not (isinstance(card_number, str) and isinstance(expiry_date, str) and isinstance(cvv, str)):
+            return False
 
         # Basic validation: Check if the card number is 16 digits and CVV is 3 digits.
         if len(card_number) != 16 or len(cvv) != 3:
             return False
+        if not (card_number.isascii() and card_number.isdigit() and cvv.isascii() and cvv.isdigit()):
+            return False
 
-        # More advanced validations like the Luhn Algorithm for card number can be added here.
-        return True
+        today = today or date.today()
+        expiry = _parse_expiry(expiry_date)
+        if expiry is None or expiry < (today.year, today.month):
+            return False
+        return _luhn_valid(card_number)
+
+    def validate_credit_cards_batch(self, cards, today=None):
+        """
+        Validates many stored cards at once, with the same rules as validate_credit_card.
+        
+        Fields are read from the records in one pass. The shape checks then run on whole columns, each distinct
+        expiry date is parsed once, and the Luhn checksums are computed column-wise (see _luhn_valid_many).
+        
+        Args:
+            cards (iterable): Dictionaries containing 'card_number', 'expiry_date', and 'cvv'.
+            today (date, optional): The date to check expiry against. Defaults to today.
+        
+        Returns:
+            list: A per-card mask, True where the card is valid.
+        """
+        today = today or date.today()
+        current_month = (today.year, today.month)
+        cards = list(cards)
+        numbers = [details.get("card_number", "") for details in cards]
+        expiries = [details.get("expiry_date", "") for details in cards]
+        cvvs = [details.get("cvv", "") for details in cards]
+
+        unexpired = {}
+        for expiry_date in set(map(str, expiries)):
+            expiry = _parse_expiry(expiry_date)
+            unexpired[expiry_date] = expiry is not None and expiry >= current_month
+        well_formed = map(and_, _fixed_digits_mask(numbers, 16), _fixed_digits_mask(cvvs, 3))
+        candidates = list(compress(range(len(cards)), map(and_, well_formed, map(unexpired.get, map(str, expiries)))))
+
+        luhn = _luhn_valid_many([numbers[i] for i in candidates])
+        if len(candidates) == len(cards):
+            return luhn
+        mask = [False] * len(cards)
+        for index, valid in zip(candidates, luhn):
+            mask[index] = valid
+        return mask
 
-    def process_payment(self, order, payment_method, payment_details):
+    @timed("payment_process_seconds", help="PaymentProcessing.process_payment duration")
+    def process_payment(self, order, payment_method, payment_details, idempotency_key=None):
         """
         Processes the payment for an order, validating the payment method and interacting with the payment gateway.
         
@@ -70,16 +371,35 @@ class PaymentProcessing:
             order (dict): The order details, including total amount.
             payment_method (str): The selected payment method.
             payment_details (dict): The details required for the payment method.
+            idempotency_key (str, optional): A client-chosen key. Repeats with the same order and key return the
+                                             first outcome without charging again. Needs an order_id, and a
+                                             repeat must be for the same amount, method and payment details.
         
         Returns:
             str: A message indicating whether the payment was successful or failed.
         """
+        if idempotency_key is None:
+            return self._process_payment(order, payment_method, payment_details)
+
+        try:
+            key, fingerprint = _idempotency_request(order, payment_method, payment_details, idempotency_key)
+            return self.idempotency_cache.get_or_run(
+                key,
+                lambda: self._process_payment(order, payment_method, payment_details, f"{key[0]}:{key[1]}"),
+                cacheable=_is_final_outcome,
+                fingerprint=fingerprint,
+            )
+        except IdempotencyKeyError as e:
+            return f"Error: {e}"
+
+    def _process_payment(self, order, payment_method, payment_details, gateway_key=None):
         try:
             # Validate the payment method and details.
             self.validate_payment_method(payment_method, payment_details)
             
-            # Simulate interaction with the payment gateway.
-            payment_response = self.mock_payment_gateway(payment_method, payment_details, order["total_amount"])
+            # Charge through the configured gateway client (or the mock gateway).
+            payment_response = self.charge_gateway(payment_method, payment_details, order["total_amount"],
+                                                   gateway_key)
 
             # Return the appropriate message based on the payment gateway's response.
             if payment_response["status"] == "success":
@@ -91,6 +411,103 @@ class PaymentProcessing:
             # Catch and return any validation or processing errors.
             return f"Error: {str(e)}"
 
+    def charge_gateway(self, method, details, amount, idempotency_key=None):
+        """
+        Sends the charge through the gateway for the payment method, guarded by its circuit breaker.
+        Every attempt carries the same idempotency key, so the gateway charges at most once while errors are
+        retried with jittered backoff (as long as the retry budget allows). The charge fails over to the next
+        gateway listed in `failover` only if it never reached the first one: another gateway cannot know
+        the key.
+        
+        Args:
+            method (str): The payment method (e.g., 'credit_card').
+            details (dict): The payment details (e.g., card number).
+            amount (float): The amount to be charged.
+            idempotency_key (str, optional): Forwarded to the gateway client. A fresh key is generated if None.
+        
+        Returns:
+            dict: The gateway response, indicating success or failure.
+        
+        Raises:
+            GatewayUnavailableError: If every candidate gateway has an open circuit breaker.
+            Exception: The last gateway error if every attempt failed.
+        """
+        if idempotency_key is None:
+            idempotency_key = uuid.uuid4().hex
+        self.retry_policy.record_request()
+        last_error = None
+
+        for gateway in [method] + self.failover.get(method, []):
+            breaker = self.breakers[gateway]
+            attempt = 0
+            maybe_sent = False
+            while breaker.allow_request():
+                start = self._clock()
+                try:
+                    response = self._call_gateway(gateway, method, details, amount, idempotency_key)
+                except Exception as e:
+                    elapsed = self._clock() - start
+                    self.latency_histograms[gateway].observe(elapsed)
+                    breaker.record_failure(elapsed)
+                    last_error = e
+                    maybe_sent = maybe_sent or not isinstance(e, ChargeNotSentError)
+                    attempt += 1
+                    if attempt >= self.retry_policy.max_attempts or not self.retry_policy.try_acquire_retry():
+                        break
+                    self.retry_policy.wait(attempt - 1)
+                    continue
+
+                elapsed = self._clock() - start
+                self.latency_histograms[gateway].observe(elapsed)
+                breaker.record_success(elapsed)
+                return response
+
+            if maybe_sent:
+                # A timeout or dropped connection may still have charged this gateway
+                break
+            if last_error is None:
+                last_error = GatewayUnavailableError(f"Payment gateway {gateway} is unavailable")
+
+        raise last_error
+
+    def _call_gateway(self, gateway, method, details, amount, idempotency_key):
+        # Use the client configured for the gateway, or the mock gateway if none is set.
+        client = self.gateway_clients.get(gateway)
+        if client is None:
+            return self.mock_payment_gateway(method, details, amount)
+        return client.charge(method, details, amount, idempotency_key=idempotency_key)
+
+    def gateway_health(self):
+        """
+        Returns breaker state, latency histogram and pool metrics for every gateway, plus the retry budget.
+        
+        Returns:
+            dict: Monitoring data keyed by gateway name, with the retry budget under 'retry_budget'.
+        """
+        health = {}
+        pools = self.pool_metrics()
+        for gateway in self.available_gateways:
+            histogram = self.latency_histograms[gateway]
+            health[gateway] = {
+                "breaker": self.breakers[gateway].snapshot(),
+                "latency": histogram.snapshot(),
+                "p50": histogram.percentile(0.5),
+                "p99": histogram.percentile(0.99),
+                "pool": pools.get(gateway),
+            }
+        health["retry_budget"] = self.retry_policy.snapshot()
+        return health
+
+    def pool_metrics(self):
+        """
+        Returns connection-pool utilization for every gateway that has a pooled client.
+        
+        Returns:
+            dict: Pool metrics keyed by gateway name.
+        """
+        return {gateway: client.metrics() for gateway, client in self.gateway_clients.items()
+                if hasattr(client, "metrics")}
+
     def mock_payment_gateway(self, method, details, amount):
         """
         Simulates the interaction with a payment gateway for processing payments.
@@ -111,77 +528,266 @@ class PaymentProcessing:
         return {"status": "success", "transaction_id": "abc123"}
 
 
-# Unit tests for PaymentProcessing class
-class TestPaymentProcessing(unittest.TestCase):
+# Async gateway interface
+class AsyncPaymentGateway(abc.ABC):
     """
-    Unit tests for the PaymentProcessing class to ensure payment validation and processing work correctly.
+    Interface for payment gateways that can be awaited, so many checkouts can be in flight at once.
     """
-    def setUp(self):
+    @abc.abstractmethod
+    async def charge(self, method, details, amount):
         """
-        Sets up the test environment by creating an instance of PaymentProcessing.
+        Charges the given amount using the payment method and details.
+        
+        Args:
+            method (str): The payment method (e.g., 'credit_card').
+            details (dict): The payment details (e.g., card number).
+            amount (float): The amount to be charged.
+        
+        Returns:
+            dict: The gateway response, with a 'status' of 'success' or 'failure'.
         """
-        self.payment_processing = PaymentProcessing()
+        raise NotImplementedError
 
-    def test_validate_payment_method_success(self):
-        """
-        Test case for successful validation of a valid payment method ('credit_card') with valid details.
-        """
-        payment_details = {"card_number": "1234567812345678", "expiry_date": "12/25", "cvv": "123"}
-        result = self.payment_processing.validate_payment_method("credit_card", payment_details)
-        self.assertTrue(result)
 
-    def test_validate_payment_method_invalid_gateway(self):
+class LocalPaymentGateway(AsyncPaymentGateway):
+    """
+    A local stand-in gateway with a configurable round-trip latency, used for tests and throughput benchmarks.
+    It answers exactly like PaymentProcessing.mock_payment_gateway.
+    
+    Attributes:
+        latency (float): Simulated round-trip time in seconds.
+        declined_cards (set): Card numbers that the gateway declines.
+        calls (int): Number of charges the gateway has received.
+    """
+    def __init__(self, latency=0.2, declined_cards=("1111222233334444",)):
         """
-        Test case for validation failure due to an unsupported payment method ('bitcoin').
+        Initializes the stand-in gateway.
+        
+        Args:
+            latency (float): Simulated round-trip time in seconds.
+            declined_cards (iterable): Card numbers that should be declined.
         """
-        payment_details = {"card_number": "1234567812345678", "expiry_date": "12/25", "cvv": "123"}
-        with self.assertRaises(ValueError) as context:
-            self.payment_processing.validate_payment_method("bitcoin", payment_details)
-        self.assertEqual(str(context.exception), "Invalid payment method")
+        self.latency = latency
+        self.declined_cards = set(declined_cards)
+        self.calls = 0
 
-    def test_validate_credit_card_invalid_details(self):
+    async def charge(self, method, details, amount):
         """
-        Test case for validation failure due to invalid credit card details (invalid card number and CVV).
+        Simulates a gateway round-trip by sleeping for the configured latency.
         """
-        payment_details = {"card_number": "1234", "expiry_date": "12/25", "cvv": "12"}  # Invalid card number and CVV.
-        result = self.payment_processing.validate_credit_card(payment_details)
-        self.assertFalse(result)
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+
+        # Simulate card decline for the configured card numbers.
+        if method == "credit_card" and details.get("card_number") in self.declined_cards:
+            return {"status": "failure", "message": "Card declined"}
 
-    def test_process_payment_success(self):
+        return {"status": "success", "transaction_id": uuid.uuid4().hex[:12]}
+
+
+# AsyncPaymentProcessing Class
+class AsyncPaymentProcessing(PaymentProcessing):
+    """
+    An asyncio variant of PaymentProcessing. Validation is shared with the synchronous class, while the gateway
+    call is awaited with bounded concurrency and a per-call timeout.
+    
+    The call goes straight to `gateway`: it bypasses the circuit breakers, retries, failover, latency histograms
+    and payment_process_seconds metric of the synchronous charge_gateway path. A timeout is reported as an error
+    and not retried.
+    
+    Attributes:
+        gateway (AsyncPaymentGateway): The gateway used to charge payments.
+        max_concurrency (int): Maximum number of gateway calls in flight at once.
+        timeout (float): Default per-call timeout in seconds.
+    """
+    def __init__(self, gateway=None, max_concurrency=100, timeout=5.0):
         """
-        Test case for successful payment processing using the 'credit_card' method with valid details.
+        Initializes the async payment processor.
+        
+        Args:
+            gateway (AsyncPaymentGateway, optional): The gateway to use. Defaults to a zero-latency LocalPaymentGateway.
+            max_concurrency (int): Maximum number of gateway calls in flight at once.
+            timeout (float): Default per-call timeout in seconds.
         """
-        order = {"total_amount": 100.00}
-        payment_details = {"card_number": "1234567812345678", "expiry_date": "12/25", "cvv": "123"}
+        super().__init__()
+        self.gateway = gateway if gateway is not None else LocalPaymentGateway(latency=0)
+        self._inflight = {}  # (order_id, idempotency_key) -> (fingerprint, asyncio.Task)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self._semaphore = None
+        self._semaphore_loop = None
 
-        # Use mock to simulate a successful payment response from the gateway.
-        with mock.patch.object(self.payment_processing, 'mock_payment_gateway', return_value={"status": "success"}):
-            result = self.payment_processing.process_payment(order, "credit_card", payment_details)
-            self.assertEqual(result, "Payment successful, Order confirmed")
+    def _get_semaphore(self):
+        # A semaphore belongs to one event loop, so create a fresh one whenever the running loop changes.
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
 
-    def test_process_payment_failure(self):
+    async def process_payment(self, order, payment_method, payment_details, timeout=None, idempotency_key=None):
         """
-        Test case for payment failure due to a declined credit card.
+        Processes the payment for an order without blocking the event loop.
+        
+        Args:
+            order (dict): The order details, including total amount.
+            payment_method (str): The selected payment method.
+            payment_details (dict): The details required for the payment method.
+            timeout (float, optional): Per-call timeout in seconds, overriding the default.
+            idempotency_key (str, optional): A client-chosen key. Repeats with the same order and key return the
+                                             first outcome without charging again. Needs an order_id, and a
+                                             repeat must be for the same amount, method and payment details.
+        
+        Returns:
+            str: A message indicating whether the payment was successful or failed.
+        
+        Raises:
+            asyncio.CancelledError: If the calling task is cancelled while waiting on the gateway.
         """
-        order = {"total_amount": 100.00}
-        payment_details = {"card_number": "1111222233334444", "expiry_date": "12/25", "cvv": "123"}  # Simulate a declined card.
+        if idempotency_key is None:
+            return await self._process_payment_async(order, payment_method, payment_details, timeout)
+
+        try:
+            key, fingerprint = _idempotency_request(order, payment_method, payment_details, idempotency_key)
+            result = self.idempotency_cache.lookup(key, fingerprint)
+            if result is not None:
+                return result
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                _check_fingerprint(inflight[0], fingerprint)
+        except IdempotencyKeyError as e:
+            return f"Error: {e}"
+
+        if inflight is None:
+            task = asyncio.ensure_future(self._process_payment_async(order, payment_method, payment_details, timeout))
+            self._inflight[key] = (fingerprint, task)
+            self.idempotency_cache.misses += 1
+            task.add_done_callback(lambda done: self._finish_inflight(key, fingerprint, done))
+        else:
+            task = inflight[1]
+            self.idempotency_cache.hits += 1
+
+        # Shield the shared call so one cancelled duplicate does not cancel it for the others.
+        return await asyncio.shield(task)
 
-        # Use mock to simulate a failed payment response from the gateway.
-        with mock.patch.object(self.payment_processing, 'mock_payment_gateway', return_value={"status": "failure"}):
-            result = self.payment_processing.process_payment(order, "credit_card", payment_details)
-            self.assertEqual(result, "Payment failed, please try again")
+    def _finish_inflight(self, key, fingerprint, task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None and _is_final_outcome(task.result()):
+            self.idempotency_cache.store(key, task.result(), fingerprint)
+
+    async def _process_payment_async(self, order, payment_method, payment_details, timeout):
+        try:
+            # Validate the payment method and details before taking a concurrency slot.
+            self.validate_payment_method(payment_method, payment_details)
+
+            async with self._get_semaphore():
+                payment_response = await asyncio.wait_for(
+                    self.gateway.charge(payment_method, payment_details, order["total_amount"]),
+                    timeout if timeout is not None else self.timeout,
+                )
+
+            if payment_response["status"] == "success":
+                return "Payment successful, Order confirmed"
+            else:
+                return "Payment failed, please try again"
+
+        except asyncio.TimeoutError:
+            return "Error: Payment gateway timed out"
+        except Exception as e:
+            # Cancellation is not an Exception, so it still propagates to the caller.
+            return f"Error: {str(e)}"
 
-    def test_process_payment_invalid_method(self):
+    async def process_payments(self, payments):
         """
-        Test case for payment processing failure due to an invalid payment method ('bitcoin').
+        Processes many payments concurrently.
+        
+        Args:
+            payments (list): A list of (order, payment_method, payment_details) tuples.
+        
+        Returns:
+            list: The result message for each payment, in the same order.
         """
-        order = {"total_amount": 100.00}
-        payment_details = {"card_number": "1234567812345678", "expiry_date": "12/25", "cvv": "123"}
+        return await asyncio.gather(*(self.process_payment(*payment) for payment in payments))
+
+
+def benchmark_async_throughput(payments=1000, latency=0.05, max_concurrency=100):
+    """
+    Measures checkout throughput against a LocalPaymentGateway with the given latency.
+    
+    Args:
+        payments (int): Number of payments to process.
+        latency (float): Simulated gateway round-trip time in seconds.
+        max_concurrency (int): Maximum number of gateway calls in flight at once.
+    
+    Returns:
+        dict: Elapsed time, payments per second, and the throughput a sequential loop would reach.
+    """
+    processor = AsyncPaymentProcessing(LocalPaymentGateway(latency=latency), max_concurrency=max_concurrency)
+    details = {"card_number": "4111111111111111", "expiry_date": "12/35", "cvv": "123"}
+    batch = [({"total_amount": 10.0}, "credit_card", details) for _ in range(payments)]
+
+    start = time.perf_counter()
+    asyncio.run(processor.process_payments(batch))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "payments": payments,
+        "latency": latency,
+        "max_concurrency": max_concurrency,
+        "elapsed": elapsed,
+        "payments_per_second": payments / elapsed if elapsed else float("inf"),
+        "sequential_payments_per_second": 1 / latency if latency else float("inf"),
+    }
+
+
+
+def benchmark_batch_validation(cards=100000):
+    """
+    Compares validate_credit_cards_batch with a per-card loop that checks each digit in Python.
+    
+    Args:
+        cards (int): Number of synthetic card records to validate.
+    
+    Returns:
+        dict: Elapsed time and cards per second for both approaches.
+    """
+    def naive(details, current_month):
+        card_number, cvv = details["card_number"], details["cvv"]
+        if len(card_number) != 16 or len(cvv) != 3 or not card_number.isdigit() or not cvv.isdigit():
+            return False
+        expiry = _parse_expiry(details["expiry_date"])
+        if expiry is None or expiry < current_month:
+            return False
+        total = 0
+        for i, c in enumerate(reversed(card_number)):
+            d = int(c)
+            if i % 2:
+                d = d * 2 - 9 if d > 4 else d * 2
+            total += d
+        return total % 10 == 0
+
+    base = ["4111111111111111", "1234567812345678", "4242424242424242", "5555555555554444"]
+    records = [{"card_number": base[i % 4], "expiry_date": "%02d/%02d" % (i % 12 + 1, 20 + i % 15), "cvv": "123"}
+               for i in range(cards)]
+    today = date.today()
+    processing = PaymentProcessing()
 
-        # No need for mocking, the method will raise an error directly.
-        result = self.payment_processing.process_payment(order, "bitcoin", payment_details)
-        self.assertIn("Error: Invalid payment method", result)
+    start = time.perf_counter()
+    batch_mask = processing.validate_credit_cards_batch(records, today=today)
+    batch_elapsed = time.perf_counter() - start
 
+    start = time.perf_counter()
+    loop_mask = [naive(record, (today.year, today.month)) for record in records]
+    loop_elapsed = time.perf_counter() - start
 
-if __name__ == "__main__":
-    unittest.main()  # Run the unit tests.
+    if batch_mask != loop_mask:
+        # A fast but wrong validator must not be reported as a speed-up (and -O would strip an assert)
+        mismatches = sum(a != b for a, b in zip(batch_mask, loop_mask)) + abs(len(batch_mask) - len(loop_mask))
+        raise RuntimeError(f"Batch validation disagrees with the per-card loop on {mismatches} cards")
+    return {
+        "cards": cards,
+        "batch_elapsed": batch_elapsed,
+        "batch_cards_per_second": cards / batch_elapsed if batch_elapsed else float("inf"),
+        "loop_elapsed": loop_elapsed,
+        "loop_cards_per_second": cards / loop_elapsed if loop_elapsed else float("inf"),
+    }
@@ -0,0 +1,201 @@
+"""Opt-in profiling of slow top-level operations.
+
+Wrapped operations (checkout, order filtering, search, persistence) are traced while they run. A trace is
+kept only if the operation took longer than the threshold, and the last `capacity` kept traces stay in a
+ring buffer for later inspection. Two modes exist:
+
+- "sample" (default): a background thread records the operation's call stack every `interval` seconds.
+  The overhead is low enough to leave on in production.
+- "cprofile": a deterministic cProfile trace per operation. More detail, noticeably slower.
+
+Nothing is traced until enable() is called.
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from functools import wraps
+
+
+class _Operation:
+    def __init__(self, name, start):
+        self.name = name
+        self.start = start
+        self.samples = Counter()
+        self.profiler = None
+
+
+class SlowOperationProfiler:
+    """
+    Captures a trace of every operation slower than `threshold` seconds, keeping the last `capacity`.
+
+    Nested wrapped operations on one thread are traced as part of the outermost one.
+    """
+
+    def __init__(self, threshold=0.5, capacity=20, mode="sample", interval=0.005):
+        if mode not in ("sample", "cprofile"):
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        self.threshold = threshold
+        self.mode = mode
+        self.interval = interval
+        self.traces = deque(maxlen=capacity)
+        self._local = threading.local()
+        self._active = {}  # thread id -> _Operation, sampled by the sampler thread
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = False
+        self._sampler = None
+
+    @contextmanager
+    def profile(self, name):
+        local = self._local
+        if getattr(local, "depth", 0):
+            local.depth += 1
+            try:
+                yield
+            finally:
+                local.depth -= 1
+            return
+
+        local.depth = 1
+        operation = _Operation(name, time.perf_counter())
+        thread_id = threading.get_ident()
+        if self.mode == "cprofile":
+            import cProfile  # with pstats, only loaded once cProfile mode is in use
+
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                operation.profiler = profiler
+            except ValueError:
+                pass  # Python 3.12+ allows one active profiler per process; this one is only timed
+        else:
+            with self._lock:
+                self._active[thread_id] = operation
+            self._ensure_sampler()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - operation.start
+            local.depth = 0
+            if operation.profiler is not None:
+                operation.profiler.disable()
+            else:
+                with self._lock:
+                    self._active.pop(thread_id, None)
+            if elapsed >= self.threshold:
+                self.traces.append(self._trace(operation, elapsed))
+
+    def recent(self):
+        """Kept traces, oldest first."""
+        return list(self.traces)
+
+    def close(self):
+        # Set under the lock so the sampler cannot clear the wakeup after seeing _stopped unset
+        with self._lock:
+            self._stopped = True
+            self._wakeup.set()
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    def _trace(self, operation, elapsed):
+        trace = {"name": operation.name, "elapsed": elapsed, "finished_at": time.time(), "mode": self.mode,
+                 "thread": threading.current_thread().name}
+        if operation.profiler is not None:
+            import io
+            import pstats
+
+            out = io.StringIO()
+            pstats.Stats(operation.profiler, stream=out).sort_stats("cumulative").print_stats(25)
+            trace["report"] = out.getvalue()
+        else:
+            trace["samples"] = sum(operation.samples.values())
+            trace["report"] = "\n".join(f"{count:6d}  {stack}" for stack, count in operation.samples.most_common(20))
+        return trace
+
+    def _ensure_sampler(self):
+        self._wakeup.set()
+        if self._sampler is None:
+            with self._lock:
+                if self._sampler is None:
+                    self._sampler = threading.Thread(target=self._sample_loop, name="slow-op-sampler", daemon=True)
+                    self._sampler.start()
+
+    def _sample_loop(self):
+        while not self._stopped:
+            with self._lock:
+                if self._stopped:
+                    return
+                active = list(self._active.items())
+                if not active:
+                    # Sleep until an operation starts, so an idle process pays nothing
+                    self._wakeup.clear()
+            if not active:
+                self._wakeup.wait()
+                continue
+            frames = sys._current_frames()
+            for thread_id, operation in active:
+                frame = frames.get(thread_id)
+                if frame is not None:
+                    operation.samples[_collapse(frame)] += 1
+            del frames
+            time.sleep(self.interval)
+
+
+def _collapse(frame):
+    # Outermost call first, in the folded-stack format flame graph tools read
+    parts = []
+    while frame is not None:
+        code = frame.f_code
+        parts.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+        frame = frame.f_back
+    return ";".join(reversed(parts))
+
+
+def format_trace(trace):
+    header = f"{trace['name']} took {trace['elapsed'] * 1000:.1f} ms ({trace['mode']}, {trace['thread']})"
+    return f"{header}\n{trace['report']}"
+
+
+PROFILER = None
+
+
+def enable(threshold=0.5, capacity=20, mode="sample", interval=0.005):
+    """Start keeping traces of wrapped operations slower than `threshold` seconds."""
+    global PROFILER
+    disable()
+    PROFILER = SlowOperationProfiler(threshold, capacity, mode, interval)
+    return PROFILER
+
+
+def disable():
+    global PROFILER
+    if PROFILER is not None:
+        PROFILER.close()
+        PROFILER = None
+
+
+def active():
+    """The enabled SlowOperationProfiler, or None."""
+    return PROFILER
+
+
+def profiled(name):
+    """Decorator marking a top-level operation for the slow-operation profiler."""
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            profiler = PROFILER
+            if profiler is None:
+                return function(*args, **kwargs)
+            with profiler.profile(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+if os.environ.get("APP_PROFILE_SLOW"):
+    enable(float(os.environ["APP_PROFILE_SLOW"]))
@@ -0,0 +1,230 @@
+"""Restaurant recommendations from co-occurrence of favorites and ordered-from restaurants across users.
+
+The tables are built offline in one batch pass (see build_recommendations or `python Recommendations.py build`).
+Online lookups are then plain index hits into precomputed top-N lists.
+"""
+import argparse
+import heapq
+import json
+import math
+import os
+import random
+import time
+from array import array
+from collections import Counter
+
+from Restaurant_Browsing import generate_restaurants
+from User_Store import USERS_FILE, load_users
+
+TOP_N = 10
+RECOMMENDATIONS_FILE = "recommendations.json"
+
+
+def user_baskets(users):
+    """Yield (email, restaurant names) per user: their favorites plus every restaurant they ordered from."""
+    for email, record in users.items():
+        names = set(record.get("favorites", []))
+        names.update(o["restaurant"] for o in record.get("orders", []) if o.get("restaurant"))
+        if names:
+            yield email, names
+
+
+def _score(basket, similar):
+    # Sum neighbour similarities over the user's restaurants, skipping ones they already have
+    scores = {}
+    for item in basket:
+        for other, similarity in similar[item]:
+            if other not in basket:
+                scores[other] = scores.get(other, 0.0) + similarity
+    return scores
+
+
+class RecommendationTable:
+    """
+    Precomputed top-N tables.
+
+    `similar[i]` lists (restaurant id, cosine similarity) pairs for restaurant i, best first. Per-user
+    recommendations are stored flat in an int array, `top_n` ids per user row, padded with -1.
+    """
+
+    def __init__(self, restaurants, similar, user_index, user_rows, top_n=TOP_N):
+        self.restaurants = restaurants
+        self.similar = similar
+        self.user_index = user_index
+        self.user_rows = user_rows
+        self.top_n = top_n
+        self._ids = {name: i for i, name in enumerate(restaurants)}
+
+    def __len__(self):
+        return len(self.user_index)
+
+    def similar_restaurants(self, name):
+        restaurant_id = self._ids.get(name)
+        if restaurant_id is None:
+            return []
+        return [self.restaurants[other] for other, _ in self.similar[restaurant_id]]
+
+    def for_user(self, email):
+        row = self.user_index.get(email)
+        if row is None:
+            return []
+        start = row * self.top_n
+        return [self.restaurants[i] for i in self.user_rows[start:start + self.top_n] if i >= 0]
+
+    def for_restaurants(self, names):
+        """Online fallback for users who joined after the last build: merges the tables of their restaurants."""
+        basket = {self._ids[name] for name in names if name in self._ids}
+        scores = _score(basket, self.similar)
+        return [self.restaurants[i] for i in heapq.nlargest(self.top_n, scores, key=scores.get)]
+
+    def save(self, path=RECOMMENDATIONS_FILE):
+        users = {email: list(self.user_rows[row * self.top_n:(row + 1) * self.top_n])
+                 for email, row in self.user_index.items()}
+        data = {"top_n": self.top_n, "restaurants": self.restaurants,
+                "similar": [[[other, round(s, 4)] for other, s in pairs] for pairs in self.similar],
+                "users": users}
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=RECOMMENDATIONS_FILE):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        top_n = data["top_n"]
+        user_index = {}
+        user_rows = array("i")
+        for row, (email, ids) in enumerate(data["users"].items()):
+            user_index[email] = row
+            user_rows.extend(ids)
+        similar = [[(other, s) for other, s in pairs] for pairs in data["similar"]]
+        return cls(data["restaurants"], similar, user_index, user_rows, top_n)
+
+
+def build_from_baskets(baskets, restaurants=None, top_n=TOP_N, min_count=2):
+    """
+    Batch build over (email, restaurant names) pairs.
+
+    Co-occurrence is counted with one Counter.update per (user, restaurant), which runs in C over the
+    whole basket. Pairs seen fewer than `min_count` times are dropped as noise.
+    """
+    ids = {name: i for i, name in enumerate(restaurants or [])}
+    names = list(restaurants or [])
+    emails = []
+    encoded = []
+    for email, basket in baskets:
+        row = []
+        for name in basket:
+            restaurant_id = ids.get(name)
+            if restaurant_id is None:
+                restaurant_id = ids[name] = len(names)
+                names.append(name)
+            row.append(restaurant_id)
+        emails.append(email)
+        encoded.append(tuple(row))
+    return _build(names, emails, encoded, top_n, min_count)
+
+
+def _build(names, emails, baskets, top_n, min_count):
+    co = [Counter() for _ in names]
+    for basket in baskets:
+        for item in basket:
+            co[item].update(basket)
+    # co[i][i] is the number of users with restaurant i
+    freq = [counts[i] for i, counts in enumerate(co)]
+
+    similar = []
+    for item, counts in enumerate(co):
+        candidates = ((c / math.sqrt(freq[item] * freq[other]), other)
+                      for other, c in counts.items() if other != item and c >= min_count)
+        similar.append([(other, s) for s, other in heapq.nlargest(top_n, candidates)])
+
+    user_index = {}
+    user_rows = array("i", [-1]) * (len(baskets) * top_n)
+    # Many users share a history (one favourite is common), so rows are computed once per distinct basket
+    computed = {}
+    for row, (email, basket) in enumerate(zip(emails, baskets)):
+        user_index[email] = row
+        key = basket[0] if len(basket) == 1 else frozenset(basket)
+        best = computed.get(key)
+        if best is None:
+            if len(basket) == 1:
+                best = array("i", [other for other, _ in similar[basket[0]]])
+            else:
+                scores = _score(key, similar)
+                best = array("i", sorted(scores, key=scores.get, reverse=True)[:top_n])
+            computed[key] = best
+        user_rows[row * top_n:row * top_n + len(best)] = best
+    return RecommendationTable(names, similar, user_index, user_rows, top_n)
+
+
+def build_recommendations(users, restaurants=None, top_n=TOP_N, min_count=2):
+    """Build the tables from a users mapping (users.json or a ShardedUserStore)."""
+    return build_from_baskets(user_baskets(users), restaurants, top_n, min_count)
+
+
+def generate_baskets(users, restaurants, seed=0):
+    """
+    Synthetic user histories as (email, restaurant ids), for benchmarks.
+
+    Each user mostly picks restaurants of one favourite cuisine, so co-occurrence has real structure.
+    """
+    rng = random.Random(seed)
+    by_cuisine = {}
+    for i, restaurant in enumerate(restaurants):
+        by_cuisine.setdefault(restaurant["cuisine"], []).append(i)
+    cuisines = list(by_cuisine)
+    everything = range(len(restaurants))
+    for n in range(users):
+        pool = by_cuisine[rng.choice(cuisines)]
+        size = rng.randint(1, 8)
+        basket = {rng.choice(pool) if rng.random() < 0.8 else rng.choice(everything) for _ in range(size)}
+        yield f"user{n}@example.com", tuple(basket)
+
+
+def benchmark_build(users=1_000_000, restaurants=2000, top_n=TOP_N, seed=0):
+    """Time each phase of a batch build over `users` synthetic users."""
+    catalog = generate_restaurants(restaurants, seed=seed)
+    names = [r["name"] for r in catalog]
+
+    start = time.perf_counter()
+    emails, baskets = zip(*generate_baskets(users, catalog, seed=seed))
+    generated = time.perf_counter()
+    table = _build(names, emails, baskets, top_n, min_count=2)
+    built = time.perf_counter()
+
+    sample = emails[::max(1, users // 10000)]
+    for email in sample:
+        table.for_user(email)
+    looked_up = time.perf_counter()
+    return {"users": users, "restaurants": restaurants, "generate_seconds": generated - start,
+            "build_seconds": built - generated, "users_per_second": users / (built - generated),
+            "lookup_microseconds": (looked_up - built) / len(sample) * 1e6}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build restaurant recommendation tables offline.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="build tables from a users file")
+    build.add_argument("--users-file", default=USERS_FILE)
+    build.add_argument("--output", default=RECOMMENDATIONS_FILE)
+    build.add_argument("--top-n", type=int, default=TOP_N)
+    bench = sub.add_parser("benchmark", help="time a build over synthetic users")
+    bench.add_argument("--users", type=int, default=1_000_000)
+    bench.add_argument("--restaurants", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        table = build_recommendations(load_users(args.users_file), top_n=args.top_n)
+        table.save(args.output)
+        print(f"{len(table)} users, {len(table.restaurants)} restaurants -> {args.output}")
+    else:
+        result = benchmark_build(args.users, args.restaurants)
+        print(f"{result['users']} users: generated in {result['generate_seconds']:.1f}s, "
+              f"built in {result['build_seconds']:.1f}s ({result['users_per_second']:.0f} users/s), "
+              f"lookup {result['lookup_microseconds']:.2f} us")
+
+
+if __name__ == "__main__":
+    main()
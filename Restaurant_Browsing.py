@@ -1,3 +1,12 @@
+import bisect
+import itertools
+import random
+import threading
+
+from Metrics import timed
+from Profiling import profiled
+
+
 class RestaurantBrowsing:
     """
     A class for browsing restaurants in a database based on various criteria like cuisine type, location, and rating.
@@ -15,6 +24,7 @@ class RestaurantBrowsing:
         """
         self.database = database
 
+    @timed("restaurant_search_seconds", {"by": "cuisine"})
     def search_by_cuisine(self, cuisine_type):
         """
         Search for restaurants based on their cuisine type.
@@ -25,9 +35,9 @@ class RestaurantBrowsing:
         Returns:
             list: A list of restaurants that match the given cuisine type.
         """
-        return [restaurant for restaurant in self.database.get_restaurants() 
-                if restaurant['cuisine'].lower() == cuisine_type.lower()]
+        return self.database.get_by_positions(self.database.positions_by_cuisine(cuisine_type))
 
+    @timed("restaurant_search_seconds", {"by": "location"})
     def search_by_location(self, location):
         """
         Search for restaurants based on their location.
@@ -38,9 +48,9 @@ class RestaurantBrowsing:
         Returns:
             list: A list of restaurants that are located in the specified area.
         """
-        return [restaurant for restaurant in self.database.get_restaurants() 
-                if restaurant['location'].lower() == location.lower()]
+        return self.database.get_by_positions(self.database.positions_by_location(location))
 
+    @timed("restaurant_search_seconds", {"by": "rating"})
     def search_by_rating(self, min_rating):
         """
         Search for restaurants based on their minimum rating.
@@ -51,9 +61,10 @@ class RestaurantBrowsing:
         Returns:
             list: A list of restaurants that have a rating greater than or equal to the specified rating.
         """
-        return [restaurant for restaurant in self.database.get_restaurants() 
-                if restaurant['rating'] >= min_rating]
+        return self.database.get_by_positions(self.database.positions_by_rating(min_rating))
 
+    @profiled("search_by_filters")
+    @timed("restaurant_search_seconds", {"by": "filters"})
     def search_by_filters(self, cuisine_type=None, location=None, min_rating=None):
         """
         Search for restaurants based on multiple filters: cuisine type, location, and/or rating.
@@ -66,21 +77,39 @@ class RestaurantBrowsing:
         Returns:
             list: A list of restaurants that match all specified filters.
         """
-        results = self.database.get_restaurants()  # Start with all restaurants
+        if not (cuisine_type or location or min_rating):
+            return self.database.get_restaurants()  # No filters: all restaurants
+        return self.database.get_by_positions(self.search_positions(cuisine_type, location, min_rating))
 
+    @timed("restaurant_search_seconds", {"by": "positions"})
+    def search_positions(self, cuisine_type=None, location=None, min_rating=None):
+        """
+        Like search_by_filters, but return the matching positions instead of the restaurants.
+        
+        A result view can keep just the positions and fetch the restaurants it shows, a page at a time,
+        with database.get_by_positions.
+        
+        Returns:
+            Sequence: Matching positions in database order; a range over every restaurant if no filter is given.
+        """
+        matches = []  # One index lookup per filter
         if cuisine_type:
-            results = [restaurant for restaurant in results 
-                       if restaurant['cuisine'].lower() == cuisine_type.lower()]
-
+            matches.append(self.database.positions_by_cuisine(cuisine_type))
         if location:
-            results = [restaurant for restaurant in results 
-                       if restaurant['location'].lower() == location.lower()]
-
+            matches.append(self.database.positions_by_location(location))
         if min_rating:
-            results = [restaurant for restaurant in results 
-                       if restaurant['rating'] >= min_rating]
+            matches.append(self.database.positions_by_rating(min_rating))
 
-        return results
+        if not matches:
+            return range(len(self.database.restaurants))
+
+        # Intersect starting from the most selective filter, keeping database order.
+        matches.sort(key=len)
+        positions = list(matches[0])  # a copy: the index lists grow as restaurants are added
+        for other in matches[1:]:
+            other = set(other)
+            positions = [position for position in positions if position in other]
+        return positions
 
 
 class RestaurantDatabase:
@@ -90,12 +119,24 @@ class RestaurantDatabase:
     Attributes:
         restaurants (list): A list of dictionaries, where each dictionary represents a restaurant with
                             fields like name, cuisine, location, rating, price range, and delivery status.
+        PRIOR_WEIGHT (int): How many reviews the listed rating counts as when averaging in customer reviews.
     """
 
-    def __init__(self):
+    PRIOR_WEIGHT = 5
+
+    def __init__(self, restaurants=None):
         """
-        Initialize the RestaurantDatabase with a predefined set of restaurant data.
+        Initialize the RestaurantDatabase with a predefined set of restaurant data and build its search indexes.
+        
+        Args:
+            restaurants (list, optional): Restaurant dictionaries to use instead of the predefined set.
         """
+        self._lock = threading.Lock()
+        if restaurants is not None:
+            self.restaurants = list(restaurants)
+            self.build_indexes()
+            return
+
         self.restaurants = [
             {"name": "Italian Bistro", "cuisine": "Italian", "location": "Downtown", "rating": 4.5, 
              "price_range": "$$", "delivery": True},
@@ -108,6 +149,37 @@ class RestaurantDatabase:
             {"name": "Pizza Palace", "cuisine": "Italian", "location": "Uptown", "rating": 3.9, 
              "price_range": "$$", "delivery": True}
         ]
+        self.build_indexes()
+
+    def build_indexes(self):
+        """
+        Build the cuisine, location and rating indexes over the restaurant list.
+        Call again after replacing or editing `restaurants` directly.
+        """
+        self._name_index = {}
+        self._cuisine_index = {}
+        self._location_index = {}
+        for position, restaurant in enumerate(self.restaurants):
+            self._name_index.setdefault(restaurant['name'], position)
+            self._cuisine_index.setdefault(restaurant['cuisine'].lower(), []).append(position)
+            self._location_index.setdefault(restaurant['location'].lower(), []).append(position)
+        # (rating, position) pairs sorted by rating, for range lookups with bisect.
+        self._rating_index = sorted((restaurant['rating'], position)
+                                    for position, restaurant in enumerate(self.restaurants))
+
+    def add_restaurant(self, restaurant):
+        """
+        Add a restaurant and update the indexes in place.
+        
+        Args:
+            restaurant (dict): The restaurant information.
+        """
+        position = len(self.restaurants)
+        self.restaurants.append(restaurant)
+        self._name_index.setdefault(restaurant['name'], position)
+        self._cuisine_index.setdefault(restaurant['cuisine'].lower(), []).append(position)
+        self._location_index.setdefault(restaurant['location'].lower(), []).append(position)
+        bisect.insort(self._rating_index, (restaurant['rating'], position))
 
     def get_restaurants(self):
         """
@@ -118,87 +190,243 @@ class RestaurantDatabase:
         """
         return self.restaurants
 
+    def get_by_name(self, name):
+        """
+        Retrieve a restaurant by its exact name.
+        
+        Returns:
+            dict or None: The restaurant, or None if there is no restaurant with that name.
+        """
+        position = self._name_index.get(name)
+        return None if position is None else self.restaurants[position]
 
-class RestaurantSearch:
-    """
-    A class that interfaces with RestaurantBrowsing to perform restaurant searches based on user input.
-    
-    Attributes:
-        browsing (RestaurantBrowsing): An instance of RestaurantBrowsing used to perform searches.
-    """
-
-    def __init__(self, browsing):
+    def record_review(self, name, rating, previous_rating=None):
         """
-        Initialize the RestaurantSearch with a reference to a RestaurantBrowsing instance.
+        Fold one customer review into a restaurant's rating in O(1), and move it in the rating index.
+        
+        The restaurant keeps a running review count and sum. Its rating becomes a Bayesian average
+        that treats the listed rating ("base_rating") as PRIOR_WEIGHT reviews, so a handful of reviews
+        cannot swing a restaurant to either extreme.
         
         Args:
-            browsing (RestaurantBrowsing): An instance of the RestaurantBrowsing class.
+            name (str): The restaurant name.
+            rating (int): The new review's star rating.
+            previous_rating (int, optional): The rating this review replaces, if it is an edit.
+        
+        Returns:
+            float or None: The restaurant's new rating, or None if the restaurant is unknown.
         """
-        self.browsing = browsing
+        position = self._name_index.get(name)
+        if position is None:
+            return None
+        with self._lock:
+            restaurant = self.restaurants[position]
+            base = restaurant.setdefault('base_rating', restaurant['rating'])
+            count = restaurant.get('review_count', 0)
+            total = restaurant.get('review_sum', 0)
+            if previous_rating is None or count == 0:
+                # An edit of a review that was never counted (no reviews yet) is counted as a new one
+                count += 1
+                total += rating
+            else:
+                total += rating - previous_rating
+            restaurant['review_count'] = count
+            restaurant['review_sum'] = total
 
-    def search_restaurants(self, cuisine=None, location=None, rating=None):
+            old_rating = restaurant['rating']
+            new_rating = round((self.PRIOR_WEIGHT * base + total) / (self.PRIOR_WEIGHT + count), 2)
+            if new_rating != old_rating:
+                index = bisect.bisect_left(self._rating_index, (old_rating, position))
+                del self._rating_index[index]
+                bisect.insort(self._rating_index, (new_rating, position))
+                restaurant['rating'] = new_rating
+        return new_rating
+
+    def load_reviews(self, users):
         """
-        Search for restaurants using multiple optional filters: cuisine, location, and rating.
+        Rebuild every restaurant's review count, sum and rating from stored user records, e.g. at startup.
         
         Args:
-            cuisine (str, optional): The type of cuisine to filter by.
-            location (str, optional): The location to filter by.
-            rating (float, optional): The minimum rating to filter by.
+            users (Mapping): User records by email (users.json content or a ShardedUserStore).
         
         Returns:
-            list: A list of restaurants that match the provided search criteria.
+            int: The number of reviews counted.
         """
-        results = self.browsing.search_by_filters(cuisine_type=cuisine, location=location, min_rating=rating)
-        return results
+        aggregates = {}
+        for record in users.values():
+            for order_id, review in record.get("reviews", {}).items():
+                name = review.get("restaurant")
+                if name is None:
+                    # Reviews written before they recorded the restaurant: take it from the order
+                    order = next((o for o in record.get("orders", []) if o.get("order_id") == order_id), None)
+                    name = order.get("restaurant") if order else None
+                if name is not None and isinstance(review.get("rating"), int):
+                    count, total = aggregates.get(name, (0, 0))
+                    aggregates[name] = (count + 1, total + review["rating"])
 
+        with self._lock:
+            for restaurant in self.restaurants:
+                base = restaurant.setdefault('base_rating', restaurant['rating'])
+                count, total = aggregates.get(restaurant['name'], (0, 0))
+                restaurant['review_count'] = count
+                restaurant['review_sum'] = total
+                restaurant['rating'] = round((self.PRIOR_WEIGHT * base + total) / (self.PRIOR_WEIGHT + count), 2)
+            self._rating_index = sorted((restaurant['rating'], position)
+                                        for position, restaurant in enumerate(self.restaurants))
+        return sum(count for count, _ in aggregates.values())
 
-# Unit tests for RestaurantBrowsing class
-import unittest
+    def get_by_positions(self, positions):
+        """
+        Retrieve restaurants by their positions in the restaurant list.
+        
+        Args:
+            positions (list): Positions in ascending order.
+        
+        Returns:
+            list: The restaurants at those positions.
+        """
+        restaurants = self.restaurants
+        return [restaurants[position] for position in positions]
 
-class TestRestaurantBrowsing(unittest.TestCase):
-    """
-    Unit tests for the RestaurantBrowsing class, testing various search functionalities.
-    """
+    def positions_by_cuisine(self, cuisine_type):
+        """
+        Return the positions of restaurants with the given cuisine (case-insensitive), in database order.
+        """
+        return self._cuisine_index.get(cuisine_type.lower(), [])
+
+    def cuisines(self):
+        """
+        Return every indexed cuisine, lowercased.
+        """
+        return list(self._cuisine_index)
 
-    def setUp(self):
+    def positions_by_cuisines(self, cuisines):
         """
-        Set up the test case by initializing a RestaurantDatabase and RestaurantBrowsing instance.
+        Return the positions of restaurants with any of the given lowercased cuisines, in database order.
         """
-        self.database = RestaurantDatabase()
-        self.browsing = RestaurantBrowsing(self.database)
+        lists = [self._cuisine_index.get(cuisine, []) for cuisine in cuisines]
+        if len(lists) == 1:
+            return list(lists[0])
+        # Each list is already sorted, so this sort is a merge of a few runs
+        return sorted(itertools.chain.from_iterable(lists))
 
-    def test_search_by_cuisine(self):
+    def positions_by_location(self, location):
         """
-        Test searching for restaurants by cuisine type.
+        Return the positions of restaurants in the given location (case-insensitive), in database order.
         """
-        results = self.browsing.search_by_cuisine("Italian")
-        self.assertEqual(len(results), 2)  # There should be 2 Italian restaurants
-        self.assertTrue(all([restaurant['cuisine'] == "Italian" for restaurant in results]))  # Check if all returned restaurants are Italian
+        return self._location_index.get(location.lower(), [])
 
-    def test_search_by_location(self):
+    def positions_by_rating(self, min_rating):
         """
-        Test searching for restaurants by location.
+        Return the positions of restaurants rated at least min_rating, in database order.
         """
-        results = self.browsing.search_by_location("Downtown")
-        self.assertEqual(len(results), 2)  # There should be 2 restaurants located Downtown
-        self.assertTrue(all([restaurant['location'] == "Downtown" for restaurant in results]))  # Check if all returned restaurants are in Downtown
+        start = bisect.bisect_left(self._rating_index, (min_rating, -1))
+        return sorted(position for _, position in self._rating_index[start:])
+
+
+def generate_restaurants(count, seed=0):
+    """
+    Generate a synthetic restaurant catalog for benchmarks and load tests.
+    
+    Args:
+        count (int): Number of restaurants to generate.
+        seed (int): Random seed, so the same catalog is produced on every run.
+    
+    Returns:
+        list: Restaurant dictionaries with the same fields as the predefined data.
+    """
+    rng = random.Random(seed)
+    cuisines = ["Italian", "Japanese", "Fast Food", "Mexican", "Indian", "Thai", "Chinese", "French",
+                "Greek", "Korean", "Vietnamese", "Lebanese"]
+    locations = ["Downtown", "Midtown", "Uptown", "Harbor", "Old Town", "University", "Airport", "Riverside"]
+    return [
+        {"name": f"Restaurant {i}", "cuisine": rng.choice(cuisines), "location": rng.choice(locations),
+         "rating": round(rng.uniform(2.5, 5.0), 1), "price_range": rng.choice(["$", "$$", "$$$"]),
+         "delivery": rng.random() < 0.8}
+        for i in range(count)
+    ]
+
+
+class IncrementalSearch:
+    """
+    Cuisine search for search-as-you-type, matching cuisines that start with the typed text.
+    
+    When the new text extends the previous query (typing "it" after "i"), only the cuisines that
+    matched before are checked again. If they all still match, the previous positions are returned as
+    they are, so most keystrokes do no work that grows with the catalog.
+    
+    Attributes:
+        browsing (RestaurantBrowsing): The browsing instance whose database is searched.
+    """
 
-    def test_search_by_rating(self):
+    def __init__(self, browsing):
         """
-        Test searching for restaurants by minimum rating.
+        Initialize the IncrementalSearch with a reference to a RestaurantBrowsing instance.
+        
+        Args:
+            browsing (RestaurantBrowsing): An instance of the RestaurantBrowsing class.
         """
-        results = self.browsing.search_by_rating(4.0)
-        self.assertEqual(len(results), 4)  # There should be 4 restaurants with a rating >= 4.0
-        self.assertTrue(all([restaurant['rating'] >= 4.0 for restaurant in results]))  # Check if all returned restaurants have a rating >= 4.0
+        self.browsing = browsing
+        self._last = None  # (text, restaurant count when searched, matching cuisines, positions)
 
-    def test_search_by_filters(self):
+    def search(self, text):
         """
-        Test searching for restaurants by multiple filters (cuisine type, location, and minimum rating).
+        Find the restaurants whose cuisine starts with text (case-insensitive).
+        
+        Args:
+            text (str): What has been typed so far.
+        
+        Returns:
+            Sequence: Matching positions in database order; every restaurant for empty text.
         """
-        results = self.browsing.search_by_filters(cuisine_type="Italian", location="Downtown", min_rating=4.0)
-        self.assertEqual(len(results), 1)  # Only one restaurant should match all the filters
-        self.assertEqual(results[0]['name'], "Italian Bistro")  # The result should be "Italian Bistro"
+        text = text.strip().lower()
+        if not text:
+            return self.browsing.search_positions()
+        database = self.browsing.database
+        count = len(database.restaurants)
+        last = self._last  # read once: superseded searches may still be finishing on other threads
+        if last is not None and text.startswith(last[0]) and last[1] == count:
+            _, _, last_cuisines, last_positions = last
+            cuisines = [cuisine for cuisine in last_cuisines if cuisine.startswith(text)]
+            if cuisines == last_cuisines:
+                positions = last_positions  # nothing dropped out
+            else:
+                positions = database.positions_by_cuisines(cuisines)
+        else:
+            cuisines = [cuisine for cuisine in database.cuisines() if cuisine.startswith(text)]
+            positions = database.positions_by_cuisines(cuisines)
+        self._last = (text, count, cuisines, positions)
+        return positions
 
 
-if __name__ == '__main__':
-    unittest.main()
+class RestaurantSearch:
+    """
+    A class that interfaces with RestaurantBrowsing to perform restaurant searches based on user input.
+    
+    Attributes:
+        browsing (RestaurantBrowsing): An instance of RestaurantBrowsing used to perform searches.
+    """
+
+    def __init__(self, browsing):
+        """
+        Initialize the RestaurantSearch with a reference to a RestaurantBrowsing instance.
+        
+        Args:
+            browsing (RestaurantBrowsing): An instance of the RestaurantBrowsing class.
+        """
+        self.browsing = browsing
+
+    def search_restaurants(self, cuisine=None, location=None, rating=None):
+        """
+        Search for restaurants using multiple optional filters: cuisine, location, and rating.
+        
+        Args:
+            cuisine (str, optional): The type of cuisine to filter by.
+            location (str, optional): The location to filter by.
+            rating (float, optional): The minimum rating to filter by.
+        
+        Returns:
+            list: A list of restaurants that match the provided search criteria.
+        """
+        results = self.browsing.search_by_filters(cuisine_type=cuisine, location=location, min_rating=rating)
+        return results
@@ -0,0 +1,165 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+
+from Order_Placement import Cart, UserProfile
+from User_Store import _ensure_user_schema
+
+
+class Session:
+    def __init__(self, token, email, profile, expires_at):
+        self.token = token
+        self.email = email
+        self.profile = profile
+        self.cart = Cart()
+        self.expires_at = expires_at
+        self.events = None  # an Order_Events.Subscription, while a client is listening for order events
+
+
+class SessionStore:
+    """Login sessions keyed by an opaque token, with sliding expiry and a size bound.
+
+    Each successful lookup pushes the expiry out by `ttl` and marks the session most recently
+    used. When `max_sessions` is reached the least recently used session is evicted. All
+    sessions of one user share one cached UserProfile. It is built once from the user record
+    and holds the user's lock, but it does not re-hydrate on every call, so authenticated requests
+    never re-read the record. This assumes that profile is the only writer of the record's profile
+    fields.
+
+    Expired sessions are purged from the request path: the first create() or get() after every
+    `purge_interval` seconds drops them, so abandoned sessions do not pin profiles until eviction.
+    """
+
+    def __init__(self, registration, ttl=1800.0, max_sessions=10000, clock=time.monotonic, review_listener=None,
+                 purge_interval=60.0, event_bus=None):
+        self.registration = registration
+        self.review_listener = review_listener  # handed to every cached profile
+        self.event_bus = event_bus              # likewise
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.clock = clock
+        self.purge_interval = purge_interval
+        self._next_purge = clock() + purge_interval
+        self._sessions = OrderedDict()  # token -> Session, least recently used first
+        self._profiles = {}             # email -> (UserProfile, number of live sessions)
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def create(self, email):
+        """Start a session for an already authenticated user and return its token."""
+        token = secrets.token_urlsafe(24)
+        now = self.clock()
+        with self._lock:
+            self._maybe_purge(now)
+            while len(self._sessions) >= self.max_sessions:
+                _, oldest = self._sessions.popitem(last=False)
+                self._release_profile(oldest.email)
+                self.evictions += 1
+            session = Session(token, email, self._acquire_profile(email), now + self.ttl)
+            self._sessions[token] = session
+        return token
+
+    def login(self, email, password):
+        """verify_login, then create; returns the token or None."""
+        if not self.registration.verify_login(email, password):
+            return None
+        return self.create(email)
+
+    def get(self, token):
+        """The live Session for `token` (refreshing its expiry), or None."""
+        if not token:
+            return None
+        now = self.clock()
+        with self._lock:
+            self._maybe_purge(now)
+            session = self._sessions.get(token)
+            if session is None:
+                return None
+            if session.expires_at <= now:
+                self._drop(token)
+                return None
+            session.expires_at = now + self.ttl
+            self._sessions.move_to_end(token)
+            return session
+
+    def revoke(self, token):
+        with self._lock:
+            if token in self._sessions:
+                self._drop(token)
+
+    def revoke_user(self, email):
+        with self._lock:
+            for token in [t for t, s in self._sessions.items() if s.email == email]:
+                self._drop(token)
+
+    def events_for(self, session):
+        """
+        The session's subscription to its user's order events, created on first use; None without an event bus.
+
+        It lives until the session ends. Its block_timeout is 0, because nothing guarantees a client keeps
+        polling: when the queue is full, the oldest event is dropped and counted in `dropped`.
+        """
+        with self._lock:
+            if session.events is None and self.event_bus is not None and session.token in self._sessions:
+                session.events = self.event_bus.subscribe(session.email, block_timeout=0)
+            return session.events
+
+    def purge_expired(self):
+        with self._lock:
+            return self._purge_locked(self.clock())
+
+    def _maybe_purge(self, now):
+        if now >= self._next_purge:
+            self._purge_locked(now)
+
+    def _purge_locked(self, now):
+        # Sessions are ordered by last use, and expiry slides with use, so expired ones sit at the front
+        self._next_purge = now + self.purge_interval
+        removed = 0
+        while self._sessions:
+            token, session = next(iter(self._sessions.items()))
+            if session.expires_at > now:
+                break
+            self._drop(token)
+            removed += 1
+        return removed
+
+    def _drop(self, token):
+        session = self._sessions.pop(token)
+        if session.events is not None:
+            session.events.close()
+        self._release_profile(session.email)
+
+    def _acquire_profile(self, email):
+        cached = self._profiles.get(email)
+        if cached is not None:
+            profile, count = cached
+            self._profiles[email] = (profile, count + 1)
+            return profile
+
+        lock = self.registration.lock_for(email)
+        with lock:
+            user_record = self.registration.users[email]
+            _ensure_user_schema(user_record)
+        profile = UserProfile(
+            delivery_address=user_record.get("delivery_address", "123 Main St"),
+            email=email,
+            store=user_record,
+            lock=lock,
+            rehydrate=False,
+            review_listener=self.review_listener,
+            event_bus=self.event_bus,
+        )
+        self._profiles[email] = (profile, 1)
+        return profile
+
+    def _release_profile(self, email):
+        profile, count = self._profiles[email]
+        if count > 1:
+            self._profiles[email] = (profile, count - 1)
+        else:
+            del self._profiles[email]
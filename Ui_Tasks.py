@@ -0,0 +1,121 @@
+"""Runs slow UI work (searches, payments, password hashing, saves) off the Tk event loop.
+
+Tk is not thread-safe, so workers never touch widgets. When a task finishes, its future goes on a queue, and
+the Tk thread drains that queue from an after() poll. The poll only runs while tasks are outstanding.
+A task submitted under a `key` supersedes the previous task with the same key. The older task is cancelled
+if it has not started yet, and its result is dropped if it has, so a stale search never overwrites a newer one.
+"""
+import queue
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Task:
+    """Handle for one submitted call. cancel() drops its result; it cannot stop a call already running."""
+
+    def __init__(self, key, on_done=None, on_error=None):
+        self.key = key
+        self.on_done = on_done
+        self.on_error = on_error
+        self.future = None
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+
+
+class TaskRunner:
+    """
+    A thread pool whose results are delivered back on the Tk thread.
+
+    Everything except the work itself runs on the Tk thread: submit(), cancel() and the callbacks.
+
+    Attributes:
+        pending (int): Submitted tasks that have not been delivered or discarded yet.
+        on_busy (callable): Called with True when the first task starts and False when the last one ends,
+            for an in-progress indicator.
+    """
+
+    def __init__(self, after, max_workers=4, poll_ms=20, on_busy=None):
+        self._after = after  # widget.after, or a fake in tests
+        self.poll_ms = poll_ms
+        self.on_busy = on_busy
+        self.pending = 0
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ui-task")
+        self._finished = queue.SimpleQueue()
+        self._latest = {}  # key -> newest Task submitted under it
+        self._polling = False
+        self._closed = False
+
+    def submit(self, function, *args, on_done=None, on_error=None, key=None):
+        """
+        Run function(*args) on a worker, then on_done(result) or on_error(exception) on the Tk thread.
+
+        Without on_error a failure's traceback is printed, as Tk does for a failing callback.
+        """
+        if self._closed:
+            raise RuntimeError("TaskRunner is closed")
+        if key is not None:
+            self.cancel(key)
+        task = Task(key, on_done, on_error)
+        if key is not None:
+            self._latest[key] = task
+        self._set_pending(self.pending + 1)
+        task.future = self._pool.submit(function, *args)
+        # Also fires, straight away, for a future cancelled before it ran, so `pending` always comes back down
+        task.future.add_done_callback(lambda future: self._finished.put(task))
+        if not self._polling:
+            self._polling = True
+            self._after(self.poll_ms, self._poll)
+        return task
+
+    def cancel(self, key):
+        """Supersede the outstanding task submitted under `key`, if any."""
+        task = self._latest.pop(key, None)
+        if task is not None:
+            task.cancel()
+
+    def close(self):
+        """Drop every outstanding task and stop the workers; calls already running finish in the background."""
+        self._closed = True
+        for key in list(self._latest):
+            self.cancel(key)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _set_pending(self, pending):
+        was_busy, self.pending = self.pending > 0, pending
+        if self.on_busy is not None and was_busy != (pending > 0):
+            self.on_busy(pending > 0)
+
+    def _poll(self):
+        while True:
+            try:
+                task = self._finished.get_nowait()
+            except queue.Empty:
+                break
+            self._set_pending(self.pending - 1)
+            self._deliver(task)
+        if self.pending and not self._closed:
+            self._after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def _deliver(self, task):
+        if task.key is not None and self._latest.get(task.key) is task:
+            del self._latest[task.key]
+        if task.cancelled or self._closed or task.future.cancelled():
+            return
+        error = task.future.exception()
+        try:
+            if error is None:
+                if task.on_done is not None:
+                    task.on_done(task.future.result())
+            elif task.on_error is not None:
+                task.on_error(error)
+            else:
+                traceback.print_exception(type(error), error, error.__traceback__)
+        except Exception:
+            # A failing callback must not stop delivery of the other finished tasks
+            traceback.print_exc()
@@ -1,18 +1,85 @@
+import hashlib
+import heapq
+import hmac
+import json
+import secrets
 import re
-import unittest
+import threading
+import time
+
+from Password_Hashing import PasswordHasher
+from User_Store import _copy_record, read_user_rows, save_users
+
+EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+
+class LockStripes:
+    """A fixed set of locks that keys hash onto, so different users rarely share a lock."""
+    def __init__(self, count=64):
+        self._locks = [threading.RLock() for _ in range(count)]
+
+    def lock_for(self, key):
+        return self._locks[hash(key) % len(self._locks)]
+
+
+class OutboxMailer:
+    """Appends each confirmation as a JSON line {"email", "token", "sent_at"} to a file a mail relay picks up."""
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, email, token):
+        line = json.dumps({"email": email, "token": token, "sent_at": time.time()})
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
 
 class UserRegistration:
-    def __init__(self):
+    CONFIRMATION_TTL = 24 * 3600
+
+    def __init__(self, lock_stripes=64, hasher=None, mailer=None, confirmation_ttl=CONFIRMATION_TTL,
+                 clock=time.time):
         # users[email] schema:
         # {
-        #   "password": str,
+        #   "password_hash": {"algorithm", work factor, "salt", "hash"}  (older files: "password": str)
         #   "confirmed": bool,
         #   "delivery_address": str,
         #   "favorites": list[str],
         #   "orders": list[dict],
-        #   "reviews": dict[str, dict]
+        #   "reviews": dict[str, dict],
+        #   "confirmation": {"token_hash", "expires_at"}  (only while unconfirmed)
         # }
         self.users = {}
+        # Check-then-write sequences on one user run under that user's stripe lock
+        self._locks = LockStripes(lock_stripes)
+        # Slow salted hashes; give the hasher a pool_size to run them on worker threads/processes
+        self.hasher = hasher or PasswordHasher()
+
+        # Pending email confirmations. Only the SHA-256 of a token is stored, on the user record and in
+        # the indexes below (rebuilt by restore_confirmations); the raw token goes to mailer(email, token).
+        self.mailer = mailer
+        self.confirmation_ttl = confirmation_ttl
+        self.clock = clock
+        self._tokens = {}         # token hash -> (email, expires_at)
+        self._pending = {}        # email -> token hash of its newest token
+        self._expiry_heap = []    # (expires_at, token hash), soonest first
+        self._tokens_lock = threading.Lock()
+        self._sweeper = None
+        self._sweeper_stop = threading.Event()
+
+    def lock_for(self, email):
+        return self._locks.lock_for(email)
+
+    def snapshot(self):
+        # Consistent copy for persistence: each record is copied under its own lock
+        copy = {}
+        for email in list(self.users):
+            with self.lock_for(email):
+                u = self.users.get(email)
+                if u is None:
+                    continue
+                copy[email] = _copy_record(u)
+        return copy
 
     def _ensure_schema(self, email):
         if email not in self.users:
@@ -31,48 +98,277 @@ class UserRegistration:
             return {"success": False, "error": "Passwords do not match"}
         if not self.is_strong_password(password):
             return {"success": False, "error": "Password is not strong enough"}
+
         if email in self.users:
             return {"success": False, "error": "Email already registered"}
 
-        self.users[email] = {
-            "password": password,
+        # Hash outside the lock, then re-check in case another request registered meanwhile
+        password_hash = self.hasher.hash(password)
+        with self.lock_for(email):
+            if email in self.users:
+                return {"success": False, "error": "Email already registered"}
+
+            self.users[email] = self._new_user(password_hash)
+        self.issue_confirmation(email)
+        if self.mailer is None:
+            return {"success": True, "message": "Registration successful"}
+        return {"success": True, "message": "Registration successful, confirmation email sent"}
+
+    def _new_user(self, password_hash, delivery_address="123 Main St"):
+        return {
+            "password_hash": password_hash,
             "confirmed": False,
-            "delivery_address": "123 Main St",
+            "delivery_address": delivery_address,
             "favorites": [],
             "orders": [],
             "reviews": {},
         }
-        return {"success": True, "message": "Registration successful, confirmation email sent"}
+
+    def bulk_register(self, rows, batch_size=1000):
+        # rows: iterable of (row_number, {"email", "password"[, "delivery_address"]}), consumed as a stream.
+        # Bad rows are reported and skipped; nothing is persisted here (see import_users_file).
+        start = time.perf_counter()
+        known = set(self.users)
+        report = {"success": True, "rows": 0, "imported": 0, "duplicates": 0, "errors": []}
+        batch = []
+
+        for row_number, row in rows:
+            report["rows"] += 1
+            fields = [row.get(key) or "" for key in ("email", "password", "delivery_address")]
+            if not all(isinstance(value, str) for value in fields):
+                # JSON-lines rows carry arbitrary types; a number here must not abort the whole import
+                email = fields[0].strip() if isinstance(fields[0], str) else ""
+                report["errors"].append({"row": row_number, "email": email,
+                                         "error": "email, password and delivery_address must be text"})
+                continue
+            email, password, address = fields
+            email = email.strip()
+            if not self.is_valid_email(email):
+                error = "Invalid email format"
+            elif not self.is_strong_password(password):
+                error = "Password is not strong enough"
+            elif email in known:
+                error = "Email already registered"
+                report["duplicates"] += 1
+            else:
+                known.add(email)
+                batch.append((email, password, address.strip() or "123 Main St"))
+                if len(batch) >= batch_size:
+                    report["imported"] += self._commit_batch(batch)
+                    batch = []
+                continue
+            report["errors"].append({"row": row_number, "email": email, "error": error})
+
+        if batch:
+            report["imported"] += self._commit_batch(batch)
+
+        report["elapsed"] = time.perf_counter() - start
+        report["rows_per_second"] = report["rows"] / report["elapsed"] if report["elapsed"] else 0.0
+        return report
+
+    def _commit_batch(self, batch):
+        hashes = self.hasher.hash_many([password for _, password, _ in batch])
+        inserted = 0
+        for (email, _, address), password_hash in zip(batch, hashes):
+            with self.lock_for(email):
+                # A concurrent register() may have claimed the email while the batch was hashing
+                if email not in self.users:
+                    self.users[email] = self._new_user(password_hash, address)
+                    inserted += 1
+        return inserted
+
+    def import_users_file(self, path, users_file=None, batch_size=1000):
+        # Stream a CSV or JSON-lines file of users, then persist everything in a single write
+        report = self.bulk_register(read_user_rows(path), batch_size=batch_size)
+        if report["imported"]:
+            save_users(self.users, path=users_file)
+        return report
+
+    @staticmethod
+    def _token_hash(token):
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def issue_confirmation(self, email):
+        """Create a confirmation token for `email` (replacing any earlier one) and hand it to the mailer."""
+        token = secrets.token_urlsafe(32)
+        token_hash = self._token_hash(token)
+        expires_at = self.clock() + self.confirmation_ttl
+        with self.lock_for(email):
+            user = self.users.get(email)
+            if user is not None:
+                user["confirmation"] = {"token_hash": token_hash, "expires_at": expires_at}
+        self._index_token(email, token_hash, expires_at)
+        if self.mailer is not None:
+            self.mailer(email, token)
+        return token
+
+    def _index_token(self, email, token_hash, expires_at):
+        with self._tokens_lock:
+            old = self._pending.get(email)
+            if old is not None:
+                self._tokens.pop(old, None)
+            self._tokens[token_hash] = (email, expires_at)
+            self._pending[email] = token_hash
+            heapq.heappush(self._expiry_heap, (expires_at, token_hash))
+
+    def restore_confirmations(self):
+        """Rebuild the token indexes and expiry heap from the loaded user records. Returns the count."""
+        restored = 0
+        for email in list(self.users):
+            with self.lock_for(email):
+                user = self.users.get(email)
+                pending = user.get("confirmation") if user is not None and not user.get("confirmed") else None
+            if pending:
+                self._index_token(email, pending["token_hash"], pending["expires_at"])
+                restored += 1
+        return restored
+
+    def confirm_email(self, token):
+        if not isinstance(token, str) or not token:
+            return {"success": False, "error": "Invalid confirmation token"}
+        token_hash = self._token_hash(token)
+        with self._tokens_lock:
+            entry = self._tokens.get(token_hash)
+            if entry is None:
+                return {"success": False, "error": "Invalid confirmation token"}
+            email, expires_at = entry
+            if expires_at <= self.clock():
+                return {"success": False, "error": "Confirmation token has expired"}
+            del self._tokens[token_hash]
+            self._pending.pop(email, None)
+
+        with self.lock_for(email):
+            user = self.users.get(email)
+            if user is None:
+                return {"success": False, "error": "User not found"}
+            user["confirmed"] = True
+            user.pop("confirmation", None)
+        return {"success": True, "email": email, "message": "Email confirmed"}
+
+    def sweep_expired(self, limit=1000):
+        """Drop up to `limit` expired tokens and delete the accounts that never confirmed.
+
+        Work is driven by the expiry heap, so a sweep only touches tokens that are due. Heap entries
+        for tokens that were confirmed or replaced are discarded as they surface. Returns the purged
+        emails so the caller can persist them.
+        """
+        now = self.clock()
+        purged = []
+        for _ in range(limit):
+            with self._tokens_lock:
+                if not self._expiry_heap or self._expiry_heap[0][0] > now:
+                    break
+                _, token_hash = heapq.heappop(self._expiry_heap)
+                entry = self._tokens.pop(token_hash, None)
+                if entry is None:
+                    continue
+                email = entry[0]
+                if self._pending.get(email) == token_hash:
+                    del self._pending[email]
+
+            with self.lock_for(email):
+                user = self.users.get(email)
+                if user is not None and not user.get("confirmed"):
+                    del self.users[email]
+                    purged.append(email)
+        return purged
+
+    def pending_confirmations(self):
+        with self._tokens_lock:
+            return len(self._tokens)
+
+    def start_sweeper(self, interval=60.0, on_purge=None):
+        """Run sweep_expired every `interval` seconds on a daemon thread; on_purge(emails) persists removals."""
+        if self._sweeper is not None:
+            return
+        self._sweeper_stop.clear()
+
+        def run():
+            while not self._sweeper_stop.wait(interval):
+                purged = self.sweep_expired()
+                if purged and on_purge is not None:
+                    on_purge(purged)
+
+        self._sweeper = threading.Thread(target=run, name="confirmation-sweeper", daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        if self._sweeper is None:
+            return
+        self._sweeper_stop.set()
+        self._sweeper.join()
+        self._sweeper = None
 
     def update_password(self, email, current_password, new_password, confirm_new_password):
         if email not in self.users:
             return {"success": False, "error": "User not found"}
         self._ensure_schema(email)
 
-        if self.users[email]["password"] != current_password:
+        with self.lock_for(email):
+            user = self.users[email]
+            stored, legacy = user.get("password_hash"), user.get("password")
+        if not isinstance(current_password, str) or not self._password_matches(current_password, stored, legacy):
             return {"success": False, "error": "Current password is incorrect"}
         if new_password != confirm_new_password:
             return {"success": False, "error": "Passwords do not match"}
         if not self.is_strong_password(new_password):
             return {"success": False, "error": "Password is not strong enough"}
 
-        self.users[email]["password"] = new_password
+        # Hash outside the lock, then write only if no concurrent update replaced the verified password
+        password_hash = self.hasher.hash(new_password)
+        with self.lock_for(email):
+            user = self.users.get(email)
+            if user is None or user.get("password_hash") is not stored or user.get("password") != legacy:
+                return {"success": False, "error": "Password was changed by another request, try again"}
+            self._set_password_hash(email, password_hash)
         return {"success": True, "message": "Password updated successfully"}
 
+    def _password_matches(self, password, stored, legacy):
+        if stored is not None:
+            return self.hasher.verify(password, stored)
+        # Plaintext record from an older users.json
+        return isinstance(legacy, str) and hmac.compare_digest(legacy.encode("utf-8"), password.encode("utf-8"))
+
+    def verify_login(self, email, password):
+        user = self.users.get(email)
+        if user is None:
+            return self.hasher.verify_dummy(password)
+        if not isinstance(password, str):
+            return False
+
+        with self.lock_for(email):
+            stored = user.get("password_hash")
+            legacy = user.get("password")
+
+        ok = self._password_matches(password, stored, legacy)
+        # A plaintext record, or a hash with outdated parameters, is replaced once the password is known
+        upgrade = ok and (stored is None or self.hasher.needs_rehash(stored))
+
+        if upgrade:
+            self._set_password_hash(email, self.hasher.hash(password))
+        return ok
+
+    def _set_password_hash(self, email, password_hash):
+        with self.lock_for(email):
+            user = self.users[email]
+            user["password_hash"] = password_hash
+            user.pop("password", None)
+
     def update_delivery_address(self, email, new_address):
-        if email not in self.users:
-            return {"success": False, "error": "User not found"}
-        self._ensure_schema(email)
+        with self.lock_for(email):
+            if email not in self.users:
+                return {"success": False, "error": "User not found"}
+            self._ensure_schema(email)
 
-        if not isinstance(new_address, str) or not new_address.strip():
-            return {"success": False, "error": "Delivery address cannot be empty"}
+            if not isinstance(new_address, str) or not new_address.strip():
+                return {"success": False, "error": "Delivery address cannot be empty"}
 
-        self.users[email]["delivery_address"] = new_address.strip()
+            self.users[email]["delivery_address"] = new_address.strip()
         return {"success": True, "message": "Delivery address updated successfully"}
 
     def is_valid_email(self, email):
         # Simple but safer than just '@' check
-        return bool(re.match(r"^[^@\s]+@[^@\s]+\.[^@\s]+$", email or ""))
+        return bool(EMAIL_RE.match(email or ""))
 
     def is_strong_password(self, password):
         return (
@@ -81,57 +377,3 @@ class UserRegistration:
             and any(c.isdigit() for c in password)
             and any(c.isalpha() for c in password)
         )
-
-
-class TestUserRegistration(unittest.TestCase):
-    def setUp(self):
-        self.registration = UserRegistration()
-
-    def test_successful_registration(self):
-        result = self.registration.register("user@example.com", "Password123", "Password123")
-        self.assertTrue(result["success"])
-        self.assertIn("user@example.com", self.registration.users)
-        self.assertIn("delivery_address", self.registration.users["user@example.com"])
-
-    def test_invalid_email(self):
-        result = self.registration.register("userexample.com", "Password123", "Password123")
-        self.assertFalse(result["success"])
-        self.assertEqual(result["error"], "Invalid email format")
-
-    def test_password_mismatch(self):
-        result = self.registration.register("user@example.com", "Password123", "Password321")
-        self.assertFalse(result["success"])
-        self.assertEqual(result["error"], "Passwords do not match")
-
-    def test_weak_password(self):
-        result = self.registration.register("user@example.com", "pass", "pass")
-        self.assertFalse(result["success"])
-        self.assertEqual(result["error"], "Password is not strong enough")
-
-    def test_email_already_registered(self):
-        self.registration.register("user@example.com", "Password123", "Password123")
-        result = self.registration.register("user@example.com", "Password123", "Password123")
-        self.assertFalse(result["success"])
-        self.assertEqual(result["error"], "Email already registered")
-
-    def test_update_password_success(self):
-        self.registration.register("user@example.com", "Password123", "Password123")
-        result = self.registration.update_password("user@example.com", "Password123", "Newpass123", "Newpass123")
-        self.assertTrue(result["success"])
-        self.assertEqual(self.registration.users["user@example.com"]["password"], "Newpass123")
-
-    def test_update_password_wrong_current(self):
-        self.registration.register("user@example.com", "Password123", "Password123")
-        result = self.registration.update_password("user@example.com", "Wrong", "Newpass123", "Newpass123")
-        self.assertFalse(result["success"])
-        self.assertEqual(result["error"], "Current password is incorrect")
-
-    def test_update_delivery_address(self):
-        self.registration.register("user@example.com", "Password123", "Password123")
-        result = self.registration.update_delivery_address("user@example.com", "  456 New Ave  ")
-        self.assertTrue(result["success"])
-        self.assertEqual(self.registration.users["user@example.com"]["delivery_address"], "456 New Ave")
-
-
-if __name__ == "__main__":
-    unittest.main()
@@ -0,0 +1,281 @@
+import csv
+import json
+import os
+import shutil
+import threading
+import uuid
+import zlib
+from collections.abc import MutableMapping
+
+from Metrics import timed
+from Profiling import profiled
+
+USERS_FILE = "users.json"
+SHARDS_DIR = "users_shards"
+MANIFEST_FILE = "shards.json"
+
+
+def _ensure_user_schema(user_dict):
+    user_dict.setdefault("confirmed", False)
+    user_dict.setdefault("delivery_address", "123 Main St")
+    user_dict.setdefault("favorites", [])
+    user_dict.setdefault("orders", [])
+    user_dict.setdefault("reviews", {})
+
+
+def _copy_record(user_dict):
+    # One level deep is enough for json.dump to iterate safely while the live record keeps changing
+    return {k: (list(v) if isinstance(v, list) else dict(v) if isinstance(v, dict) else v)
+            for k, v in user_dict.items()}
+
+
+@profiled("load_users")
+def load_users(path=None):
+    path = path or USERS_FILE
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        users = json.load(f) or {}
+    # Upgrade schema for older saved files
+    for _, u in users.items():
+        if isinstance(u, dict):
+            _ensure_user_schema(u)
+    return users
+
+
+@profiled("save_users")
+@timed("save_users_seconds", help="save_users duration")
+def save_users(users, path=None, email=None):
+    # A sharded store only rewrites the shard holding `email` (or every loaded shard if not given)
+    if isinstance(users, ShardedUserStore):
+        users.save(email)
+        return
+    _write_json(users, path or USERS_FILE)
+
+
+def _write_json(users, path):
+    # Write to a temporary file and swap it in, so readers never see a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(users, f, indent=4)
+    os.replace(tmp_path, path)
+
+
+def read_user_rows(path):
+    """Yield (row_number, row) from a CSV file with a header row, or a JSON-lines file.
+
+    Row numbers count file lines, so the CSV header is line 1.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith((".jsonl", ".ndjson")):
+            for row_number, line in enumerate(f, start=1):
+                if line.strip():
+                    try:
+                        row = json.loads(line)
+                    except ValueError:
+                        row = {}
+                    yield row_number, row if isinstance(row, dict) else {}
+        else:
+            for row_number, row in enumerate(csv.DictReader(f), start=2):
+                yield row_number, row
+
+
+def shard_for(email, shard_count):
+    # crc32 is stable across processes and runs, unlike hash() on str
+    return zlib.crc32(email.encode("utf-8")) % shard_count
+
+
+def _read_manifest(directory):
+    # {"shard_count": N, "layout": subdirectory holding the shard files ("" = the directory itself)}
+    path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    manifest.setdefault("layout", "")
+    return manifest
+
+
+class ShardedUserStore(MutableMapping):
+    """Users partitioned into N JSON files by a stable hash of the email.
+
+    Behaves like the plain users dict, so UserRegistration can use it unchanged. Shards are
+    loaded on first access and saved independently, so one save only rewrites one shard.
+    """
+
+    def __init__(self, directory=SHARDS_DIR, shard_count=8):
+        manifest = _read_manifest(directory)
+        if manifest is not None and manifest["shard_count"] != shard_count:
+            raise ValueError(f"{directory} holds {manifest['shard_count']} shards, not {shard_count}; "
+                             f"run rebalance_shards first")
+        os.makedirs(directory, exist_ok=True)
+        if manifest is None:
+            manifest = {"shard_count": shard_count, "layout": ""}
+            _write_json(manifest, os.path.join(directory, MANIFEST_FILE))
+
+        self.directory = directory
+        self.layout = manifest["layout"]
+        self.shard_count = shard_count
+        self._shards = [None] * shard_count
+        self._locks = [threading.RLock() for _ in range(shard_count)]
+        self._dirty = set()
+
+    def shard_path(self, index):
+        return os.path.join(self.directory, self.layout, f"users-{index:03d}.json")
+
+    def _shard(self, index):
+        shard = self._shards[index]
+        if shard is None:
+            with self._locks[index]:
+                if self._shards[index] is None:
+                    self._shards[index] = load_users(self.shard_path(index))
+                shard = self._shards[index]
+        return shard
+
+    def _shard_of(self, email):
+        return self._shard(shard_for(email, self.shard_count))
+
+    def __getitem__(self, email):
+        return self._shard_of(email)[email]
+
+    def __setitem__(self, email, record):
+        index = shard_for(email, self.shard_count)
+        with self._locks[index]:
+            self._shard(index)[email] = record
+            self._dirty.add(index)
+
+    def __delitem__(self, email):
+        index = shard_for(email, self.shard_count)
+        with self._locks[index]:
+            del self._shard(index)[email]
+            self._dirty.add(index)
+
+    def __contains__(self, email):
+        return email in self._shard_of(email)
+
+    def __iter__(self):
+        for index in range(self.shard_count):
+            yield from list(self._shard(index))
+
+    def __len__(self):
+        return sum(len(self._shard(index)) for index in range(self.shard_count))
+
+    def save(self, email=None):
+        """Persist the shard holding `email`, or every loaded shard when no email is given."""
+        if email is not None:
+            self._save_shard(shard_for(email, self.shard_count))
+            return
+        for index in range(self.shard_count):
+            if self._shards[index] is not None:
+                self._save_shard(index)
+
+    def save_dirty(self):
+        """Persist only shards that gained or lost users since they were last saved."""
+        for index in sorted(self._dirty):
+            self._save_shard(index)
+
+    def _save_shard(self, index):
+        with self._locks[index]:
+            snapshot = {e: _copy_record(u) for e, u in self._shard(index).items()}
+            self._dirty.discard(index)
+            _write_json(snapshot, self.shard_path(index))
+
+
+def open_user_store(users_file=None, shards_dir=None, shard_count=0):
+    """Return the user store the app should use: a ShardedUserStore when shard_count > 0, else a plain dict.
+
+    The shard count may also come from the USERS_SHARDS environment variable.
+    """
+    shard_count = shard_count or int(os.environ.get("USERS_SHARDS", "0") or 0)
+    if shard_count > 0:
+        return ShardedUserStore(shards_dir or SHARDS_DIR, shard_count)
+    return load_users(users_file)
+
+
+def rebalance_shards(directory, new_count):
+    """Offline tool: redistribute every user in `directory` over `new_count` shards.
+
+    The new layout is written to a fresh subdirectory and goes live with a single atomic replace of
+    the manifest, so a crash at any point leaves either the old or the new layout complete.
+    Run it while no app instance is using the directory.
+    """
+    manifest = _read_manifest(directory)
+    if manifest is None:
+        raise ValueError(f"{directory} is not a shard directory")
+    old_count = manifest["shard_count"]
+    old = ShardedUserStore(directory, old_count)
+    users = {email: old[email] for email in old}
+
+    shards = [{} for _ in range(new_count)]
+    for email, record in users.items():
+        shards[shard_for(email, new_count)][email] = record
+
+    layout = f"layout-{new_count}-{uuid.uuid4().hex[:8]}"
+    os.makedirs(os.path.join(directory, layout))
+    for index, shard in enumerate(shards):
+        _write_json(shard, os.path.join(directory, layout, f"users-{index:03d}.json"))
+    _write_json({"shard_count": new_count, "layout": layout}, os.path.join(directory, MANIFEST_FILE))
+
+    # The old layout is unreachable now; removing it is only cleanup
+    if old.layout:
+        shutil.rmtree(os.path.join(directory, old.layout), ignore_errors=True)
+    else:
+        for index in range(old_count):
+            if os.path.exists(old.shard_path(index)):
+                os.remove(old.shard_path(index))
+    return {"users": len(users), "old_shards": old_count, "new_shards": new_count}
+
+
+def split_users_file(users_file, directory, shard_count):
+    """Offline tool: move a single users.json into a new shard directory."""
+    if _read_manifest(directory) is not None:
+        raise ValueError(f"{directory} already holds shards")
+    store = ShardedUserStore(directory, shard_count)
+    for email, record in load_users(users_file).items():
+        store[email] = record
+    store.save()
+    return {"users": len(store), "new_shards": shard_count}
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Maintain the sharded user store (offline).")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rebalance = sub.add_parser("rebalance", help="change the shard count of a shard directory")
+    rebalance.add_argument("directory")
+    rebalance.add_argument("shards", type=int)
+    split = sub.add_parser("split", help="shard a single users.json file")
+    split.add_argument("users_file")
+    split.add_argument("directory")
+    split.add_argument("shards", type=int)
+    bulk = sub.add_parser("import", help="bulk-register users from a CSV or JSON-lines file")
+    bulk.add_argument("source")
+    bulk.add_argument("--users-file", default=USERS_FILE)
+    bulk.add_argument("--shards", type=int, default=0, help="import into this many shard files")
+    bulk.add_argument("--shards-dir", default=SHARDS_DIR)
+    bulk.add_argument("--batch-size", type=int, default=1000)
+    bulk.add_argument("--hash-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args(argv)
+
+    if args.command == "rebalance":
+        print(rebalance_shards(args.directory, args.shards))
+    elif args.command == "split":
+        print(split_users_file(args.users_file, args.directory, args.shards))
+    else:
+        from Password_Hashing import PasswordHasher
+        from User_Registration import UserRegistration
+
+        hasher = PasswordHasher(pool_size=args.hash_workers, use_processes=True)
+        registration = UserRegistration(hasher=hasher)
+        registration.users = open_user_store(args.users_file, args.shards_dir, args.shards)
+        report = registration.import_users_file(args.source, args.users_file, args.batch_size)
+        hasher.shutdown()
+        for error in report["errors"]:
+            print(f"row {error['row']}: {error['email'] or '-'}: {error['error']}")
+        print(f"imported {report['imported']} of {report['rows']} rows "
+              f"({report['rows_per_second']:.0f} rows/s, {len(report['errors'])} errors)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Bookkeeping for a virtual list: a long result list of which only a window of rows is ever rendered.
+
+A result list is held as keys only (restaurant positions, say). Rows are fetched for the visible
+window plus `buffer` rows either side. Each render is diffed against the rows already in the view, so
+scrolling or re-running a search only touches the rows that appear, disappear, move or change. The
+widget applies the returned operations; nothing here imports tkinter.
+"""
+
+
+class VirtualRows:
+    """
+    The keys of a result list, the scroll position, and the rows currently rendered.
+
+    Attributes:
+        keys (Sequence): Every result's key in display order. Keys must be unique and hashable.
+        top (int): Index in `keys` of the first visible row.
+        start (int): Index in `keys` of the first rendered row (top minus the buffer).
+        rendered (dict): key -> row values of the rendered rows, in display order.
+    """
+
+    def __init__(self, fetch, visible=20, buffer=20):
+        self.fetch = fetch  # fetch(keys) -> row values for those keys, in the same order
+        self.visible = visible
+        self.buffer = buffer
+        self.keys = []
+        self.top = 0
+        self.start = 0
+        self.rendered = {}
+
+    def set_keys(self, keys, keep_position=False):
+        """Show a new result list, from the top unless `keep_position`."""
+        self.keys = keys
+        self.scroll_to(self.top if keep_position else 0)
+
+    def scroll_to(self, top):
+        self.top = max(0, min(int(top), len(self.keys) - self.visible))
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.top + rows)
+
+    def fraction(self):
+        """(first, last) visible fractions of the whole list, as a scrollbar's set() takes them."""
+        total = len(self.keys)
+        if not total:
+            return 0.0, 1.0
+        return self.top / total, min(1.0, (self.top + self.visible) / total)
+
+    def render(self):
+        """
+        Fetch the window around `top` and diff it against the rendered rows.
+
+        Returns:
+            dict: "delete" keys to remove; "insert" (index, key, values) to add; "update" (key, values) of
+                kept rows whose values changed; "move" (index, key) of kept rows now at another index.
+                Indexes are within the rendered window, applied in that order.
+        """
+        start = max(0, self.top - self.buffer)
+        window = list(self.keys[start:self.top + self.visible + self.buffer])
+        rows = dict(zip(window, self.fetch(window)))
+
+        old = self.rendered
+        delete = [key for key in old if key not in rows]
+        insert, update = [], []
+        for index, key in enumerate(window):
+            values = rows[key]
+            if key not in old:
+                insert.append((index, key, values))
+            elif old[key] != values:
+                update.append((key, values))
+        # Inserting in index order places every row unless kept rows changed their relative order;
+        # then every row is moved to its index, in index order
+        reordered = [key for key in old if key in rows] != [key for key in window if key in old]
+        move = list(enumerate(window)) if reordered else []
+        self.start = start
+        self.rendered = rows
+        return {"delete": delete, "insert": insert, "update": update, "move": move}
+
+    def row_offset(self):
+        """Rows between the first rendered row and the first visible one, for positioning the view."""
+        return self.top - self.start
@@ -0,0 +1,250 @@
+import http.client
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+import unittest.mock
+
+from Api_Server import ApiServer, ApiService, _free_port, _wait_for_port, create_server, serve_prefork
+from User_Registration import UserRegistration
+from User_Store import load_users
+
+
+class TestApiServer(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.users_file = os.path.join(self.tmpdir.name, "users.json")
+        self.server = ApiServer(("127.0.0.1", 0), ApiService(users_file=self.users_file), max_workers=4)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        self.conn = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+
+    def tearDown(self):
+        self.conn.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmpdir.cleanup()
+
+    def call(self, method, path, body=None, token=None):
+        headers = {"Content-Type": "application/json"}
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        self.conn.request(method, path, body=data, headers=headers)
+        response = self.conn.getresponse()
+        return response.status, json.loads(response.read())
+
+    def register_and_login(self, email="user@example.com"):
+        self.call("POST", "/register", {"email": email, "password": "Password123", "confirm_password": "Password123"})
+        status, payload = self.call("POST", "/login", {"email": email, "password": "Password123"})
+        self.assertEqual(status, 200)
+        return payload["token"]
+
+    def test_search_restaurants(self):
+        status, payload = self.call("GET", "/restaurants?cuisine=Italian&location=Downtown&rating=4.0")
+        self.assertEqual(status, 200)
+        self.assertEqual([r["name"] for r in payload["restaurants"]], ["Italian Bistro"])
+
+    def test_cart_checkout_and_history(self):
+        token = self.register_and_login()
+        self.call("POST", "/cart/items", {"name": "Pizza", "quantity": 2}, token)
+        self.call("POST", "/cart/items", {"name": "Salad", "quantity": 1}, token)
+        self.call("PUT", "/cart/items/Pizza", {"quantity": 3}, token)
+        status, cart = self.call("DELETE", "/cart/items/Salad", token=token)
+        self.assertEqual(cart["items"], [{"name": "Pizza", "quantity": 3, "subtotal": 30.0}])
+
+        status, order = self.call("POST", "/checkout", {}, token)
+        self.assertEqual(status, 200)
+        self.assertTrue(order["order_id"].startswith("ORD-"))
+
+        status, history = self.call("GET", "/orders?status=Placed", token=token)
+        self.assertEqual([o["order_id"] for o in history["orders"]], [order["order_id"]])
+        self.assertEqual(len(load_users(self.users_file)["user@example.com"]["orders"]), 1)
+
+    def test_order_events_long_poll(self):
+        token = self.register_and_login()
+        status, payload = self.call("GET", "/orders/events", token=token)  # subscribes
+        self.assertEqual((status, payload["events"]), (200, []))
+        self.call("POST", "/cart/items", {"name": "Pizza", "quantity": 1}, token)
+        status, order = self.call("POST", "/checkout", {}, token)
+        status, payload = self.call("GET", "/orders/events?timeout=1", token=token)
+        self.assertEqual([(e["order_id"], e["status"]) for e in payload["events"]], [(order["order_id"], "Placed")])
+        self.assertEqual(payload["dropped"], 0)
+        self.assertEqual(self.call("GET", "/orders/events?timeout=nan", token=token)[0], 400)
+        self.assertEqual(self.call("GET", "/orders/events")[0], 401)
+
+    def test_kitchen_status_updates(self):
+        self.server.service.kitchen_token = "kitchen-secret"
+        orders = {}
+        for email in ("a@example.com", "b@example.com"):
+            token = self.register_and_login(email)
+            self.call("POST", "/cart/items", {"name": "Pizza", "quantity": 1}, token)
+            orders[email] = self.call("POST", "/checkout", {}, token)[1]["order_id"]
+        a, b = orders["a@example.com"], orders["b@example.com"]
+        self.call("GET", "/orders/events", token=token)  # b subscribes
+
+        updates = [{"order_id": a, "status": "Preparing"}, {"order_id": b, "status": "Delivered"},
+                   {"order_id": b, "status": "Cancelled"}, {"order_id": "ORD-NONE", "status": "Preparing"}]
+        status, payload = self.call("POST", "/orders/status", {"updates": updates}, "kitchen-secret")
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["updated"], 2)
+        self.assertEqual([r["message"] for r in payload["results"]],
+                         ["Order status updated", "Cannot change a Placed order to Delivered",
+                          "Order status updated", "Order not found"])
+
+        saved = load_users(self.users_file)
+        self.assertEqual(saved["a@example.com"]["orders"][0]["status"], "Preparing")
+        self.assertEqual(saved["b@example.com"]["orders"][0]["status"], "Cancelled")
+        status, events = self.call("GET", "/orders/events?timeout=1", token=token)
+        self.assertEqual([(e["order_id"], e["status"]) for e in events["events"]], [(b, "Cancelled")])
+        status, history = self.call("GET", "/orders", token=token)
+        self.assertEqual(history["orders"][0]["status"], "Cancelled")  # the cached profile sees it too
+
+        self.assertEqual(self.call("POST", "/orders/status", {"updates": updates}, token)[0], 403)
+        self.assertEqual(self.call("POST", "/orders/status", {"updates": []}, "kitchen-secret")[0], 400)
+        self.assertEqual(self.call("POST", "/orders/status", {"updates": ["x"]}, "kitchen-secret")[0], 400)
+
+    def test_review_updates_restaurant_rating(self):
+        token = self.register_and_login()
+        self.call("POST", "/cart/items", {"name": "Pizza", "quantity": 1}, token)
+        status, payload = self.call("POST", "/checkout", {"restaurant": "Nowhere"}, token)
+        self.assertEqual(status, 400)
+        status, order = self.call("POST", "/checkout", {"restaurant": "Pizza Palace"}, token)
+        self.assertEqual(status, 200)
+
+        session = self.server.service.sessions.get(token)
+        session.profile.update_order_statuses([(order["order_id"], "Preparing"), (order["order_id"], "Delivered")])
+        status, payload = self.call("POST", "/reviews", {"order_id": order["order_id"], "rating": 5, "text": "Hot"},
+                                    token)
+        self.assertEqual(status, 200)
+        status, payload = self.call("GET", "/restaurants?cuisine=Italian&rating=4.0")
+        self.assertIn("Pizza Palace", [r["name"] for r in payload["restaurants"]])
+
+        # A restarted service counts the stored review again
+        registration = UserRegistration()
+        registration.users = load_users(self.users_file)
+        restarted = ApiService(registration=registration, users_file=self.users_file)
+        self.assertEqual(restarted.database.get_by_name("Pizza Palace")["rating"], 4.08)
+
+    def test_favorites_and_review_validation(self):
+        token = self.register_and_login()
+        self.call("POST", "/favorites", {"name": "Sushi House"}, token)
+        status, payload = self.call("GET", "/favorites", token=token)
+        self.assertEqual(payload["favorites"], ["Sushi House"])
+        status, payload = self.call("DELETE", "/favorites/Sushi%20House", token=token)
+        self.assertEqual(status, 200)
+
+        status, payload = self.call("POST", "/reviews", {"order_id": "ORD-X", "rating": 5, "text": "Nice"}, token)
+        self.assertEqual(status, 400)
+        self.assertEqual(payload["message"], "Order not found")
+
+    def test_sessions_are_per_token(self):
+        first = self.register_and_login("a@example.com")
+        second = self.register_and_login("b@example.com")
+        self.call("POST", "/cart/items", {"name": "Burger", "quantity": 1}, first)
+        status, cart = self.call("GET", "/cart", token=second)
+        self.assertEqual(cart["items"], [])
+
+        status, payload = self.call("GET", "/cart")
+        self.assertEqual(status, 401)
+
+    def test_confirm_email(self):
+        sent = {}
+        self.server.service.registration.mailer = lambda email, token: sent.update({email: token})
+        self.call("POST", "/register", {"email": "new@example.com", "password": "Password123",
+                                        "confirm_password": "Password123"})
+        status, payload = self.call("POST", "/confirm", {"token": "nope"})
+        self.assertEqual(status, 400)
+        status, payload = self.call("POST", "/confirm", {"token": sent["new@example.com"]})
+        self.assertEqual(status, 200)
+        self.assertTrue(load_users(self.users_file)["new@example.com"]["confirmed"])
+
+    def test_errors(self):
+        status, payload = self.call("POST", "/register", {"email": "bad", "password": "x", "confirm_password": "x"})
+        self.assertEqual(status, 400)
+        self.assertEqual(payload["message"], "Invalid email format")
+        status, payload = self.call("GET", "/nowhere")
+        self.assertEqual(status, 404)
+
+    def test_invalid_content_length(self):
+        for length in ("abc", "-5"):
+            conn = http.client.HTTPConnection("127.0.0.1", self.server.server_address[1], timeout=5)
+            conn.putrequest("POST", "/login")
+            conn.putheader("Content-Length", length)
+            conn.endheaders()
+            response = conn.getresponse()
+            self.assertEqual((response.status, json.loads(response.read())["message"]), (400, "Invalid Content-Length"))
+            conn.close()
+
+    def test_wrong_field_types(self):
+        status, payload = self.call("POST", "/login", {"email": 5, "password": "Password123"})
+        self.assertEqual((status, payload["message"]), (400, "email must be a string"))
+        status, payload = self.call("POST", "/register", {"email": 5, "password": "x", "confirm_password": "x"})
+        self.assertEqual(status, 400)
+        token = self.register_and_login()
+        for body in ({"name": "Pizza", "quantity": True}, {"name": "Pizza", "quantity": "2"}, {"name": ["Pizza"]}):
+            status, _ = self.call("POST", "/cart/items", body, token)
+            self.assertEqual(status, 400)
+        status, _ = self.call("PUT", "/cart/items/Pizza", {"quantity": False}, token)
+        self.assertEqual(status, 400)
+        status, _ = self.call("POST", "/reviews", {"order_id": ["x"], "rating": 5, "text": "Good"}, token)
+        self.assertEqual(status, 400)
+        status, _ = self.call("POST", "/checkout", {"restaurant": 3}, token)
+        self.assertEqual(status, 400)
+
+    def test_unexpected_error_is_500(self):
+        def broken(request):
+            raise KeyError("boom")
+        self.server.service.routes[("GET", "cart")] = broken
+        with unittest.mock.patch("traceback.print_exc"):
+            status, payload = self.call("GET", "/cart")
+        self.assertEqual((status, payload), (500, {"success": False, "message": "Internal server error"}))
+        # The connection is still usable
+        status, _ = self.call("GET", "/restaurants")
+        self.assertEqual(status, 200)
+
+    def test_create_server_hash_workers(self):
+        server = create_server(port=0, users_file=os.path.join(self.tmpdir.name, "other.json"), hash_workers=2)
+        try:
+            registration = server.service.registration
+            self.assertEqual(registration.hasher._pool._max_workers, 2)
+            registration.register("user@example.com", "Password123", "Password123")
+            self.assertTrue(registration.verify_login("user@example.com", "Password123"))
+        finally:
+            server.server_close()
+
+    def test_does_not_import_tkinter(self):
+        out = subprocess.run([sys.executable, "-c", "import sys, Api_Server; print('tkinter' in sys.modules)"],
+                             capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        self.assertEqual(out.stdout.strip(), "False")
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "multi-worker mode needs fork")
+class TestPreforkServer(unittest.TestCase):
+    def test_workers_serve_catalog_only(self):
+        port = _free_port("127.0.0.1")
+        master = multiprocessing.get_context("fork").Process(target=serve_prefork, args=("127.0.0.1", port, 2))
+        master.start()
+        try:
+            _wait_for_port("127.0.0.1", port)
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            for _ in range(3):
+                conn.request("GET", "/restaurants?cuisine=Italian")
+                response = conn.getresponse()
+                self.assertEqual(response.status, 200)
+                self.assertEqual(len(json.loads(response.read())["restaurants"]), 2)
+            conn.request("GET", "/cart")
+            self.assertEqual(conn.getresponse().status, 503)
+            conn.close()
+        finally:
+            master.terminate()
+            master.join()
+        self.assertIsNotNone(master.exitcode)
+
+
+if __name__ == "__main__":
+    unittest.main()
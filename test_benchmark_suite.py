@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from Benchmark_Suite import bench_scale, bench_startup, compare, generate_users, import_times, main
+from Restaurant_Browsing import generate_restaurants
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_generate_users(self):
+        users = generate_users(5, 3, generate_restaurants(10))
+        self.assertEqual(len(users), 5)
+        self.assertTrue(all(len(u["orders"]) == 3 for u in users.values()))
+
+    def test_bench_scale_reports_every_operation(self):
+        results = bench_scale("tiny", 50, 5, 3)
+        self.assertEqual({r["name"] for r in results}, {
+            "search_by_filters", "cart_calculate_total", "confirm_order", "filter_orders", "save_users", "load_users"})
+        self.assertTrue(all(r["seconds_per_op"] > 0 for r in results))
+
+    def test_compare_flags_regressions(self):
+        baseline = {"results": [{"name": "search_by_filters", "scale": "small", "seconds_per_op": 1.0},
+                                {"name": "load_users", "scale": "small", "seconds_per_op": 1.0}]}
+        report = {"results": [{"name": "search_by_filters", "scale": "small", "seconds_per_op": 1.2},
+                              {"name": "load_users", "scale": "small", "seconds_per_op": 1.5},
+                              {"name": "save_users", "scale": "small", "seconds_per_op": 9.0}]}
+        regressions = compare(report, baseline, tolerance=0.25)
+        self.assertEqual([(r["name"], r["ratio"]) for r in regressions], [("load_users", 1.5)])
+
+    def test_main_writes_results_and_baseline(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "results.json")
+            baseline = os.path.join(tmp, "baseline", "baseline.json")
+            self.assertEqual(main(["--scales", "small", "--output", output, "--baseline", baseline,
+                                   "--save-baseline", "--no-startup"]), 0)
+            self.assertTrue(os.path.exists(output))
+            self.assertTrue(os.path.exists(baseline))
+            # A generous tolerance so a noisy machine does not fail the test
+            self.assertEqual(main(["--scales", "small", "--output", output, "--baseline", baseline,
+                                   "--tolerance", "100", "--no-startup"]), 0)
+
+    def test_startup_imports_stay_lean(self):
+        for result in bench_startup(repeat=1):
+            self.assertEqual(result["params"]["forbidden"], [], result["name"])
+            # Typically well under 0.2s; the bound only catches something heavy creeping back in
+            self.assertLess(result["seconds_per_op"], 2.0, result["name"])
+
+    def test_main_does_not_import_tkinter(self):
+        self.assertNotIn("tkinter", import_times("main"))
+
+
+if __name__ == "__main__":
+    unittest.main()
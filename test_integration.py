@@ -44,6 +44,7 @@ class TestIntegrationFlows(unittest.TestCase):
         self.assertFalse(fail["success"])
 
         # Mark delivered and review
+        self.profile.update_order_status(oid, "Preparing")
         self.profile.update_order_status(oid, "Delivered")
         ok = self.profile.add_order_review(oid, 5, "Nice")
         self.assertTrue(ok["success"])
@@ -0,0 +1,30 @@
+import unittest
+
+from Load_Generator import OPERATIONS, LoadGenerator, percentile
+
+
+class TestLoadGenerator(unittest.TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual((percentile(values, 0.5), percentile(values, 0.95), percentile(values, 0.99)), (50, 95, 99))
+        self.assertEqual(percentile([7], 0.99), 7)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_run_drives_every_operation(self):
+        generator = LoadGenerator(arrival_rate=200, concurrency=4, restaurants=200, hash_iterations=1000, seed=1)
+        report = generator.run(duration=0.25)
+        self.assertGreater(report["arrivals"], 0)
+        operations = report["operations"]
+        self.assertEqual(set(operations), set(OPERATIONS))
+        self.assertEqual(operations["session"]["count"], report["arrivals"])
+        self.assertEqual(operations["checkout"]["count"], report["arrivals"])
+        self.assertGreaterEqual(operations["add_to_cart"]["count"], report["arrivals"])
+        for op, row in operations.items():
+            self.assertEqual(row["errors"], 0, op)
+            self.assertLessEqual(row["p50"], row["p95"])
+            self.assertLessEqual(row["p95"], row["p99"])
+        self.assertEqual(sum(r.get("review_count", 0) for r in generator.database.restaurants), report["arrivals"])
+
+
+if __name__ == "__main__":
+    unittest.main()
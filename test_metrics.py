@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+from Api_Server import ApiService
+from Metrics import REGISTRY, count, enable, timed, timer
+from Order_Placement import Cart, OrderPlacement, PaymentMethod, RestaurantMenu, UserProfile
+from Restaurant_Browsing import RestaurantBrowsing, RestaurantDatabase
+from User_Store import save_users
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        REGISTRY.reset()
+        enable()
+
+    def tearDown(self):
+        enable(False)
+        REGISTRY.reset()
+
+    def test_disabled_records_nothing(self):
+        enable(False)
+
+        @timed("noop_seconds")
+        def work():
+            return 42
+
+        self.assertEqual(work(), 42)
+        with timer("noop_block_seconds"):
+            pass
+        count("noop_total")
+        self.assertEqual(REGISTRY.snapshot(), {})
+
+    def test_counter_gauge_histogram(self):
+        count("jobs_total", labels={"kind": "a"})
+        count("jobs_total", 2, labels={"kind": "a"})
+        REGISTRY.gauge("queue_depth").set(7)
+        REGISTRY.gauge("live").set_function(lambda: 3)
+        with timer("block_seconds"):
+            pass
+        snapshot = REGISTRY.snapshot()
+        self.assertEqual(snapshot["jobs_total"][(("kind", "a"),)], 3)
+        self.assertEqual(snapshot["queue_depth"][()], 7)
+        self.assertEqual(snapshot["live"][()], 3)
+        self.assertEqual(snapshot["block_seconds"][()]["count"], 1)
+        with self.assertRaises(ValueError):
+            REGISTRY.gauge("jobs_total")
+
+    def test_prometheus_export(self):
+        count("orders_total", help="Orders placed")
+        REGISTRY.histogram("op_seconds", {"op": 'say "hi"'}, buckets=(0.1, 1.0)).observe(0.5)
+        text = REGISTRY.export_text()
+        self.assertIn("# HELP orders_total Orders placed\n# TYPE orders_total counter\norders_total 1\n", text)
+        self.assertIn('op_seconds_bucket{op="say \\"hi\\"",le="0.1"} 0\n', text)
+        self.assertIn('op_seconds_bucket{op="say \\"hi\\"",le="+Inf"} 1\n', text)
+        self.assertIn('op_seconds_count{op="say \\"hi\\""} 1\n', text)
+
+    def test_hot_paths_are_instrumented(self):
+        RestaurantBrowsing(RestaurantDatabase()).search_by_filters(cuisine_type="Italian")
+        cart = Cart()
+        cart.add_item("Pizza", 10.0, 1)
+        OrderPlacement(cart, UserProfile(store={}), RestaurantMenu(["Pizza"])).confirm_order(PaymentMethod())
+        with tempfile.TemporaryDirectory() as tmp:
+            save_users({}, os.path.join(tmp, "users.json"))
+
+        snapshot = REGISTRY.snapshot()
+        self.assertEqual(snapshot["restaurant_search_seconds"][(("by", "filters"),)]["count"], 1)
+        self.assertEqual(snapshot["cart_operation_seconds"][(("op", "add"),)]["count"], 1)
+        self.assertEqual(snapshot["cart_operation_seconds"][(("op", "clear"),)]["count"], 1)
+        self.assertEqual(snapshot["checkout_seconds"][()]["count"], 1)
+        self.assertEqual(snapshot["orders_placed_total"][()], 1)
+        self.assertGreaterEqual(snapshot["profile_sync_seconds"][()]["count"], 1)
+        self.assertEqual(snapshot["save_users_seconds"][()]["count"], 1)
+
+    def test_api_metrics_endpoint(self):
+        service = ApiService()
+        service.handle("GET", "/restaurants", {"cuisine": "Italian"})
+        status, text = service.handle("GET", "/metrics")
+        self.assertEqual(status, 200)
+        self.assertIn('api_request_seconds_count{method="GET",route="get_restaurants"} 1', text)
+        self.assertIn("api_sessions_active 0", text)
+
+
+if __name__ == "__main__":
+    unittest.main()
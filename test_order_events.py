@@ -0,0 +1,76 @@
+import threading
+import time
+import unittest
+
+from Order_Events import OrderEventBus, order_event
+from Order_Placement import Cart, OrderPlacement, PaymentMethod, RestaurantMenu, UserProfile
+
+
+class TestOrderEventBus(unittest.TestCase):
+    def setUp(self):
+        self.bus = OrderEventBus()
+
+    def event(self, email="a@example.com", order_id="ORD-1", status="Placed", previous=None):
+        return order_event(email, {"order_id": order_id, "status": status}, previous)
+
+    def test_fan_out_is_filtered_by_user(self):
+        mine = self.bus.subscribe("a@example.com")
+        everyone = self.bus.subscribe()
+        other = self.bus.subscribe("b@example.com")
+        self.assertEqual(self.bus.publish(self.event()), 2)
+        self.assertEqual([e["order_id"] for e in mine.drain()], ["ORD-1"])
+        self.assertEqual(len(everyone), 1)
+        self.assertEqual(other.drain(), [])
+
+    def test_full_queue_drops_oldest_without_blocking(self):
+        subscription = self.bus.subscribe("a@example.com", maxsize=2, block_timeout=0)
+        for n in range(5):
+            self.bus.publish(self.event(order_id=f"ORD-{n}"))
+        self.assertEqual(subscription.dropped, 3)
+        self.assertEqual([e["order_id"] for e in subscription.drain()], ["ORD-3", "ORD-4"])
+
+    def test_backpressure_waits_for_the_consumer(self):
+        subscription = self.bus.subscribe("a@example.com", maxsize=1, block_timeout=5)
+        self.bus.publish(self.event(order_id="ORD-1"))
+        received = []
+
+        def consume():
+            time.sleep(0.05)
+            received.append(subscription.get(timeout=5))
+
+        consumer = threading.Thread(target=consume)
+        consumer.start()
+        start = time.monotonic()
+        self.bus.publish(self.event(order_id="ORD-2"))  # blocks until the consumer makes room
+        self.assertGreater(time.monotonic() - start, 0.03)
+        consumer.join()
+        self.assertEqual(subscription.dropped, 0)
+        self.assertEqual(received[0]["order_id"], "ORD-1")
+        self.assertEqual(subscription.get(timeout=0)["order_id"], "ORD-2")
+
+    def test_close_wakes_waiters_and_stops_delivery(self):
+        subscription = self.bus.subscribe("a@example.com")
+        result = []
+        waiter = threading.Thread(target=lambda: result.append(subscription.get(timeout=5)))
+        waiter.start()
+        subscription.close()
+        waiter.join(1)
+        self.assertEqual(result, [None])
+        self.assertEqual(self.bus.publish(self.event()), 0)
+
+    def test_checkout_and_status_updates_publish(self):
+        subscription = self.bus.subscribe("a@example.com")
+        profile = UserProfile(email="a@example.com", event_bus=self.bus)
+        cart = Cart()
+        cart.add_item("Pizza", 10.0, 1)
+        order = OrderPlacement(cart, profile, RestaurantMenu(["Pizza"], restaurant="Pizza Palace")).confirm_order(PaymentMethod())
+        profile.update_order_status(order["order_id"], "Preparing")
+        profile.update_order_status("ORD-missing", "Preparing")
+        events = subscription.drain()
+        self.assertEqual([(e["status"], e["previous_status"]) for e in events], [("Placed", None), ("Preparing", "Placed")])
+        self.assertEqual({e["order_id"] for e in events}, {order["order_id"]})
+        self.assertEqual(events[0]["restaurant"], "Pizza Palace")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+import threading
+import unittest
+from unittest import mock
+
+from Order_Events import OrderEventBus, order_event
+from Order_Placement import (Cart, OrderPlacement, OrderStatusUpdater, PaymentMethod, RestaurantMenu, UserProfile,
+                             transition_error)
+
+
+class TestOrderPlacement(unittest.TestCase):
+    def setUp(self):
+        self.restaurant_menu = RestaurantMenu(available_items=["Burger", "Pizza", "Salad"])
+        self.user_store = {
+            "delivery_address": "123 Main St",
+            "favorites": [],
+            "orders": [],
+            "reviews": {},
+        }
+        self.user_profile = UserProfile(delivery_address="123 Main St", email="user@example.com", store=self.user_store)
+        self.cart = Cart()
+        self.order = OrderPlacement(self.cart, self.user_profile, self.restaurant_menu)
+
+    def test_validate_order_empty_cart(self):
+        result = self.order.validate_order()
+        self.assertFalse(result["success"])
+        self.assertEqual(result["message"], "Cart is empty")
+
+    def test_validate_order_item_not_available(self):
+        self.cart.add_item("Pasta", 15.99, 1)
+        result = self.order.validate_order()
+        self.assertFalse(result["success"])
+        self.assertEqual(result["message"], "Pasta is not available")
+
+    def test_validate_order_success(self):
+        self.cart.add_item("Burger", 8.99, 2)
+        result = self.order.validate_order()
+        self.assertTrue(result["success"])
+        self.assertEqual(result["message"], "Order is valid")
+
+    def test_cart_copy_is_independent(self):
+        self.cart.add_item("Burger", 8.99, 2)
+        copy = self.cart.copy()
+        self.cart.update_item_quantity("Burger", 5)
+        self.cart.add_item("Salad", 4.0, 1)
+        self.assertEqual(copy.view_cart(), [{"name": "Burger", "quantity": 2, "subtotal": 17.98}])
+
+    def test_confirm_order_success_and_history_updated(self):
+        self.cart.add_item("Pizza", 12.99, 1)
+        payment_method = PaymentMethod()
+        result = self.order.confirm_order(payment_method)
+        self.assertTrue(result["success"])
+        self.assertEqual(result["message"], "Order confirmed")
+        self.assertTrue(result["order_id"].startswith("ORD-"))
+        # History updated (and persisted into store)
+        self.assertEqual(len(self.user_profile.orders), 1)
+        self.assertEqual(len(self.user_store["orders"]), 1)
+
+    def test_confirm_order_failed_payment(self):
+        self.cart.add_item("Pizza", 12.99, 1)
+        payment_method = PaymentMethod()
+        with mock.patch.object(payment_method, "process_payment", return_value=False):
+            result = self.order.confirm_order(payment_method)
+            self.assertFalse(result["success"])
+            self.assertEqual(result["message"], "Payment failed")
+
+
+class TestNewFeatures(unittest.TestCase):
+    def setUp(self):
+        self.user_store = {
+            "delivery_address": "123 Main St",
+            "favorites": [],
+            "orders": [],
+            "reviews": {},
+        }
+        self.user_profile = UserProfile(email="user@example.com", store=self.user_store)
+
+    def test_favorites_add_remove(self):
+        r1 = self.user_profile.add_favorite_restaurant("Italian Bistro")
+        self.assertTrue(r1["success"])
+        r2 = self.user_profile.add_favorite_restaurant("Italian Bistro")
+        self.assertFalse(r2["success"])  # duplicate
+        r3 = self.user_profile.remove_favorite_restaurant("Italian Bistro")
+        self.assertTrue(r3["success"])
+
+    def test_order_filtering(self):
+        self.user_profile.add_order_record({"order_id": "O1", "date": "2025-01-01", "status": "Delivered"})
+        self.user_profile.add_order_record({"order_id": "O2", "date": "2025-02-01", "status": "Placed"})
+        delivered = self.user_profile.filter_orders(status="Delivered")
+        self.assertEqual([o["order_id"] for o in delivered], ["O1"])
+        jan_only = self.user_profile.filter_orders(date_from="2025-01-01", date_to="2025-01-31")
+        self.assertEqual([o["order_id"] for o in jan_only], ["O1"])
+
+    def test_review_only_delivered(self):
+        self.user_profile.add_order_record({"order_id": "O1", "date": "2025-01-01", "status": "Placed"})
+        fail = self.user_profile.add_order_review("O1", 5, "Great!")
+        self.assertFalse(fail["success"])
+        skipped = self.user_profile.update_order_status("O1", "Delivered")
+        self.assertEqual(skipped, {"success": False, "message": "Cannot change a Placed order to Delivered"})
+        self.user_profile.update_order_status("O1", "Preparing")
+        self.user_profile.update_order_status("O1", "Delivered")
+        ok = self.user_profile.add_order_review("O1", 5, "Great!")
+        self.assertTrue(ok["success"])
+        self.assertEqual(self.user_profile.get_review("O1")["rating"], 5)
+
+    def test_review_feeds_restaurant_rating(self):
+        reviews = []
+        self.user_profile.review_listener = lambda *args: reviews.append(args)
+        cart = Cart()
+        cart.add_item("Pizza", 10.0, 1)
+        menu = RestaurantMenu(available_items=["Pizza"], restaurant="Pizza Palace")
+        order_id = OrderPlacement(cart, self.user_profile, menu).confirm_order(PaymentMethod())["order_id"]
+        self.assertEqual(self.user_store["orders"][0]["restaurant"], "Pizza Palace")
+
+        self.user_profile.update_order_statuses([(order_id, "Preparing"), (order_id, "Delivered")])
+        self.user_profile.add_order_review(order_id, 4, "Good")
+        self.user_profile.add_order_review(order_id, 2, "Cold on second thought")
+        self.assertEqual(reviews, [("Pizza Palace", 4, None), ("Pizza Palace", 2, 4)])
+        self.assertEqual(self.user_profile.get_review(order_id)["restaurant"], "Pizza Palace")
+
+    def test_concurrent_profiles_do_not_lose_updates(self):
+        lock = threading.RLock()
+        profiles = [UserProfile(email="user@example.com", store=self.user_store, lock=lock) for _ in range(4)]
+
+        def place_orders(profile, worker):
+            for i in range(50):
+                profile.add_order_record({"order_id": f"W{worker}-{i}", "date": "2025-01-01", "status": "Placed"})
+
+        threads = [threading.Thread(target=place_orders, args=(p, n)) for n, p in enumerate(profiles)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(self.user_store["orders"]), 200)
+        self.assertEqual(len(profiles[0].view_order_history()), 200)
+
+
+class TestOrderStatusUpdates(unittest.TestCase):
+    def setUp(self):
+        self.users = {
+            email: {"orders": [{"order_id": f"{prefix}{i}", "status": "Placed"} for i in range(3)]}
+            for email, prefix in (("a@example.com", "A"), ("b@example.com", "B"))
+        }
+        self.bus = OrderEventBus()
+
+    def test_transitions(self):
+        self.assertIsNone(transition_error("Placed", "Preparing"))
+        self.assertIsNone(transition_error("Preparing", "Cancelled"))
+        self.assertEqual(transition_error("Delivered", "Placed"), "Cannot change a Delivered order to Placed")
+        self.assertEqual(transition_error("Placed", "Lost"), "Unknown order status: Lost")
+
+    def test_profile_applies_a_batch_and_saves_once(self):
+        store = self.users["a@example.com"]
+        profile = UserProfile(email="a@example.com", store=store, event_bus=self.bus)
+        subscription = self.bus.subscribe("a@example.com", block_timeout=0)
+        with mock.patch.object(profile, "_sync", wraps=profile._sync) as sync:
+            outcomes = profile.update_order_statuses([("A0", "Preparing"), ("A0", "Delivered"), ("A1", "Delivered"),
+                                                      ("A2", "Cancelled"), ("A2", "Preparing")])
+        self.assertEqual(sync.call_count, 1)
+        self.assertEqual([o["success"] for o in outcomes], [True, True, False, True, False])
+        self.assertEqual([o["status"] for o in store["orders"]], ["Delivered", "Placed", "Cancelled"])
+        self.assertEqual([(e["order_id"], e["previous_status"], e["status"]) for e in subscription.drain()],
+                         [("A0", "Placed", "Preparing"), ("A0", "Preparing", "Delivered"), ("A2", "Placed", "Cancelled")])
+
+    def test_updater_spans_users(self):
+        profile = UserProfile(email="b@example.com", store=self.users["b@example.com"])
+        profile.view_order_history()
+        updater = OrderStatusUpdater(self.users, event_bus=self.bus)
+        everyone = self.bus.subscribe(block_timeout=0)
+        outcomes, changed = updater.update([("B1", "Preparing"), ("A0", "Cancelled"), ("X9", "Preparing"),
+                                            ("A0", "Preparing")])
+        self.assertEqual([(o["order_id"], o["success"]) for o in outcomes],
+                         [("B1", True), ("A0", True), ("X9", False), ("A0", False)])
+        self.assertEqual(outcomes[2]["message"], "Order not found")
+        self.assertEqual(changed, {"a@example.com", "b@example.com"})
+        self.assertEqual([(e["email"], e["order_id"]) for e in everyone.drain()],
+                         [("b@example.com", "B1"), ("a@example.com", "A0")])
+        self.assertEqual(profile.view_order_history()[1]["status"], "Preparing")  # shares the record's orders
+
+        # Orders placed after the index was built reach it through the bus; unknown IDs never rescan the users
+        profile = UserProfile(email="a@example.com", store=self.users["a@example.com"], event_bus=self.bus)
+        cart = Cart()
+        cart.add_item("Pizza", 10.0, 1)
+        placed = OrderPlacement(cart, profile, RestaurantMenu(available_items=["Pizza"])).confirm_order(PaymentMethod())
+        with mock.patch.object(updater, "_index_owners", wraps=updater._index_owners) as rescan:
+            outcomes, changed = updater.update([(placed["order_id"], "Preparing"), ("X8", "Preparing")])
+        self.assertEqual(rescan.call_count, 0)
+        self.assertEqual([o["success"] for o in outcomes], [True, False])
+        self.assertEqual(changed, {"a@example.com"})
+
+    def test_updater_rescans_after_dropped_events(self):
+        updater = OrderStatusUpdater(self.users, event_bus=self.bus, backlog=1)
+        updater.update([("A0", "Preparing")])
+        for order_id in ("A3", "A4"):  # the second event pushes the first out of the backlog
+            self.users["a@example.com"]["orders"].append({"order_id": order_id, "status": "Placed"})
+            self.bus.publish(order_event("a@example.com", self.users["a@example.com"]["orders"][-1]))
+        outcomes, _ = updater.update([("A3", "Preparing"), ("A4", "Preparing")])
+        self.assertEqual([o["success"] for o in outcomes], [True, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
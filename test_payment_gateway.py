@@ -0,0 +1,102 @@
+import socket
+import threading
+import unittest
+
+from Payment_Gateway import ChargeNotSentError, ConnectionPool, HttpGatewayClient, StubGatewayServer
+from Payment_Processing import PaymentProcessing
+
+
+class TestHttpGatewayClient(unittest.TestCase):
+    def setUp(self):
+        self.server = StubGatewayServer().start()
+        self.details = {"card_number": "4111111111111111", "expiry_date": "12/35", "cvv": "123"}
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_charge_reuses_keep_alive_connection(self):
+        client = HttpGatewayClient(self.server.host, self.server.port, pool_size=2)
+        for _ in range(5):
+            self.assertEqual(client.charge("credit_card", self.details, 10.0)["status"], "success")
+        client.close()
+
+        self.assertEqual(self.server.requests, 5)
+        self.assertEqual(self.server.connections, 1)
+        metrics = client.metrics()
+        self.assertEqual(metrics["created"], 1)
+        self.assertEqual(metrics["reused"], 4)
+
+    def test_declined_card(self):
+        client = HttpGatewayClient(self.server.host, self.server.port)
+        details = dict(self.details, card_number="1111222233334444")
+        self.assertEqual(client.charge("credit_card", details, 10.0)["status"], "failure")
+        client.close()
+
+    def test_idempotency_key_charges_once(self):
+        client = HttpGatewayClient(self.server.host, self.server.port)
+        first = client.charge("credit_card", self.details, 10.0, idempotency_key="ORD-1:k")
+        again = client.charge("credit_card", self.details, 10.0, idempotency_key="ORD-1:k")
+        client.close()
+        self.assertEqual(first, again)
+        self.assertEqual(self.server.requests, 2)
+        self.assertEqual(self.server.charges, 1)
+
+    def test_connect_failure_is_not_sent(self):
+        with socket.socket() as s:
+            s.bind(("127.0.0.1", 0))
+            port = s.getsockname()[1]
+        client = HttpGatewayClient("127.0.0.1", port)
+        with self.assertRaises(ChargeNotSentError):
+            client.charge("credit_card", self.details, 10.0)
+        self.assertEqual(client.metrics()["open"], 0)
+
+    def test_pool_size_bounds_connections(self):
+        client = HttpGatewayClient(self.server.host, self.server.port, pool_size=3)
+        threads = [threading.Thread(target=client.charge, args=("paypal", {}, 5.0)) for _ in range(20)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        client.close()
+
+        self.assertEqual(self.server.requests, 20)
+        self.assertLessEqual(self.server.connections, 3)
+        self.assertEqual(client.metrics()["in_use"], 0)
+
+    def test_payment_processing_uses_configured_clients(self):
+        processing = PaymentProcessing(gateway_clients={
+            "credit_card": HttpGatewayClient(self.server.host, self.server.port, pool_size=4),
+            "paypal": HttpGatewayClient(self.server.host, self.server.port, pool_size=1),
+        })
+        result = processing.process_payment({"total_amount": 20.0}, "credit_card", self.details)
+        self.assertEqual(result, "Payment successful, Order confirmed")
+        self.assertEqual(self.server.requests, 1)
+
+        metrics = processing.pool_metrics()
+        self.assertEqual(metrics["credit_card"]["size"], 4)
+        self.assertEqual(metrics["paypal"]["size"], 1)
+        self.assertEqual(metrics["credit_card"]["idle"], 1)
+
+    def test_unknown_gateway_client_rejected(self):
+        with self.assertRaises(ValueError):
+            PaymentProcessing(gateway_clients={"bitcoin": object()})
+
+
+class TestConnectionPool(unittest.TestCase):
+    def test_exhausted_pool_times_out(self):
+        pool = ConnectionPool("localhost", 1, size=1, connection_factory=lambda host, port, timeout: object())
+        conn, reused = pool.acquire()
+        self.assertFalse(reused)
+        with self.assertRaises(TimeoutError):
+            pool.acquire(wait_timeout=0.01)
+        self.assertEqual(pool.metrics()["utilization"], 1.0)
+        self.assertEqual(pool.metrics()["waits"], 1)
+
+        pool.release(conn)
+        again, reused = pool.acquire(wait_timeout=0.01)
+        self.assertIs(again, conn)
+        self.assertTrue(reused)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,531 @@
+import asyncio
+import threading
+import time
+import unittest
+from datetime import date
+from unittest import mock
+
+from Payment_Gateway import ChargeNotSentError, CircuitBreaker, RetryPolicy
+from Payment_Processing import (AsyncPaymentGateway, AsyncPaymentProcessing, IdempotencyCache, LocalPaymentGateway,
+                                PaymentProcessing, _is_final_outcome, _luhn_valid, benchmark_batch_validation)
+
+
+class TestPaymentProcessing(unittest.TestCase):
+    """
+    Unit tests for the PaymentProcessing class to ensure payment validation and processing work correctly.
+    """
+    def setUp(self):
+        """
+        Sets up the test environment by creating an instance of PaymentProcessing.
+        """
+        self.payment_processing = PaymentProcessing()
+
+    def test_validate_payment_method_success(self):
+        """
+        Test case for successful validation of a valid payment method ('credit_card') with valid details.
+        """
+        payment_details = {"card_number": "4111111111111111", "expiry_date": "12/35", "cvv": "123"}
+        result = self.payment_processing.validate_payment_method("credit_card", payment_details)
+        self.assertTrue(result)
+
+    def test_validate_payment_method_invalid_gateway(self):
+        """
+        Test case for validation failure due to an unsupported payment method ('bitcoin').
+        """
+        payment_details = {"card_number": "4111111111111111", "expiry_date": "12/35", "cvv": "123"}
+        with self.assertRaises(ValueError) as context:
+            self.payment_processing.validate_payment_method("bitcoin", payment_details)
+        self.assertEqual(str(context.exception), "Invalid payment method")
+
+    def test_validate_credit_card_invalid_details(self):
+        """
+        Test case for validation failure due to invalid credit card details (invalid card number and CVV).
+        """
+        payment_details = {"card_number": "1234", "expiry_date": "12/25", "cvv": "12"}  # Invalid card number and CVV.
+        result = self.payment_processing.validate_credit_card(payment_details)
+        self.assertFalse(result)
+
+    def test_validate_credit_card_checksum_and_expiry(self):
+        """
+        Test case for the single-card path applying the Luhn checksum and the expiry date.
+        """
+        today = date(2026, 10, 19)
+        valid = {"card_number": "4111111111111111", "expiry_date": "10/26", "cvv": "123"}
+        self.assertTrue(self.payment_processing.validate_credit_card(valid, today=today))
+        self.assertFalse(self.payment_processing.validate_credit_card(dict(valid, card_number="1234567812345678"),
+                                                                      today=today))
+        self.assertFalse(self.payment_processing.validate_credit_card(dict(valid, expiry_date="09/26"), today=today))
+        self.assertFalse(self.payment_processing.validate_credit_card(dict(valid, cvv=123), today=today))
+
+        result = self.payment_processing.process_payment({"total_amount": 10.0}, "credit_card",
+                                                         dict(valid, expiry_date="12/20"))
+        self.assertEqual(result, "Error: Invalid credit card details")
+
+    def test_process_payment_success(self):
+        """
+        Test case for successful payment processing using the 'credit_card' method with valid details.
+        """
+        order = {"total_amount": 100.00}
+        payment_details = {"card_number": "4111111111111111", "expiry_date": "12/35", "cvv": "123"}
+
+        # Use mock to simulate a successful payment response from the gateway.
+        with mock.patch.object(self.payment_processing, 'mock_payment_gateway', return_value={"status": "success"}):
+            result = self.payment_processing.process_payment(order, "credit_card", payment_details)
+            self.assertEqual(result, "Payment successful, Order confirmed")
+
+    def test_process_payment_failure(self):
+        """
+        Test case for payment failure due to a declined credit card.
+        """
+        order = {"total_amount": 100.00}
+        payment_details = {"card_number": "1111222233334444", "expiry_date": "12/35", "cvv": "123"}  # Simulate a declined card.
+
+        # Use mock to simulate a failed payment response from the gateway.
+        with mock.patch.object(self.payment_processing, 'mock_payment_gateway', return_value={"status": "failure"}):
+            result = self.payment_processing.process_payment(order, "credit_card", payment_details)
+            self.assertEqual(result, "Payment failed, please try again")
+
+    def test_process_payment_invalid_method(self):
+        """
+        Test case for payment processing failure due to an invalid payment method ('bitcoin').
+        """
+        order = {"total_amount": 100.00}
+        payment_details = {"card_number": "4111111111111111", "expiry_date": "12/35", "cvv": "123"}
+
+        # No need for mocking, the method will raise an error directly.
+        result = self.payment_processing.process_payment(order, "bitcoin", payment_details)
+        self.assertIn("Error: Invalid payment method", result)
+
+    def test_process_payment_idempotent_retry(self):
+        """
+        Test case for a retried payment with the same order and idempotency key charging only once.
+        """
+        order = {"order_id": "ORD-1", "total_amount": 100.00}
+        payment_details = {"card_number": "4111111111111111", "expiry_date": "12/35", "cvv": "123"}
+
+        with mock.patch.object(self.payment_processing, 'mock_payment_gateway', return_value={"status": "success"}) as gateway:
+            first = self.payment_processing.process_payment(order, "credit_card", payment_details, idempotency_key="k1")
+            second = self.payment_processing.process_payment(order, "credit_card", payment_details, idempotency_key="k1")
+            other = self.payment_processing.process_payment(order, "credit_card", payment_details, idempotency_key="k2")
+            self.assertEqual(first, "Payment successful, Order confirmed")
+            self.assertEqual(second, first)
+            self.assertEqual(other, first)
+            self.assertEqual(gateway.call_count, 2)
+
+    def test_process_payment_idempotency_key_misuse(self):
+        """
+        Test case for keys without an order id, and keys reused for a different payment, being rejected.
+        """
+        payment_details = {"card_number": "4111111111111111", "expiry_date": "12/35", "cvv": "123"}
+
+        with mock.patch.object(self.payment_processing, 'mock_payment_gateway', return_value={"status": "success"}) as gateway:
+            result = self.payment_processing.process_payment({"total_amount": 10.0}, "credit_card", payment_details,
+                                                             idempotency_key="k1")
+            self.assertEqual(result, "Error: An order_id is required with an idempotency key")
+
+            order = {"order_id": "ORD-7", "total_amount": 10.0}
+            self.payment_processing.process_payment(order, "credit_card", payment_details, idempotency_key="k1")
+            other_amount = self.payment_processing.process_payment(dict(order, total_amount=99.0), "credit_card",
+                                                                   payment_details, idempotency_key="k1")
+            other_card = self.payment_processing.process_payment(order, "credit_card",
+                                                                 dict(payment_details, card_number="5555555555554444"),
+                                                                 idempotency_key="k1")
+            self.assertEqual(other_amount, "Error: Idempotency key was already used for a different payment")
+            self.assertEqual(other_card, other_amount)
+            self.assertEqual(gateway.call_count, 1)
+
+    def test_process_payment_concurrent_duplicates_collapse(self):
+        """
+        Test case for concurrent duplicates sharing a single in-flight gateway call.
+        """
+        order = {"order_id": "ORD-2", "total_amount": 100.00}
+        payment_details = {"card_number": "4111111111111111", "expiry_date": "12/35", "cvv": "123"}
+        release = threading.Event()
+        calls = []
+
+        def slow_gateway(method, details, amount):
+            calls.append(amount)
+            release.wait(5)
+            return {"status": "success"}
+
+        results = []
+        with mock.patch.object(self.payment_processing, 'mock_payment_gateway', side_effect=slow_gateway):
+            threads = [threading.Thread(target=lambda: results.append(self.payment_processing.process_payment(
+                order, "credit_card", payment_details, idempotency_key="dup"))) for _ in range(5)]
+            for t in threads:
+                t.start()
+            while self.payment_processing.idempotency_cache.hits < 4:
+                time.sleep(0.001)
+            release.set()
+            for t in threads:
+                t.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["Payment successful, Order confirmed"] * 5)
+
+
+class TestBatchCardValidation(unittest.TestCase):
+    """
+    Unit tests for validate_credit_cards_batch.
+    """
+    def setUp(self):
+        """
+        Sets up the processor and a fixed 'today' so expiry checks are deterministic.
+        """
+        self.payment_processing = PaymentProcessing()
+        self.today = date(2026, 10, 19)
+
+    def test_luhn_checksum(self):
+        """
+        Test case for the Luhn checksum on well-known test numbers.
+        """
+        self.assertTrue(_luhn_valid("4111111111111111"))
+        self.assertTrue(_luhn_valid("5555555555554444"))
+        self.assertFalse(_luhn_valid("1234567812345678"))
+        self.assertFalse(_luhn_valid("4111111111111112"))
+
+    def test_batch_mask(self):
+        """
+        Test case for each rule rejecting its card while valid cards pass.
+        """
+        cards = [
+            {"card_number": "4111111111111111", "expiry_date": "10/26", "cvv": "123"},    # valid, current month
+            {"card_number": "4242424242424242", "expiry_date": "01/2030", "cvv": "999"},  # valid, 4-digit year
+            {"card_number": "1234567812345678", "expiry_date": "12/30", "cvv": "123"},    # Luhn failure
+            {"card_number": "4111111111111111", "expiry_date": "09/26", "cvv": "123"},    # expired
+            {"card_number": "4111111111111111", "expiry_date": "13/30", "cvv": "123"},    # bad month
+            {"card_number": "4111111111111111", "expiry_date": "12/30", "cvv": "12"},     # short CVV
+            {"card_number": "4111-1111-1111-11", "expiry_date": "12/30", "cvv": "123"},   # non-digits
+            {},                                                                             # missing fields
+        ]
+        mask = self.payment_processing.validate_credit_cards_batch(cards, today=self.today)
+        self.assertEqual(mask, [True, True, False, False, False, False, False, False])
+        self.assertEqual(mask, [self.payment_processing.validate_credit_card(card, today=self.today) for card in cards])
+
+    def test_batch_all_well_formed(self):
+        """
+        Test case for the column-wise path, where every card passes the shape and expiry checks.
+        """
+        numbers = ["4111111111111111", "4111111111111112", "5555555555554444", "0000000000000000", "9999999999999995"]
+        cards = [{"card_number": n, "expiry_date": "12/30", "cvv": "123"} for n in numbers]
+        mask = self.payment_processing.validate_credit_cards_batch(cards, today=self.today)
+        self.assertEqual(mask, [_luhn_valid(n) for n in numbers])
+        self.assertEqual(self.payment_processing.validate_credit_cards_batch([], today=self.today), [])
+
+    def test_batch_matches_per_card_loop(self):
+        """
+        Test case comparing the batch result with the straightforward per-card implementation.
+        """
+        result = benchmark_batch_validation(cards=2000)
+        self.assertEqual(result["cards"], 2000)
+        with mock.patch.object(PaymentProcessing, "validate_credit_cards_batch", return_value=[True] * 20):
+            with self.assertRaises(RuntimeError):
+                benchmark_batch_validation(cards=20)
+
+
+class FlakyGateway:
+    """
+    A gateway client stub that raises for the first `failures` calls, then succeeds.
+    """
+    def __init__(self, failures=0, error=None):
+        self.failures = failures
+        self.error = error if error is not None else ChargeNotSentError("gateway unreachable")
+        self.calls = 0
+        self.keys = []
+
+    def charge(self, method, details, amount, idempotency_key=None):
+        self.calls += 1
+        self.keys.append(idempotency_key)
+        if self.calls <= self.failures:
+            raise self.error
+        return {"status": "success"}
+
+
+class TestGatewayResilience(unittest.TestCase):
+    """
+    Unit tests for circuit breaking, retries and failover around the payment gateway.
+    """
+    def setUp(self):
+        """
+        Sets up an order, valid card details and a retry policy that never sleeps.
+        """
+        self.order = {"total_amount": 50.00}
+        self.payment_details = {"card_number": "4111111111111111", "expiry_date": "12/35", "cvv": "123"}
+        self.retry_policy = RetryPolicy(max_attempts=3, sleep=lambda seconds: None)
+
+    def test_transient_error_is_retried(self):
+        """
+        Test case for a single gateway error being absorbed by a retry.
+        """
+        gateway = FlakyGateway(failures=1)
+        processing = PaymentProcessing(gateway_clients={"credit_card": gateway}, retry_policy=self.retry_policy)
+        result = processing.process_payment(self.order, "credit_card", self.payment_details)
+        self.assertEqual(result, "Payment successful, Order confirmed")
+        self.assertEqual(gateway.calls, 2)
+        self.assertEqual(processing.gateway_health()["retry_budget"]["retries"], 1)
+
+    def test_retry_budget_limits_retries(self):
+        """
+        Test case for retries stopping once the budget is spent.
+        """
+        gateway = FlakyGateway(failures=100)
+        policy = RetryPolicy(max_attempts=5, max_tokens=1, budget_ratio=0, sleep=lambda seconds: None)
+        processing = PaymentProcessing(gateway_clients={"credit_card": gateway}, retry_policy=policy)
+        result = processing.process_payment(self.order, "credit_card", self.payment_details)
+        self.assertEqual(result, "Error: gateway unreachable")
+        self.assertEqual(gateway.calls, 2)
+
+    def test_breaker_trips_and_fails_over(self):
+        """
+        Test case for an erroring gateway tripping its breaker and charges moving to the failover gateway.
+        """
+        broken = FlakyGateway(failures=100)
+        backup = FlakyGateway()
+        processing = PaymentProcessing(
+            gateway_clients={"credit_card": broken, "paypal": backup},
+            failover={"credit_card": ["paypal"]},
+            retry_policy=RetryPolicy(max_attempts=1, sleep=lambda seconds: None),
+            breaker_factory=lambda name: CircuitBreaker(name, min_calls=3, failure_rate=0.5),
+        )
+        for _ in range(5):
+            result = processing.process_payment(self.order, "credit_card", self.payment_details)
+            self.assertEqual(result, "Payment successful, Order confirmed")
+
+        health = processing.gateway_health()
+        self.assertEqual(health["credit_card"]["breaker"]["state"], CircuitBreaker.OPEN)
+        self.assertEqual(broken.calls, 3)
+        self.assertEqual(backup.calls, 5)
+        self.assertEqual(health["paypal"]["latency"]["count"], 5)
+
+    def test_open_breaker_without_failover(self):
+        """
+        Test case for charges being rejected quickly while the breaker is open.
+        """
+        processing = PaymentProcessing(
+            gateway_clients={"credit_card": FlakyGateway(failures=100)},
+            retry_policy=RetryPolicy(max_attempts=1, sleep=lambda seconds: None),
+            breaker_factory=lambda name: CircuitBreaker(name, min_calls=1, failure_rate=1.0),
+        )
+        processing.process_payment(self.order, "credit_card", self.payment_details)
+        result = processing.process_payment(self.order, "credit_card", self.payment_details)
+        self.assertEqual(result, "Error: Payment gateway credit_card is unavailable")
+
+    def test_retries_reuse_one_idempotency_key(self):
+        """
+        Test case for every attempt of one charge carrying the same key, derived from the order and client key.
+        """
+        gateway = FlakyGateway(failures=2, error=TimeoutError("read timed out"))
+        processing = PaymentProcessing(gateway_clients={"credit_card": gateway}, retry_policy=self.retry_policy)
+        order = dict(self.order, order_id="ORD-9")
+        result = processing.process_payment(order, "credit_card", self.payment_details, idempotency_key="k")
+        self.assertEqual(result, "Payment successful, Order confirmed")
+        self.assertEqual(gateway.keys, ["ORD-9:k"] * 3)
+
+        processing.process_payment(self.order, "credit_card", self.payment_details)
+        self.assertIsNotNone(gateway.keys[-1])
+        self.assertNotEqual(gateway.keys[-1], "ORD-9:k")
+
+    def test_no_failover_after_ambiguous_error(self):
+        """
+        Test case for a timeout (the charge may have gone through) not failing over to another gateway.
+        """
+        broken = FlakyGateway(failures=100, error=TimeoutError("read timed out"))
+        backup = FlakyGateway()
+        processing = PaymentProcessing(
+            gateway_clients={"credit_card": broken, "paypal": backup},
+            failover={"credit_card": ["paypal"]},
+            retry_policy=RetryPolicy(max_attempts=2, sleep=lambda seconds: None),
+        )
+        result = processing.process_payment(self.order, "credit_card", self.payment_details)
+        self.assertEqual(result, "Error: read timed out")
+        self.assertEqual(broken.calls, 2)
+        self.assertEqual(backup.calls, 0)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """
+    Unit tests for the CircuitBreaker state transitions.
+    """
+    def setUp(self):
+        """
+        Sets up a breaker driven by a fake clock.
+        """
+        self.now = [0.0]
+        self.breaker = CircuitBreaker("credit_card", min_calls=4, slow_call_threshold=1.0, slow_call_rate=0.5,
+                                      reset_timeout=10, clock=lambda: self.now[0])
+
+    def test_trips_on_slow_calls(self):
+        """
+        Test case for a gateway that answers but too slowly.
+        """
+        for latency in (0.1, 2.0, 0.1, 2.0):
+            self.breaker.record_success(latency)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_half_open_probe(self):
+        """
+        Test case for a single probe being allowed after the reset timeout, closing the breaker on success.
+        """
+        for _ in range(4):
+            self.breaker.record_failure(0.1)
+        self.now[0] = 10
+        self.assertTrue(self.breaker.allow_request())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        self.breaker.record_success(0.1)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+
+class TestIdempotencyCache(unittest.TestCase):
+    """
+    Unit tests for the IdempotencyCache bounds and expiry.
+    """
+    def setUp(self):
+        """
+        Sets up a cache driven by a fake clock.
+        """
+        self.now = [0.0]
+        self.cache = IdempotencyCache(max_entries=2, ttl=10, clock=lambda: self.now[0])
+
+    def test_entries_expire_after_ttl(self):
+        """
+        Test case for an outcome disappearing once its TTL has passed.
+        """
+        self.cache.store("a", "ok")
+        self.now[0] = 9.9
+        self.assertEqual(self.cache.lookup("a"), "ok")
+        self.now[0] = 10.0
+        self.assertIsNone(self.cache.lookup("a"))
+
+    def test_least_recently_used_entry_evicted(self):
+        """
+        Test case for the cache staying within max_entries.
+        """
+        self.cache.store("a", 1)
+        self.cache.store("b", 2)
+        self.cache.lookup("a")
+        self.cache.store("c", 3)
+        self.assertEqual(len(self.cache), 2)
+        self.assertIsNone(self.cache.lookup("b"))
+        self.assertEqual(self.cache.lookup("a"), 1)
+
+    def test_uncacheable_outcome_not_stored(self):
+        """
+        Test case for transient errors not being remembered.
+        """
+        self.cache.get_or_run("a", lambda: "Error: timed out", cacheable=_is_final_outcome)
+        self.assertIsNone(self.cache.lookup("a"))
+
+
+class TestAsyncPaymentProcessing(unittest.IsolatedAsyncioTestCase):
+    """
+    Unit tests for the AsyncPaymentProcessing class covering concurrency limits, timeouts and cancellation.
+    """
+    def setUp(self):
+        """
+        Sets up valid payment details shared by the tests.
+        """
+        self.order = {"total_amount": 100.00}
+        self.payment_details = {"card_number": "4111111111111111", "expiry_date": "12/35", "cvv": "123"}
+
+    async def test_process_payment_success(self):
+        """
+        Test case for a successful asynchronous payment.
+        """
+        processor = AsyncPaymentProcessing(LocalPaymentGateway(latency=0))
+        result = await processor.process_payment(self.order, "credit_card", self.payment_details)
+        self.assertEqual(result, "Payment successful, Order confirmed")
+
+    async def test_process_payment_declined(self):
+        """
+        Test case for a card declined by the stand-in gateway.
+        """
+        processor = AsyncPaymentProcessing(LocalPaymentGateway(latency=0))
+        details = dict(self.payment_details, card_number="1111222233334444")
+        result = await processor.process_payment(self.order, "credit_card", details)
+        self.assertEqual(result, "Payment failed, please try again")
+
+    async def test_invalid_method_skips_gateway(self):
+        """
+        Test case for validation errors being reported without calling the gateway.
+        """
+        gateway = LocalPaymentGateway(latency=0)
+        processor = AsyncPaymentProcessing(gateway)
+        result = await processor.process_payment(self.order, "bitcoin", self.payment_details)
+        self.assertIn("Error: Invalid payment method", result)
+        self.assertEqual(gateway.calls, 0)
+
+    async def test_timeout(self):
+        """
+        Test case for a gateway that is slower than the per-call timeout.
+        """
+        processor = AsyncPaymentProcessing(LocalPaymentGateway(latency=1.0), timeout=0.01)
+        result = await processor.process_payment(self.order, "credit_card", self.payment_details)
+        self.assertEqual(result, "Error: Payment gateway timed out")
+
+    def test_gateway_interface_is_abstract(self):
+        """
+        Test case for a gateway without a charge method being rejected at construction.
+        """
+        with self.assertRaises(TypeError):
+            AsyncPaymentGateway()
+
+        class Incomplete(AsyncPaymentGateway):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+    async def test_bounded_concurrency(self):
+        """
+        Test case checking that no more than max_concurrency gateway calls are in flight.
+        """
+        in_flight = {"now": 0, "peak": 0}
+
+        class CountingGateway(AsyncPaymentGateway):
+            async def charge(self, method, details, amount):
+                in_flight["now"] += 1
+                in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+                await asyncio.sleep(0.01)
+                in_flight["now"] -= 1
+                return {"status": "success"}
+
+        processor = AsyncPaymentProcessing(CountingGateway(), max_concurrency=3)
+        results = await processor.process_payments([(self.order, "credit_card", self.payment_details)] * 10)
+        self.assertEqual(len(results), 10)
+        self.assertEqual(in_flight["peak"], 3)
+
+    async def test_cancellation_propagates(self):
+        """
+        Test case checking that cancelling a checkout cancels the pending gateway call.
+        """
+        processor = AsyncPaymentProcessing(LocalPaymentGateway(latency=10))
+        task = asyncio.create_task(processor.process_payment(self.order, "credit_card", self.payment_details))
+        await asyncio.sleep(0)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+
+    async def test_concurrent_duplicates_collapse(self):
+        """
+        Test case for concurrent duplicate checkouts sharing one gateway call, and later repeats hitting the cache.
+        """
+        gateway = LocalPaymentGateway(latency=0.01)
+        processor = AsyncPaymentProcessing(gateway)
+        order = dict(self.order, order_id="ORD-3")
+        results = await asyncio.gather(*(processor.process_payment(order, "credit_card", self.payment_details,
+                                                                    idempotency_key="dup") for _ in range(5)))
+        again = await processor.process_payment(order, "credit_card", self.payment_details, idempotency_key="dup")
+        self.assertEqual(gateway.calls, 1)
+        self.assertEqual(set(results), {"Payment successful, Order confirmed"})
+        self.assertEqual(again, results[0])
+
+        other = await processor.process_payment(dict(order, total_amount=1.0), "credit_card", self.payment_details,
+                                                idempotency_key="dup")
+        self.assertEqual(other, "Error: Idempotency key was already used for a different payment")
+        self.assertEqual(gateway.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()  # Run the unit tests.
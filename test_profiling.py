@@ -0,0 +1,74 @@
+import time
+import unittest
+
+import Profiling
+from Api_Server import ApiService
+from Profiling import SlowOperationProfiler, format_trace, profiled
+from Restaurant_Browsing import RestaurantBrowsing, RestaurantDatabase
+
+
+def slow_inner(seconds):
+    time.sleep(seconds)
+
+
+class TestSlowOperationProfiler(unittest.TestCase):
+    def tearDown(self):
+        Profiling.disable()
+
+    def test_only_slow_operations_are_kept(self):
+        profiler = SlowOperationProfiler(threshold=0.05, interval=0.002)
+        with profiler.profile("fast"):
+            pass
+        with profiler.profile("slow"):
+            slow_inner(0.08)
+        profiler.close()
+        traces = profiler.recent()
+        self.assertEqual([t["name"] for t in traces], ["slow"])
+        self.assertGreater(traces[0]["samples"], 0)
+        self.assertIn("slow_inner", traces[0]["report"])
+        self.assertIn("slow took", format_trace(traces[0]))
+
+    def test_ring_buffer_keeps_last_n(self):
+        profiler = SlowOperationProfiler(threshold=0, capacity=3)
+        for i in range(5):
+            with profiler.profile(f"op{i}"):
+                pass
+        profiler.close()
+        self.assertEqual([t["name"] for t in profiler.recent()], ["op2", "op3", "op4"])
+
+    def test_cprofile_mode(self):
+        profiler = SlowOperationProfiler(threshold=0, mode="cprofile")
+        with profiler.profile("checkout"):
+            slow_inner(0.001)
+        self.assertIn("slow_inner", profiler.recent()[0]["report"])
+
+    def test_nested_operations_trace_the_outermost(self):
+        profiler = SlowOperationProfiler(threshold=0)
+        with profiler.profile("outer"):
+            with profiler.profile("inner"):
+                pass
+        profiler.close()
+        self.assertEqual([t["name"] for t in profiler.recent()], ["outer"])
+
+    def test_decorator_is_passthrough_when_disabled(self):
+        @profiled("noop")
+        def work(x):
+            return x * 2
+
+        self.assertIsNone(Profiling.active())
+        self.assertEqual(work(21), 42)
+
+    def test_wired_operations(self):
+        profiler = Profiling.enable(threshold=0)
+        RestaurantBrowsing(RestaurantDatabase()).search_by_filters(cuisine_type="Italian")
+        self.assertEqual([t["name"] for t in profiler.recent()], ["search_by_filters"])
+
+        status, payload = ApiService().handle("GET", "/debug/slow-operations")
+        self.assertEqual(status, 200)
+        self.assertEqual(payload["traces"][0]["name"], "search_by_filters")
+        Profiling.disable()
+        self.assertEqual(ApiService().handle("GET", "/debug/slow-operations")[0], 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
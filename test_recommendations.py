@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+
+from Api_Server import ApiService
+from Recommendations import RecommendationTable, benchmark_build, build_recommendations
+
+
+def _user(favorites=(), ordered_from=()):
+    return {"favorites": list(favorites), "orders": [{"order_id": f"O{i}", "restaurant": name}
+                                                     for i, name in enumerate(ordered_from)]}
+
+
+class TestRecommendations(unittest.TestCase):
+    def setUp(self):
+        self.users = {
+            "a@example.com": _user(["Sushi House", "Italian Bistro"]),
+            "b@example.com": _user(["Sushi House"], ["Italian Bistro", "Taco Town"]),
+            "c@example.com": _user(["Italian Bistro", "Taco Town"]),
+            "d@example.com": _user(["Sushi House"]),
+            "e@example.com": _user(),
+        }
+        self.table = build_recommendations(self.users, min_count=1)
+
+    def test_user_lookup(self):
+        self.assertEqual(self.table.for_user("d@example.com"), ["Italian Bistro", "Taco Town"])
+        self.assertEqual(self.table.for_user("a@example.com"), ["Taco Town"])
+        self.assertNotIn("e@example.com", self.table.user_index)
+        self.assertEqual(self.table.for_user("nobody@example.com"), [])
+
+    def test_similar_restaurants(self):
+        self.assertEqual(self.table.similar_restaurants("Taco Town")[0], "Italian Bistro")
+        self.assertEqual(self.table.similar_restaurants("Unknown"), [])
+        self.assertEqual(self.table.for_restaurants(["Sushi House"]), ["Italian Bistro", "Taco Town"])
+
+    def test_min_count_drops_rare_pairs(self):
+        table = build_recommendations(self.users, min_count=2)
+        self.assertEqual(table.similar_restaurants("Sushi House"), ["Italian Bistro"])
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "recommendations.json")
+            self.table.save(path)
+            loaded = RecommendationTable.load(path)
+        for email in self.users:
+            self.assertEqual(loaded.for_user(email), self.table.for_user(email))
+        self.assertEqual(loaded.similar_restaurants("Taco Town"), self.table.similar_restaurants("Taco Town"))
+
+    def test_api_endpoint(self):
+        service = ApiService(recommendations=self.table)
+        service.registration.register("d@example.com", "Password123", "Password123")
+        service.registration.register("new@example.com", "Password123", "Password123")
+        token = service.handle("POST", "/login", body={"email": "d@example.com", "password": "Password123"})[1]["token"]
+        status, payload = service.handle("GET", "/recommendations", token=token)
+        self.assertEqual(payload["restaurants"], ["Italian Bistro", "Taco Town"])
+
+        token = service.handle("POST", "/login", body={"email": "new@example.com", "password": "Password123"})[1]["token"]
+        service.handle("POST", "/favorites", body={"name": "Taco Town"}, token=token)
+        status, payload = service.handle("GET", "/recommendations", token=token)
+        self.assertEqual(payload["restaurants"][0], "Italian Bistro")
+
+    def test_benchmark_smoke(self):
+        result = benchmark_build(users=2000, restaurants=100)
+        self.assertEqual(result["users"], 2000)
+        self.assertGreater(result["users_per_second"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+import unittest
+from unittest import mock
+
+from Restaurant_Browsing import IncrementalSearch, RestaurantBrowsing, RestaurantDatabase, generate_restaurants
+
+
+class TestRestaurantBrowsing(unittest.TestCase):
+    """
+    Unit tests for the RestaurantBrowsing class, testing various search functionalities.
+    """
+
+    def setUp(self):
+        """
+        Set up the test case by initializing a RestaurantDatabase and RestaurantBrowsing instance.
+        """
+        self.database = RestaurantDatabase()
+        self.browsing = RestaurantBrowsing(self.database)
+
+    def test_search_by_cuisine(self):
+        """
+        Test searching for restaurants by cuisine type.
+        """
+        results = self.browsing.search_by_cuisine("Italian")
+        self.assertEqual(len(results), 2)  # There should be 2 Italian restaurants
+        self.assertTrue(all([restaurant['cuisine'] == "Italian" for restaurant in results]))  # Check if all returned restaurants are Italian
+
+    def test_search_by_location(self):
+        """
+        Test searching for restaurants by location.
+        """
+        results = self.browsing.search_by_location("Downtown")
+        self.assertEqual(len(results), 2)  # There should be 2 restaurants located Downtown
+        self.assertTrue(all([restaurant['location'] == "Downtown" for restaurant in results]))  # Check if all returned restaurants are in Downtown
+
+    def test_search_by_rating(self):
+        """
+        Test searching for restaurants by minimum rating.
+        """
+        results = self.browsing.search_by_rating(4.0)
+        self.assertEqual(len(results), 4)  # There should be 4 restaurants with a rating >= 4.0
+        self.assertTrue(all([restaurant['rating'] >= 4.0 for restaurant in results]))  # Check if all returned restaurants have a rating >= 4.0
+
+    def test_search_by_filters(self):
+        """
+        Test searching for restaurants by multiple filters (cuisine type, location, and minimum rating).
+        """
+        results = self.browsing.search_by_filters(cuisine_type="Italian", location="Downtown", min_rating=4.0)
+        self.assertEqual(len(results), 1)  # Only one restaurant should match all the filters
+        self.assertEqual(results[0]['name'], "Italian Bistro")  # The result should be "Italian Bistro"
+
+    def test_indexed_search_matches_scan(self):
+        """
+        Test that indexed searches return the same restaurants, in the same order, as a full scan.
+        """
+        database = RestaurantDatabase(generate_restaurants(500, seed=1))
+        browsing = RestaurantBrowsing(database)
+        everything = database.get_restaurants()
+        expected = [r for r in everything if r['cuisine'] == "Thai" and r['location'] == "Harbor" and r['rating'] >= 4.0]
+        self.assertEqual(browsing.search_by_filters(cuisine_type="thai", location="harbor", min_rating=4.0), expected)
+        self.assertEqual(browsing.search_by_rating(4.5), [r for r in everything if r['rating'] >= 4.5])
+
+    def test_search_positions_matches_search_by_filters(self):
+        """
+        Test that search_positions finds the same restaurants as search_by_filters, and every one without filters.
+        """
+        positions = self.browsing.search_positions(cuisine_type="Italian")
+        self.assertEqual(self.database.get_by_positions(positions), self.browsing.search_by_filters(cuisine_type="Italian"))
+        positions.append(0)  # the caller's copy, not the index
+        self.assertEqual(len(self.browsing.search_by_cuisine("Italian")), 2)
+        self.assertEqual(list(self.browsing.search_positions()), list(range(len(self.database.restaurants))))
+
+    def test_incremental_search_matches_a_scan(self):
+        """
+        Test that every prefix typed finds the restaurants whose cuisine starts with it.
+        """
+        database = RestaurantDatabase(generate_restaurants(500, seed=2))
+        search = IncrementalSearch(RestaurantBrowsing(database))
+        for text in ["", "k", "ko", "kOr", "i", "it", "ital", "italx", "f", "", "fast food"]:
+            expected = [p for p, r in enumerate(database.restaurants) if r['cuisine'].lower().startswith(text.lower())]
+            self.assertEqual(list(search.search(text)), expected, text)
+
+    def test_incremental_search_refines_the_previous_result(self):
+        """
+        Test that extending the text reuses the previous result instead of querying the index again.
+        """
+        search = IncrementalSearch(self.browsing)
+        first = search.search("I")
+        with mock.patch.object(self.database, 'positions_by_cuisines', wraps=self.database.positions_by_cuisines) as query:
+            self.assertIs(search.search("it"), first)  # Italian was already the only match
+            self.assertIs(search.search("Italian"), first)
+            self.assertEqual(search.search("Italy"), [])
+            query.assert_called_once_with([])
+            self.database.add_restaurant({"name": "Trattoria", "cuisine": "Italian", "location": "Uptown",
+                                          "rating": 4.1, "price_range": "$$", "delivery": True})
+            self.assertEqual(len(search.search("Italian")), 3)  # a new restaurant invalidates the cache
+
+    def test_add_restaurant_updates_indexes(self):
+        """
+        Test that a restaurant added after construction is found by every search.
+        """
+        self.database.add_restaurant({"name": "Curry Corner", "cuisine": "Indian", "location": "Downtown",
+                                      "rating": 4.6, "price_range": "$", "delivery": True})
+        self.assertEqual([r['name'] for r in self.browsing.search_by_cuisine("Indian")], ["Curry Corner"])
+        self.assertEqual(len(self.browsing.search_by_location("Downtown")), 3)
+        self.assertIn("Curry Corner", [r['name'] for r in self.browsing.search_by_rating(4.6)])
+
+    def test_record_review_updates_rating_and_index(self):
+        """
+        Test that reviews move a restaurant's Bayesian rating and its place in rating searches.
+        """
+        # Pizza Palace: listed 3.9, weighted as 5 reviews
+        self.assertEqual(self.database.record_review("Pizza Palace", 5), 4.08)
+        self.assertEqual(self.database.record_review("Pizza Palace", 5), 4.21)
+        self.assertIn("Pizza Palace", [r['name'] for r in self.browsing.search_by_rating(4.2)])
+
+        # Editing a review replaces its rating instead of adding another one
+        self.assertEqual(self.database.record_review("Pizza Palace", 1, previous_rating=5), 3.64)
+        restaurant = self.database.get_by_name("Pizza Palace")
+        self.assertEqual((restaurant['review_count'], restaurant['review_sum'], restaurant['base_rating']), (2, 6, 3.9))
+        self.assertEqual(len(self.browsing.search_by_rating(4.0)), 4)
+        self.assertIsNone(self.database.record_review("Nowhere", 5))
+
+    def test_load_reviews_rebuilds_aggregates(self):
+        """
+        Test that stored reviews are counted at startup, so later edits adjust a counted review.
+        """
+        users = {
+            "a@example.com": {"reviews": {"O1": {"rating": 5, "restaurant": "Pizza Palace"}}},
+            "b@example.com": {"orders": [{"order_id": "O2", "restaurant": "Pizza Palace"}],
+                              "reviews": {"O2": {"rating": 5}}},  # older review without the restaurant
+        }
+        self.assertEqual(self.database.load_reviews(users), 2)
+        restaurant = self.database.get_by_name("Pizza Palace")
+        self.assertEqual((restaurant['review_count'], restaurant['review_sum'], restaurant['rating']), (2, 10, 4.21))
+        self.assertIn("Pizza Palace", [r['name'] for r in self.browsing.search_by_rating(4.2)])
+
+        self.assertEqual(self.database.record_review("Pizza Palace", 1, previous_rating=5), 3.64)
+        self.assertEqual(self.database.load_reviews({}), 0)
+        self.assertEqual(restaurant['rating'], 3.9)
+
+    def test_edit_of_uncounted_review_counts_it(self):
+        """
+        Test that an edit arriving before any review was counted cannot make the sum negative.
+        """
+        self.database.record_review("Taco Town", 1, previous_rating=5)
+        restaurant = self.database.get_by_name("Taco Town")
+        self.assertEqual((restaurant['review_count'], restaurant['review_sum']), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
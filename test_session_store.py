@@ -0,0 +1,101 @@
+import unittest
+from unittest import mock
+
+from Order_Events import OrderEventBus
+from Password_Hashing import PasswordHasher
+from Session_Store import SessionStore
+from User_Registration import UserRegistration
+
+
+class TestSessionStore(unittest.TestCase):
+    def setUp(self):
+        self.now = [0.0]
+        self.registration = UserRegistration(hasher=PasswordHasher(iterations=1000))
+        for name in ("a", "b", "c"):
+            self.registration.register(f"{name}@example.com", "Password123", "Password123")
+        self.sessions = SessionStore(self.registration, ttl=60, max_sessions=2, clock=lambda: self.now[0])
+
+    def test_login(self):
+        self.assertIsNone(self.sessions.login("a@example.com", "Wrongpass123"))
+        token = self.sessions.login("a@example.com", "Password123")
+        session = self.sessions.get(token)
+        self.assertEqual(session.email, "a@example.com")
+        self.assertIsNone(self.sessions.get("unknown"))
+
+    def test_sliding_expiry(self):
+        token = self.sessions.create("a@example.com")
+        self.now[0] = 50
+        self.assertIsNotNone(self.sessions.get(token))
+        self.now[0] = 100
+        self.assertIsNotNone(self.sessions.get(token))
+        self.now[0] = 161
+        self.assertIsNone(self.sessions.get(token))
+        self.assertEqual(len(self.sessions), 0)
+
+    def test_lru_eviction(self):
+        first = self.sessions.create("a@example.com")
+        second = self.sessions.create("b@example.com")
+        self.sessions.get(first)
+        third = self.sessions.create("c@example.com")
+        self.assertIsNone(self.sessions.get(second))
+        self.assertIsNotNone(self.sessions.get(first))
+        self.assertIsNotNone(self.sessions.get(third))
+        self.assertEqual(self.sessions.evictions, 1)
+
+    def test_profile_cached_and_shared(self):
+        first = self.sessions.get(self.sessions.create("a@example.com"))
+        second = self.sessions.get(self.sessions.create("a@example.com"))
+        self.assertIs(first.profile, second.profile)
+        self.assertIsNot(first.cart, second.cart)
+
+        with mock.patch.object(first.profile, "_hydrate") as hydrate:
+            first.profile.add_favorite_restaurant("Sushi House")
+            second.profile.list_favorites()
+        hydrate.assert_not_called()
+        self.assertEqual(self.registration.users["a@example.com"]["favorites"], ["Sushi House"])
+
+    def test_revoke_and_purge(self):
+        first = self.sessions.create("a@example.com")
+        second = self.sessions.create("a@example.com")
+        self.sessions.revoke(first)
+        self.assertIsNone(self.sessions.get(first))
+        self.sessions.revoke_user("a@example.com")
+        self.assertIsNone(self.sessions.get(second))
+
+        self.sessions.create("b@example.com")
+        self.now[0] = 61
+        self.assertEqual(self.sessions.purge_expired(), 1)
+        self.assertEqual(len(self.sessions), 0)
+
+    def test_event_subscription_ends_with_the_session(self):
+        bus = OrderEventBus()
+        sessions = SessionStore(self.registration, event_bus=bus)
+        token = sessions.create("a@example.com")
+        session = sessions.get(token)
+        subscription = sessions.events_for(session)
+        self.assertIs(sessions.events_for(session), subscription)
+        session.profile.add_order_record({"order_id": "ORD-1", "status": "Placed"})
+        session.profile.update_order_status("ORD-1", "Preparing")
+        self.assertEqual([e["status"] for e in subscription.drain()], ["Preparing"])
+        sessions.revoke(token)
+        self.assertTrue(subscription.closed)
+        without_bus = SessionStore(self.registration)
+        self.assertIsNone(without_bus.events_for(without_bus.get(without_bus.create("b@example.com"))))
+
+    def test_requests_purge_expired_sessions(self):
+        sessions = SessionStore(self.registration, ttl=60, purge_interval=30, clock=lambda: self.now[0])
+        sessions.create("a@example.com")
+        sessions.create("b@example.com")
+        self.now[0] = 61
+        self.assertIsNone(sessions.get("unknown"))
+        self.assertEqual(len(sessions), 0)
+        self.assertNotIn("a@example.com", sessions._profiles)
+
+        sessions.create("c@example.com")
+        self.now[0] = 150
+        sessions.create("a@example.com")
+        self.assertEqual(len(sessions), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
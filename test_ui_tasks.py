@@ -0,0 +1,88 @@
+import threading
+import time
+import unittest
+import unittest.mock
+
+from Ui_Tasks import TaskRunner
+
+
+class FakeAfter:
+    """Stands in for widget.after: callbacks run when the test pumps them, on the test thread."""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def __call__(self, ms, callback):
+        self.callbacks.append(callback)
+
+    def pump(self, runner, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while runner.pending and time.monotonic() < deadline:
+            callbacks, self.callbacks = self.callbacks, []
+            for callback in callbacks:
+                callback()
+            time.sleep(0.001)
+        return runner.pending == 0
+
+
+class TestTaskRunner(unittest.TestCase):
+    def setUp(self):
+        self.after = FakeAfter()
+        self.busy = []
+        self.runner = TaskRunner(self.after, max_workers=2, on_busy=self.busy.append)
+        self.addCleanup(self.runner.close)
+
+    def test_result_is_delivered_on_the_polling_thread(self):
+        results = []
+        worker = []
+        self.runner.submit(lambda x: worker.append(threading.current_thread()) or x * 2, 21,
+                           on_done=lambda r: results.append((r, threading.current_thread())))
+        self.assertTrue(self.after.pump(self.runner))
+        self.assertEqual(results, [(42, threading.current_thread())])
+        self.assertIsNot(worker[0], threading.current_thread())
+        self.assertEqual(self.busy, [True, False])
+        self.assertEqual(self.after.callbacks, [])  # polling stops once nothing is outstanding
+
+    def test_errors_go_to_on_error(self):
+        errors = []
+        self.runner.submit(lambda: 1 / 0, on_error=errors.append)
+        self.assertTrue(self.after.pump(self.runner))
+        self.assertIsInstance(errors[0], ZeroDivisionError)
+
+    def test_newer_task_with_the_same_key_supersedes(self):
+        release = threading.Event()
+        results = []
+
+        def search(term):
+            if term == "pi":
+                release.wait(5)  # the stale search is still running when the next one is submitted
+            return term
+
+        self.runner.submit(search, "pi", on_done=results.append, key="search")
+        self.runner.submit(search, "pizza", on_done=results.append, key="search")
+        release.set()
+        self.assertTrue(self.after.pump(self.runner))
+        self.assertEqual(results, ["pizza"])
+
+    def test_queued_task_is_cancelled_before_it_runs(self):
+        block = threading.Event()
+        ran = []
+        for _ in range(2):
+            self.runner.submit(block.wait, 5)  # occupy both workers
+        self.runner.submit(ran.append, "stale", key="search")
+        self.runner.cancel("search")
+        block.set()
+        self.assertTrue(self.after.pump(self.runner))
+        self.assertEqual(ran, [])
+
+    def test_failing_callback_does_not_block_other_results(self):
+        results = []
+        self.runner.submit(lambda: 1, on_done=lambda r: 1 / 0)
+        self.runner.submit(lambda: 2, on_done=results.append)
+        with unittest.mock.patch("traceback.print_exc"):
+            self.assertTrue(self.after.pump(self.runner))
+        self.assertEqual(results, [2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,281 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+import unittest.mock
+
+from Password_Hashing import PasswordHasher
+from User_Registration import OutboxMailer, UserRegistration
+from User_Store import load_users, save_users
+
+
+class TestUserRegistration(unittest.TestCase):
+    def setUp(self):
+        self.registration = UserRegistration()
+
+    def test_successful_registration(self):
+        result = self.registration.register("user@example.com", "Password123", "Password123")
+        self.assertTrue(result["success"])
+        self.assertIn("user@example.com", self.registration.users)
+        self.assertIn("delivery_address", self.registration.users["user@example.com"])
+
+    def test_invalid_email(self):
+        result = self.registration.register("userexample.com", "Password123", "Password123")
+        self.assertFalse(result["success"])
+        self.assertEqual(result["error"], "Invalid email format")
+
+    def test_password_mismatch(self):
+        result = self.registration.register("user@example.com", "Password123", "Password321")
+        self.assertFalse(result["success"])
+        self.assertEqual(result["error"], "Passwords do not match")
+
+    def test_weak_password(self):
+        result = self.registration.register("user@example.com", "pass", "pass")
+        self.assertFalse(result["success"])
+        self.assertEqual(result["error"], "Password is not strong enough")
+
+    def test_email_already_registered(self):
+        self.registration.register("user@example.com", "Password123", "Password123")
+        result = self.registration.register("user@example.com", "Password123", "Password123")
+        self.assertFalse(result["success"])
+        self.assertEqual(result["error"], "Email already registered")
+
+    def test_update_password_success(self):
+        self.registration.register("user@example.com", "Password123", "Password123")
+        result = self.registration.update_password("user@example.com", "Password123", "Newpass123", "Newpass123")
+        self.assertTrue(result["success"])
+        self.assertTrue(self.registration.verify_login("user@example.com", "Newpass123"))
+        self.assertFalse(self.registration.verify_login("user@example.com", "Password123"))
+
+    def test_update_password_wrong_current(self):
+        self.registration.register("user@example.com", "Password123", "Password123")
+        result = self.registration.update_password("user@example.com", "Wrong", "Newpass123", "Newpass123")
+        self.assertFalse(result["success"])
+        self.assertEqual(result["error"], "Current password is incorrect")
+
+    def test_concurrent_password_updates_cannot_both_win(self):
+        self.registration.register("user@example.com", "Password123", "Password123")
+        hash_password = self.registration.hasher.hash
+        racing = []
+
+        def hash_while_another_update_lands(password):
+            if not racing:
+                racing.append(None)
+                # A second request, verified against the same old password, completes during this hash
+                racing[0] = self.registration.update_password("user@example.com", "Password123",
+                                                              "Other1234", "Other1234")
+            return hash_password(password)
+
+        with unittest.mock.patch.object(self.registration.hasher, "hash", side_effect=hash_while_another_update_lands):
+            result = self.registration.update_password("user@example.com", "Password123", "Newpass123", "Newpass123")
+        self.assertTrue(racing[0]["success"])
+        self.assertFalse(result["success"])
+        self.assertTrue(self.registration.verify_login("user@example.com", "Other1234"))
+        self.assertFalse(self.registration.verify_login("user@example.com", "Newpass123"))
+
+    def test_update_delivery_address(self):
+        self.registration.register("user@example.com", "Password123", "Password123")
+        result = self.registration.update_delivery_address("user@example.com", "  456 New Ave  ")
+        self.assertTrue(result["success"])
+        self.assertEqual(self.registration.users["user@example.com"]["delivery_address"], "456 New Ave")
+
+    def test_password_is_stored_salted_and_hashed(self):
+        self.registration.register("a@example.com", "Password123", "Password123")
+        self.registration.register("b@example.com", "Password123", "Password123")
+        a = self.registration.users["a@example.com"]
+        b = self.registration.users["b@example.com"]
+        self.assertNotIn("password", a)
+        self.assertEqual(a["password_hash"]["algorithm"], "pbkdf2_sha256")
+        self.assertNotEqual(a["password_hash"]["hash"], b["password_hash"]["hash"])
+        self.assertTrue(self.registration.verify_login("a@example.com", "Password123"))
+        self.assertFalse(self.registration.verify_login("a@example.com", "Wrongpass123"))
+        self.assertFalse(self.registration.verify_login("nobody@example.com", "Password123"))
+
+    def test_legacy_plaintext_password_upgraded_on_login(self):
+        self.registration.users["old@example.com"] = {"password": "Password123"}
+        self.assertTrue(self.registration.verify_login("old@example.com", "Password123"))
+        self.assertNotIn("password", self.registration.users["old@example.com"])
+        self.assertTrue(self.registration.verify_login("old@example.com", "Password123"))
+
+    def test_work_factor_upgraded_on_login(self):
+        weak = UserRegistration(hasher=PasswordHasher(iterations=1000))
+        weak.register("user@example.com", "Password123", "Password123")
+
+        strong = UserRegistration(hasher=PasswordHasher(iterations=2000, pool_size=2))
+        strong.users = weak.users
+        self.assertTrue(strong.verify_login("user@example.com", "Password123"))
+        self.assertEqual(strong.users["user@example.com"]["password_hash"]["iterations"], 2000)
+        strong.hasher.shutdown()
+
+    def test_scrypt_hasher(self):
+        registration = UserRegistration(hasher=PasswordHasher("scrypt", scrypt_params={"n": 2 ** 10, "r": 8, "p": 1}))
+        registration.register("user@example.com", "Password123", "Password123")
+        self.assertEqual(registration.users["user@example.com"]["password_hash"]["n"], 2 ** 10)
+        self.assertTrue(registration.verify_login("user@example.com", "Password123"))
+
+    def test_unknown_email_still_hashes(self):
+        with unittest.mock.patch.object(self.registration.hasher, "verify", return_value=False) as verify:
+            self.assertFalse(self.registration.verify_login("nobody@example.com", "Password123"))
+        self.assertEqual(verify.call_count, 1)
+
+    def test_unknown_hash_algorithm_does_not_match(self):
+        self.registration.register("user@example.com", "Password123", "Password123")
+        self.registration.users["user@example.com"]["password_hash"]["algorithm"] = "md5"
+        self.assertFalse(self.registration.verify_login("user@example.com", "Password123"))
+        self.assertFalse(self.registration.hasher.verify("Password123", {"algorithm": "pbkdf2_sha256"}))
+
+    def test_bulk_register_collects_errors(self):
+        self.registration.register("taken@example.com", "Password123", "Password123")
+        rows = enumerate([
+            {"email": "a@example.com", "password": "Password123", "delivery_address": "1 Elm St"},
+            {"email": "not-an-email", "password": "Password123"},
+            {"email": "b@example.com", "password": "weak"},
+            {"email": "taken@example.com", "password": "Password123"},
+            {"email": "a@example.com", "password": "Password123"},
+            {"email": "c@example.com", "password": "Password123"},
+            {"email": 123, "password": "Password123"},
+            {"email": "d@example.com", "password": "Password123", "delivery_address": 7},
+        ], start=1)
+        report = self.registration.bulk_register(rows, batch_size=1)
+        self.assertEqual(report["imported"], 2)
+        self.assertEqual(report["duplicates"], 2)
+        self.assertEqual([(e["row"], e["error"]) for e in report["errors"]], [
+            (2, "Invalid email format"), (3, "Password is not strong enough"),
+            (4, "Email already registered"), (5, "Email already registered"),
+            (7, "email, password and delivery_address must be text"),
+            (8, "email, password and delivery_address must be text")])
+        self.assertEqual(report["errors"][-1]["email"], "d@example.com")
+        self.assertEqual(self.registration.users["a@example.com"]["delivery_address"], "1 Elm St")
+        self.assertTrue(self.registration.verify_login("c@example.com", "Password123"))
+
+    def test_import_users_file_writes_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "partner.csv")
+            with open(source, "w", encoding="utf-8") as f:
+                f.write("email,password\nx@example.com,Password123\ny@example.com,Password123\nbad,Password123\n")
+            users_file = os.path.join(tmp, "users.json")
+
+            report = self.registration.import_users_file(source, users_file=users_file)
+            self.assertEqual(report["imported"], 2)
+            self.assertEqual(report["errors"][0]["row"], 4)
+            self.assertTrue(os.path.exists(users_file))
+            self.assertGreater(report["rows_per_second"], 0)
+
+    def test_email_confirmation(self):
+        sent = {}
+        registration = UserRegistration(mailer=lambda email, token: sent.update({email: token}))
+        registration.register("user@example.com", "Password123", "Password123")
+        token = sent["user@example.com"]
+        self.assertNotIn(token, registration._tokens)
+
+        self.assertFalse(registration.confirm_email("bogus")["success"])
+        result = registration.confirm_email(token)
+        self.assertTrue(result["success"])
+        self.assertTrue(registration.users["user@example.com"]["confirmed"])
+        self.assertEqual(registration.confirm_email(token)["error"], "Invalid confirmation token")
+
+    def test_reissued_token_replaces_old_one(self):
+        registration = UserRegistration()
+        registration.register("user@example.com", "Password123", "Password123")
+        first = registration.issue_confirmation("user@example.com")
+        second = registration.issue_confirmation("user@example.com")
+        self.assertFalse(registration.confirm_email(first)["success"])
+        self.assertTrue(registration.confirm_email(second)["success"])
+        self.assertEqual(registration.pending_confirmations(), 0)
+
+    def test_sweeper_purges_only_expired_unconfirmed(self):
+        now = [1000.0]
+        sent = {}
+        registration = UserRegistration(mailer=lambda email, token: sent.update({email: token}),
+                                        confirmation_ttl=60, clock=lambda: now[0])
+        registration.users["imported@example.com"] = registration._new_user(None)
+        registration.register("early@example.com", "Password123", "Password123")
+        registration.register("done@example.com", "Password123", "Password123")
+        now[0] += 30
+        registration.register("late@example.com", "Password123", "Password123")
+        registration.confirm_email(sent["done@example.com"])
+
+        self.assertEqual(registration.sweep_expired(), [])
+        now[0] += 31
+        self.assertEqual(registration.confirm_email(sent["early@example.com"])["error"],
+                         "Confirmation token has expired")
+        self.assertEqual(registration.sweep_expired(), ["early@example.com"])
+        self.assertEqual(set(registration.users), {"imported@example.com", "done@example.com", "late@example.com"})
+        now[0] += 30
+        self.assertEqual(registration.sweep_expired(limit=1), ["late@example.com"])
+        self.assertEqual(registration.pending_confirmations(), 0)
+
+    def test_confirmations_survive_restart(self):
+        now = [1000.0]
+        sent = {}
+        registration = UserRegistration(mailer=lambda email, token: sent.update({email: token}),
+                                        confirmation_ttl=60, clock=lambda: now[0])
+        registration.register("keep@example.com", "Password123", "Password123")
+        registration.register("stale@example.com", "Password123", "Password123")
+        self.assertNotIn(sent["keep@example.com"], json.dumps(registration.users))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            users_file = os.path.join(tmp, "users.json")
+            save_users(registration.users, path=users_file)
+            restarted = UserRegistration(confirmation_ttl=60, clock=lambda: now[0])
+            restarted.users = load_users(users_file)
+        self.assertEqual(restarted.restore_confirmations(), 2)
+
+        self.assertTrue(restarted.confirm_email(sent["keep@example.com"])["success"])
+        self.assertNotIn("confirmation", restarted.users["keep@example.com"])
+        now[0] += 61
+        self.assertEqual(restarted.sweep_expired(), ["stale@example.com"])
+
+    def test_register_message_without_mailer(self):
+        result = self.registration.register("user@example.com", "Password123", "Password123")
+        self.assertEqual(result["message"], "Registration successful")
+        with tempfile.TemporaryDirectory() as tmp:
+            outbox = os.path.join(tmp, "outbox.jsonl")
+            registration = UserRegistration(mailer=OutboxMailer(outbox))
+            result = registration.register("user@example.com", "Password123", "Password123")
+            self.assertIn("confirmation email sent", result["message"])
+            with open(outbox, encoding="utf-8") as f:
+                token = json.loads(f.readline())["token"]
+        self.assertTrue(registration.confirm_email(token)["success"])
+
+    def test_background_sweeper(self):
+        registration = UserRegistration(confirmation_ttl=0)
+        registration.register("user@example.com", "Password123", "Password123")
+        purged = threading.Event()
+        registration.start_sweeper(interval=0.01, on_purge=lambda emails: purged.set())
+        self.assertTrue(purged.wait(2))
+        registration.stop_sweeper()
+        self.assertNotIn("user@example.com", registration.users)
+
+    def test_concurrent_register_same_email(self):
+        results = []
+        start = threading.Barrier(8)
+
+        def register():
+            start.wait()
+            results.append(self.registration.register("race@example.com", "Password123", "Password123"))
+
+        threads = [threading.Thread(target=register) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(sum(r["success"] for r in results), 1)
+
+    def test_lock_striping(self):
+        registration = UserRegistration(lock_stripes=4)
+        self.assertIs(registration.lock_for("a@example.com"), registration.lock_for("a@example.com"))
+        locks = {id(registration.lock_for(f"user{i}@example.com")) for i in range(100)}
+        self.assertGreater(len(locks), 1)
+        self.assertLessEqual(len(locks), 4)
+
+    def test_snapshot_is_a_copy(self):
+        self.registration.register("user@example.com", "Password123", "Password123")
+        snap = self.registration.snapshot()
+        snap["user@example.com"]["favorites"].append("Sushi House")
+        self.assertEqual(self.registration.users["user@example.com"]["favorites"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,119 @@
+import json
+import os
+import tempfile
+import unittest
+import unittest.mock
+
+import User_Store
+from User_Registration import UserRegistration
+from User_Store import (ShardedUserStore, load_users, open_user_store, rebalance_shards, save_users, shard_for,
+                        split_users_file)
+
+
+class TestShardedUserStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmpdir.name, "shards")
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def register_many(self, store, count):
+        registration = UserRegistration()
+        registration.users = store
+        for i in range(count):
+            self.assertTrue(registration.register(f"user{i}@example.com", "Password123", "Password123")["success"])
+        return registration
+
+    def test_shard_for_is_stable(self):
+        self.assertEqual(shard_for("user@example.com", 8), shard_for("user@example.com", 8))
+        self.assertEqual(len({shard_for(f"user{i}@example.com", 4) for i in range(100)}), 4)
+
+    def test_registration_routes_to_shards(self):
+        store = ShardedUserStore(self.directory, 4)
+        registration = self.register_many(store, 20)
+        self.assertEqual(registration.register("user0@example.com", "Password123", "Password123")["error"],
+                         "Email already registered")
+        store.save()
+
+        reopened = ShardedUserStore(self.directory, 4)
+        self.assertEqual(len(reopened), 20)
+        for i in range(20):
+            email = f"user{i}@example.com"
+            shard = load_users(reopened.shard_path(shard_for(email, 4)))
+            self.assertIn(email, shard)
+
+    def test_save_touches_only_one_shard(self):
+        store = ShardedUserStore(self.directory, 4)
+        self.register_many(store, 20)
+        store.save()
+        mtimes = {i: os.stat(store.shard_path(i)).st_mtime_ns for i in range(4)}
+
+        email = "user3@example.com"
+        store[email]["favorites"].append("Sushi House")
+        save_users(store, email=email)
+
+        changed = {i for i in range(4) if os.stat(store.shard_path(i)).st_mtime_ns != mtimes[i]}
+        self.assertEqual(changed, {shard_for(email, 4)})
+        self.assertEqual(ShardedUserStore(self.directory, 4)[email]["favorites"], ["Sushi House"])
+
+    def test_shard_count_mismatch_rejected(self):
+        ShardedUserStore(self.directory, 4)
+        with self.assertRaises(ValueError):
+            ShardedUserStore(self.directory, 8)
+
+    def test_rebalance(self):
+        store = ShardedUserStore(self.directory, 4)
+        self.register_many(store, 30)
+        store.save()
+
+        self.assertEqual(rebalance_shards(self.directory, 2)["users"], 30)
+        self.assertFalse(os.path.exists(store.shard_path(3)))
+        rebalanced = ShardedUserStore(self.directory, 2)
+        self.assertEqual(sorted(rebalanced), sorted(f"user{i}@example.com" for i in range(30)))
+
+        rebalance_shards(self.directory, 6)
+        self.assertEqual(len(ShardedUserStore(self.directory, 6)), 30)
+        self.assertEqual(len([d for d in os.listdir(self.directory) if d.startswith("layout-")]), 1)
+
+    def test_interrupted_rebalance_keeps_old_layout(self):
+        store = ShardedUserStore(self.directory, 4)
+        self.register_many(store, 10)
+        store.save()
+
+        real_write = User_Store._write_json
+
+        def crash_on_manifest(data, path):
+            if path.endswith(User_Store.MANIFEST_FILE):
+                raise OSError("disk full")
+            real_write(data, path)
+
+        with unittest.mock.patch.object(User_Store, "_write_json", side_effect=crash_on_manifest):
+            with self.assertRaises(OSError):
+                rebalance_shards(self.directory, 2)
+        reopened = ShardedUserStore(self.directory, 4)
+        self.assertEqual(len(reopened), 10)
+
+    def test_split_users_file_and_open_store(self):
+        users_file = os.path.join(self.tmpdir.name, "users.json")
+        with open(users_file, "w", encoding="utf-8") as f:
+            json.dump({"a@example.com": {"password": "Password123"}}, f)
+
+        split_users_file(users_file, self.directory, 3)
+        store = open_user_store(shards_dir=self.directory, shard_count=3)
+        self.assertIsInstance(store, ShardedUserStore)
+        self.assertEqual(store["a@example.com"]["favorites"], [])
+        self.assertEqual(open_user_store(users_file), load_users(users_file))
+
+    def test_import_command_writes_shards(self):
+        source = os.path.join(self.tmpdir.name, "partner.jsonl")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write('{"email": "x@example.com", "password": "Password123"}\n{"email": 5}\n')
+        with unittest.mock.patch("builtins.print"):
+            User_Store.main(["import", source, "--shards", "3", "--shards-dir", self.directory, "--hash-workers", "1",
+                             "--users-file", os.path.join(self.tmpdir.name, "users.json")])
+        self.assertFalse(os.path.exists(os.path.join(self.tmpdir.name, "users.json")))
+        self.assertIn("x@example.com", ShardedUserStore(self.directory, 3))
+
+if __name__ == "__main__":
+    unittest.main()
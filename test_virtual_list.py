@@ -0,0 +1,81 @@
+import unittest
+
+from Virtual_List import VirtualRows
+
+
+class TestVirtualRows(unittest.TestCase):
+    def setUp(self):
+        self.values = {key: (f"Restaurant {key}", 4.0) for key in range(1000)}
+        self.fetched = []
+
+        def fetch(keys):
+            self.fetched.append(len(keys))
+            return [self.values[key] for key in keys]
+
+        self.rows = VirtualRows(fetch, visible=10, buffer=5)
+
+    def apply(self, ops, view):
+        # What the Treeview adapter does with the operations
+        for key in ops["delete"]:
+            view.remove(key)
+        for index, key, _ in ops["insert"]:
+            view.insert(index, key)
+        for index, key in ops["move"]:
+            view.remove(key)
+            view.insert(index, key)
+        return view
+
+    def test_only_the_window_is_fetched(self):
+        self.rows.set_keys(range(1000))
+        ops = self.rows.render()
+        self.assertEqual(len(ops["insert"]), 15)  # 10 visible + 5 below; nothing above the top
+        self.assertEqual(self.fetched, [15])
+        self.rows.scroll_to(500)
+        ops = self.rows.render()
+        self.assertEqual([key for _, key, _ in ops["insert"]], list(range(495, 515)))
+        self.assertEqual(self.rows.row_offset(), 5)
+        self.assertEqual(self.rows.fraction(), (0.5, 0.51))
+
+    def test_scrolling_only_touches_rows_entering_and_leaving(self):
+        view = []
+        self.rows.set_keys(list(range(1000)))
+        self.rows.scroll_to(100)
+        self.apply(self.rows.render(), view)
+        self.rows.scroll_by(3)
+        ops = self.rows.render()
+        self.assertEqual(ops["delete"], [95, 96, 97])
+        self.assertEqual([key for _, key, _ in ops["insert"]], [115, 116, 117])
+        self.assertEqual(ops["move"], [])
+        self.assertEqual(self.apply(ops, view), list(range(98, 118)))
+
+    def test_new_search_is_diffed_against_the_rendered_rows(self):
+        view = []
+        self.rows.set_keys(list(range(0, 30, 2)))
+        self.apply(self.rows.render(), view)
+        self.values[4] = ("Restaurant 4", 4.5)
+        self.rows.set_keys(list(range(0, 30, 4)))  # a narrower search: a subset of the same rows
+        ops = self.rows.render()
+        self.assertEqual(ops["insert"], [])
+        self.assertEqual(ops["update"], [(4, ("Restaurant 4", 4.5))])
+        self.assertEqual(self.apply(ops, view), list(range(0, 30, 4)))
+
+    def test_reordered_keys_are_moved_into_place(self):
+        view = []
+        self.rows.set_keys([1, 2, 3, 4])
+        self.apply(self.rows.render(), view)
+        self.rows.set_keys([4, 9, 2, 1])
+        self.assertEqual(self.apply(self.rows.render(), view), [4, 9, 2, 1])
+
+    def test_scroll_is_clamped(self):
+        self.rows.set_keys(range(25))
+        self.rows.scroll_to(100)
+        self.assertEqual(self.rows.top, 15)
+        self.rows.scroll_by(-50)
+        self.assertEqual(self.rows.top, 0)
+        self.rows.set_keys([])
+        self.assertEqual((self.rows.top, self.rows.fraction()), (0, (0.0, 1.0)))
+        self.assertEqual(self.rows.render()["insert"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()